@@ -0,0 +1,206 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\activity_log_queries.py
+"""
+One query engine for every activity-log table.
+
+LOG_SOURCES describes each log table: its time column, and which columns hold
+the acting user, the greenhouse and the logged entity. query_logs() turns the
+shared filters (user_id, greenhouse_id, entity_id, from, to) into a keyset page
+ordered newest first on (time, log_id), using pagination.keyset_page.
+
+The indexes that serve those queries are generated from the same descriptions:
+(time, log_id) for unfiltered pages, plus (filter column, time, log_id) for
+each filter a table supports. Each page is then one index range scan, no matter
+how large the table grows.
+
+Display names shown next to each log (user, admin, harvest, plant, component)
+come from many-to-one relationships. query_logs() joins them into the page
+query, loading only the columns the serializers read, so a page costs one
+SELECT instead of one per row per relationship.
+"""
+from datetime import datetime
+
+import pytz
+from sqlalchemy import Index
+from sqlalchemy.orm import joinedload
+
+from pagination import keyset_page, parse_limit, decode_cursor
+from models.activity_logs.admin_activity_logs_model import AdminActivityLogs
+from models.activity_logs.user_activity_logs_model import UserActivityLogs
+from models.activity_logs.greenhouse_activity_logs_model import GreenHouseActivityLogs
+from models.activity_logs.rejection_activity_logs_model import RejectionActivityLogs
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.activity_logs.maintenance_activity_logs_model import MaintenanceActivityLogs
+from models.activity_logs.harvest_activity_logs_model import HarvestActivityLogs
+from models.activity_logs.hardware_components_activity_logs_model import HardwareComponentActivityLogs
+from models.activity_logs.nutrient_controller_activity_logs_model import NutrientControllerActivityLogs
+from models.activity_logs.inventory_log_model import InventoryLog
+from models.activity_logs.planted_crop_activity_logs_model import PlantedCropActivityLogs
+from models.activity_logs.inventory_container_activity_logs import InventoryContainerLog
+from models.activity_logs.sale_activity_log_model import SaleLog
+from models.activity_logs.inventory_item_logs import InventoryItemLog
+
+PH_TZ = pytz.timezone('Asia/Manila')
+DEFAULT_LOG_LIMIT = 200
+MAX_LOG_LIMIT = 1000
+# Statements one log page may issue (page query only; tests/test_activity_log_queries.py checks it)
+LOG_PAGE_QUERY_BUDGET = 2
+
+USER_NAME_COLUMNS = ("first_name", "last_name")
+
+
+class LogSource:
+    """Column names of one log table; None where the table has no such column."""
+
+    def __init__(self, model, time, user=None, greenhouse=None, entity=None, joined=None):
+        self.model = model
+        self.time_column = getattr(model, time)
+        self.id_column = model.log_id
+        self.filter_columns = {
+            "user_id": getattr(model, user) if user else None,
+            "greenhouse_id": getattr(model, greenhouse) if greenhouse else None,
+            "entity_id": getattr(model, entity) if entity else None,
+        }
+        # relationship name -> columns of the related row the serializer reads
+        self.joined = joined or {}
+
+    def load_options(self):
+        options = []
+        for relationship_name, columns in self.joined.items():
+            relationship = getattr(self.model, relationship_name)
+            target = relationship.property.mapper.class_
+            options.append(joinedload(relationship).load_only(*(getattr(target, column) for column in columns)))
+        return options
+
+    def supports(self, filter_name):
+        return self.filter_columns[filter_name] is not None
+
+
+LOG_SOURCES = {
+    "admin": LogSource(AdminActivityLogs, "log_date", user="login_id", joined={"admin": ("name",)}),
+    "user": LogSource(UserActivityLogs, "log_date", user="login_id", joined={"users": USER_NAME_COLUMNS}),
+    "greenhouse": LogSource(GreenHouseActivityLogs, "log_date", user="login_id", greenhouse="greenhouse_id", entity="greenhouse_id",
+                            joined={"users": USER_NAME_COLUMNS}),
+    "rejection": LogSource(RejectionActivityLogs, "log_date", user="login_id", entity="rejection_id",
+                           joined={"users": USER_NAME_COLUMNS, "reason_for_rejection": ("plant_name",)}),
+    "hardware_status": LogSource(HardwareStatusActivityLogs, "timestamp", greenhouse="greenhouse_id", entity="component_id"),
+    "maintenance": LogSource(MaintenanceActivityLogs, "log_date", user="login_id", entity="maintenance_id"),
+    "harvest": LogSource(HarvestActivityLogs, "log_date", user="login_id", entity="harvest_id",
+                         joined={"users": USER_NAME_COLUMNS, "harvests": ("name", "plant_name")}),
+    "hardware_components": LogSource(HardwareComponentActivityLogs, "log_date", user="login_id", entity="component_id",
+                                     joined={"users": USER_NAME_COLUMNS, "hardware_components": ("componentName",)}),
+    "nutrient_controller": LogSource(NutrientControllerActivityLogs, "logs_date", greenhouse="greenhouse_id", entity="controller_id"),
+    "inventory": LogSource(InventoryLog, "timestamp", user="user_id", entity="inventory_id", joined={"users": USER_NAME_COLUMNS}),
+    "planted_crops": LogSource(PlantedCropActivityLogs, "log_date", user="login_id", entity="plant_id",
+                               joined={"users": USER_NAME_COLUMNS, "planted_crops": ("plant_name",)}),
+    "inventory_container": LogSource(InventoryContainerLog, "timestamp", user="user_id", entity="inventory_container_id"),
+    "sale": LogSource(SaleLog, "timestamp", user="login_id", entity="sale_id", joined={"users": USER_NAME_COLUMNS}),
+    "inventory_item": LogSource(InventoryItemLog, "timestamp", user="user_id", entity="inventory_item_id",
+                                joined={"users": USER_NAME_COLUMNS}),
+}
+
+
+def _declare_indexes():
+    """Adds the keyset indexes for every source to the table metadata (see the migration of the same names)."""
+    for source in LOG_SOURCES.values():
+        table = source.model.__table__
+        names = {index.name for index in table.indexes}
+        wanted = {f"ix_{table.name}_keyset": (source.time_column, source.id_column)}
+        for column in source.filter_columns.values():
+            if column is not None:
+                wanted[f"ix_{table.name}_{column.key}_keyset"] = (column, source.time_column, source.id_column)
+        for name, columns in wanted.items():
+            if name not in names:
+                Index(name, *columns)
+
+
+_declare_indexes()
+
+
+class LogQueryError(ValueError):
+    """Invalid filter or paging arguments; .details maps argument name -> message."""
+
+    def __init__(self, details):
+        super().__init__("Validation failed.")
+        self.details = details
+
+
+def parse_log_datetime(value, column):
+    """
+    YYYY-MM-DD or ISO datetime, PH time when naive. Columns without a time zone hold
+    PH local time, so the bound is compared as naive PH time there.
+    """
+    parsed = datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is None:
+        parsed = PH_TZ.localize(parsed)
+    if getattr(column.type, "timezone", False):
+        return parsed
+    return parsed.astimezone(PH_TZ).replace(tzinfo=None)
+
+
+def query_logs(log_type, args, default_limit=DEFAULT_LOG_LIMIT):
+    """
+    Returns (rows, next_cursor) for one newest-first page of the log_type table.
+    args is a mapping like request.args with optional user_id, greenhouse_id,
+    entity_id, from, to, limit and cursor. Raises LogQueryError for bad arguments.
+    """
+    source = LOG_SOURCES[log_type]
+    query = source.model.query.options(*source.load_options())
+    return filtered_page(query, source.filter_columns, source.time_column, source.id_column, args,
+                         f"{log_type} logs", default_limit)
+
+
+def filter_query(query, filter_columns, time_column, args, label, details=None):
+    """
+    Applies the shared log filters (user_id, greenhouse_id, entity_id, from, to) to query.
+    filter_columns maps each filter to a column, or None where label has none.
+    Raises LogQueryError unless details (a dict to collect errors in) is passed.
+    """
+    collect = details is not None
+    details = details if collect else {}
+    for filter_name in ("user_id", "greenhouse_id", "entity_id"):
+        value = args.get(filter_name)
+        if value in (None, ""):
+            continue
+        if filter_columns.get(filter_name) is None:
+            details[filter_name] = f"Not available for {label}."
+            continue
+        try:
+            query = query.filter(filter_columns[filter_name] == int(value))
+        except ValueError:
+            details[filter_name] = "Must be an integer."
+
+    for arg, compare in (("from", lambda column, bound: column >= bound), ("to", lambda column, bound: column < bound)):
+        value = args.get(arg)
+        if not value:
+            continue
+        try:
+            query = query.filter(compare(time_column, parse_log_datetime(value, time_column)))
+        except ValueError:
+            details[arg] = "Invalid date. Use YYYY-MM-DD or an ISO datetime."
+
+    if details and not collect:
+        raise LogQueryError(details)
+    return query
+
+
+def filtered_page(query, filter_columns, time_column, id_column, args, label, default_limit=DEFAULT_LOG_LIMIT):
+    """Applies the shared log filters to query and returns one keyset page (see query_logs)."""
+    details = {}
+    query = filter_query(query, filter_columns, time_column, args, label, details)
+
+    limit = None
+    try:
+        limit = parse_limit(args.get("limit"), default=default_limit, maximum=MAX_LOG_LIMIT)
+    except ValueError:
+        details["limit"] = "Invalid limit. Must be an integer."
+    cursor = args.get("cursor")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            details["cursor"] = "Invalid cursor."
+
+    if details:
+        raise LogQueryError(details)
+    return keyset_page(query, time_column, id_column, cursor=cursor, limit=limit)
+
@@ -0,0 +1,172 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\activity_log_writer.py
+"""
+Optional buffered writer for activity logs.
+
+With ACTIVITY_LOG_MODE=buffered, write_log() (and so log_activity()) puts the
+log row on a bounded in-memory queue and returns at once. A background thread
+inserts queued rows in batches (one transaction per batch), so those log writes
+leave the request's critical path. The queue is drained on shutdown.
+
+A log is still written synchronously, in the caller's transaction, when:
+- the caller passes consistent=True (the log must commit or roll back with the data),
+- the session's transaction already has writes, pending or flushed
+  (log_activity() has always committed them together with the log, and callers
+  rely on that),
+- the writer is not running in this process (ACTIVITY_LOG_MODE=sync, the default),
+- or the queue is full (overflow falls back instead of dropping audit rows).
+
+Not every log goes through write_log(): helpers that flush a log row to read its
+log_id in the same transaction as the data (log_harvest_activity,
+log_inventory_change, log_planted_crop_activity, ...) are written and committed
+with the caller's data in every mode.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+from flask import current_app, has_app_context
+
+from db import db
+from notifications import transaction_has_writes
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0 # seconds
+
+
+class ActivityLogWriter:
+    """Bounded queue + batch flusher for activity-log rows."""
+
+    def __init__(self, app, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.app = app
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self.stats = {"enqueued": 0, "overflow": 0, "written": 0, "failed": 0, "batches": 0}
+
+    def submit(self, model, fields):
+        """Queues one row. Returns False when the queue is full (caller writes it synchronously)."""
+        with self._cond:
+            if self._stopping or len(self._queue) >= self.queue_size:
+                self.stats["overflow"] += 1
+                return False
+            self._queue.append((model, fields))
+            self.stats["enqueued"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def _take_batch(self):
+        return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stopping and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping and not self._queue:
+                    return
+                batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                # add_all + one commit: SQLAlchemy sends each table's rows as a multi-row INSERT,
+                # and the flush still feeds the outbox like any other insert
+                db.session.add_all([model(**fields) for model, fields in batch])
+                db.session.commit()
+                written = len(batch)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.warning(f"Activity log batch of {len(batch)} failed ({e}); retrying rows one by one.")
+                written = self._write_one_by_one(batch)
+        with self._cond:
+            self.stats["batches"] += 1
+            self.stats["written"] += written
+            self.stats["failed"] += len(batch) - written
+
+    def _write_one_by_one(self, batch):
+        written = 0
+        for model, fields in batch:
+            try:
+                db.session.add(model(**fields))
+                db.session.commit()
+                written += 1
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Dropping {model.__name__} log row that cannot be stored: {e}. Row: {fields}")
+        return written
+
+    def flush_now(self):
+        """Synchronously drains the queue (used on shutdown and in tests)."""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush_now()
+
+    def snapshot_stats(self):
+        with self._cond:
+            return dict(self.stats, queued=len(self._queue))
+
+
+def init_activity_log_writer(app):
+    """Starts the writer when ACTIVITY_LOG_MODE=buffered; stored in app.extensions['activity_log_writer']."""
+    if os.environ.get("ACTIVITY_LOG_MODE", "sync").lower() != "buffered":
+        return None
+    writer = ActivityLogWriter(
+        app,
+        queue_size=int(os.environ.get("ACTIVITY_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+        batch_size=int(os.environ.get("ACTIVITY_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        flush_interval=float(os.environ.get("ACTIVITY_LOG_FLUSH_SECONDS", DEFAULT_FLUSH_INTERVAL)),
+    ).start()
+    atexit.register(writer.stop)
+    app.extensions['activity_log_writer'] = writer
+    app.logger.info(f"Buffered activity-log writer started in PID {os.getpid()}.")
+    return writer
+
+
+def write_log(model, consistent=False, **fields):
+    """
+    Records one activity-log row (see the module docstring for when it is buffered).
+    Synchronous writes commit the session, as log_activity() always has.
+    """
+    writer = current_app.extensions.get('activity_log_writer') if has_app_context() else None
+    if writer is not None and not consistent and not transaction_has_writes(db.session()):
+        if writer.submit(model, fields):
+            return None
+    try:
+        log_entry = model(**fields)
+        db.session.add(log_entry)
+        db.session.commit()
+        return log_entry
+    except Exception:
+        db.session.rollback()
+        raise
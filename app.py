@@ -13,6 +13,19 @@ from apscheduler.schedulers.background import BackgroundScheduler
 # import callbacks
 # Import the initialization function from firebase_listener.py
 from firebase_listener import init_firebase_listener
+from sensor_ingest import sensor_stream_running
+from notifications import init_notifications
+from outbox import relay_outbox # Importing registers the outbox capture hooks
+import sync # Importing registers the outbox retention of synced channels
+from activity_log_writer import init_activity_log_writer
+import audit_log # Importing registers the audit_events capture hooks
+from partitions import maintain_partitions
+from log_archive import archive_logs
+from dashboard_snapshots import init_dashboard_snapshots, refresh_snapshots, REFRESH_SECONDS as DASHBOARD_REFRESH_SECONDS
+from response_cache import init_response_cache
+from request_instrumentation import init_request_instrumentation
+from metrics import engine_options, init_metrics, init_scheduler_metrics
+from profiler import init_profiler
 
 
 app = Flask(__name__)
@@ -41,8 +54,24 @@ from routes.inventory_routes import inventory_api
 from routes.sales_routes import sale_api
 from routes.sensor_readings_routes import sensor_readings_api, fetch_and_store_firebase_data
 from routes.inventory_item_routes import inventory_item_api
+from routes.stream_routes import stream_api
+from routes.sync_routes import sync_api
+from routes.audit_routes import audit_api
+from routes.analytics_routes import analytics_api
+from routes.dashboard_routes import dashboard_api
+from routes.cache_routes import cache_api
+from routes.metrics_routes import metrics_api
+from routes.profiler_routes import profiler_api
 
 app.register_blueprint(inventory_item_api)
+app.register_blueprint(stream_api)
+app.register_blueprint(sync_api)
+app.register_blueprint(audit_api)
+app.register_blueprint(analytics_api)
+app.register_blueprint(dashboard_api)
+app.register_blueprint(cache_api)
+app.register_blueprint(metrics_api)
+app.register_blueprint(profiler_api)
 app.register_blueprint(sale_api)
 app.register_blueprint(control_api)
 app.register_blueprint(users_api)
@@ -69,8 +98,16 @@ load_dotenv(find_dotenv())
 Bootstrap5(app)
 
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DB_URI", "sqlite:///agreemo.db")
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI']) # Times pool checkouts for /metrics
 db.init_app(app)
 migrate = Migrate(app, db)
+init_metrics(app) # Request latency histograms for GET /metrics
+init_profiler(app) # Sampled/admin-triggered request profiles when PROFILER_ENABLED=true
+init_request_instrumentation(app) # Query counts, DB time and Server-Timing per request when REQUEST_INSTRUMENTATION=true
+init_notifications(app) # Sends NOTIFY events queued after a commit at the end of the request
+init_activity_log_writer(app) # Background batch writer for activity logs when ACTIVITY_LOG_MODE=buffered
+init_response_cache(app) # Read-through cache for the hot GET lists, invalidated on writes and outbox NOTIFY
+init_dashboard_snapshots(app) # Refreshes a greenhouse's dashboard snapshot when its rows change
 
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY")
 jwt = JWTManager(app)
@@ -84,8 +121,53 @@ init_firebase_listener(app)
 
 # --- Scheduler Setup ---
 scheduler = BackgroundScheduler()
-# IMPORTANT: Pass the Flask app context to the scheduled function
-scheduler.add_job(func=lambda: fetch_and_store_firebase_data(app), trigger="interval", hours=2)
+init_scheduler_metrics(scheduler) # Job durations for GET /metrics, labelled with the job name
+
+
+def poll_sensor_readings():
+    # The sensorReadings stream (sensor_ingest.py) stores every change as it happens; the
+    # 2-hour snapshot is only a fallback for when no process is streaming
+    if sensor_stream_running(app):
+        return
+    # IMPORTANT: Pass the Flask app context to the scheduled function
+    fetch_and_store_firebase_data(app)
+
+
+scheduler.add_job(func=poll_sensor_readings, trigger="interval", hours=2, name="fetch_and_store_firebase_data")
+# Outbox relay: safe in every worker (consumers are locked per pass). Set OUTBOX_RELAY_IN_WEB=false
+# when running run_outbox_relay.py as a separate worker process instead.
+if os.environ.get("OUTBOX_RELAY_IN_WEB", "true").lower() in ("1", "true", "yes"):
+    scheduler.add_job(func=lambda: relay_outbox(app), trigger="interval", name="relay_outbox",
+                      seconds=int(os.environ.get("OUTBOX_RELAY_SECONDS", 5)), max_instances=1, coalesce=True)
+
+
+def run_partition_maintenance():
+    # Creates upcoming monthly partitions and drops (archives) expired ones; see partitions.py
+    with app.app_context():
+        maintain_partitions()
+
+
+scheduler.add_job(func=run_partition_maintenance, trigger="interval", hours=24)
+
+
+def run_log_archiver():
+    # Moves activity logs older than LOG_ARCHIVE_HOT_DAYS to compressed files; see log_archive.py
+    with app.app_context():
+        archive_logs()
+
+
+if os.environ.get("LOG_ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes"):
+    scheduler.add_job(func=run_log_archiver, trigger="interval", hours=24, max_instances=1, coalesce=True)
+
+
+def run_dashboard_refresh():
+    # Recomputes every greenhouse's dashboard snapshot; see dashboard_snapshots.py
+    with app.app_context():
+        refresh_snapshots()
+
+
+scheduler.add_job(func=run_dashboard_refresh, trigger="interval", seconds=DASHBOARD_REFRESH_SECONDS,
+                  max_instances=1, coalesce=True)
 scheduler.start()
 
 
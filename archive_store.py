@@ -0,0 +1,98 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\archive_store.py
+"""
+Compressed archive files for rows removed from the hot database.
+
+Each archive is a gzip NDJSON file (one JSON object per row) under
+ARCHIVE_DIR/<table>/, next to a <name>.manifest.json describing it: table,
+row count, time range, columns and checksum. Readers only need the manifests
+to decide which files cover a time range.
+"""
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+
+import pytz
+
+from outbox import json_default
+
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def write_archive(table, name, rows, time_column):
+    """
+    Writes rows (an iterable of dicts, consumed once) to ARCHIVE_DIR/table/name.ndjson.gz
+    and its manifest. The file is written under a temporary name and renamed when
+    complete. Returns the manifest dict.
+    """
+    directory = os.path.join(ARCHIVE_DIR, table)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.ndjson.gz")
+    # Unique per writer, so a concurrent writer can never truncate this one's file
+    temporary_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.partial"
+
+    count, columns, min_time, max_time = 0, None, None, None
+    digest = hashlib.sha256()
+    with gzip.open(temporary_path, "wt", encoding="utf-8") as archive:
+        for row in rows:
+            line = json.dumps(row, default=json_default, separators=(",", ":")) + "\n"
+            archive.write(line)
+            digest.update(line.encode("utf-8"))
+            count += 1
+            columns = columns or list(row)
+            time_value = row.get(time_column)
+            if time_value is not None:
+                min_time = time_value if min_time is None or time_value < min_time else min_time
+                max_time = time_value if max_time is None or time_value > max_time else max_time
+    os.replace(temporary_path, path)
+
+    manifest = {
+        "table": table,
+        "file": os.path.basename(path),
+        "rows": count,
+        "time_column": time_column,
+        "min_time": _iso(min_time),
+        "max_time": _iso(max_time),
+        "columns": columns or [],
+        "sha256": digest.hexdigest(), # Of the uncompressed NDJSON
+        "created_at": datetime.now(pytz.utc).isoformat(),
+    }
+    with open(os.path.join(directory, f"{name}.manifest.json"), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+def list_manifests(table):
+    """Manifests of every archive of table, oldest data first."""
+    directory = os.path.join(ARCHIVE_DIR, table)
+    if not os.path.isdir(directory):
+        return []
+    manifests = []
+    for file_name in os.listdir(directory):
+        if file_name.endswith(".manifest.json"):
+            with open(os.path.join(directory, file_name), encoding="utf-8") as manifest_file:
+                manifests.append(json.load(manifest_file))
+    return sorted(manifests, key=lambda manifest: manifest["min_time"] or "")
+
+
+def read_archive(manifest):
+    """Yields the rows of one archive as dicts (values as stored: datetimes are ISO strings)."""
+    path = os.path.join(ARCHIVE_DIR, manifest["table"], manifest["file"])
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            yield json.loads(line)
+
+
+def delete_archive(manifest):
+    """Removes an archive and its manifest (used when the rows could not be removed from the database)."""
+    directory = os.path.join(ARCHIVE_DIR, manifest["table"])
+    name = manifest["file"][:-len(".ndjson.gz")]
+    for path in (os.path.join(directory, manifest["file"]), os.path.join(directory, f"{name}.manifest.json")):
+        if os.path.exists(path):
+            os.remove(path)
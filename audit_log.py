@@ -0,0 +1,291 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\audit_log.py
+"""
+Consolidated audit log (audit_events).
+
+Every activity-log row, whatever its legacy table, is mirrored into one
+audit_events row with common columns: entity_type (the log type), entity_id,
+actor, greenhouse, occurred_at and description. payload keeps the legacy row's
+columns as JSON(B). Cross-entity questions such as "what happened in greenhouse
+8 today" are then one index range scan instead of one scan per log table.
+
+- Capture: a session after_flush hook inserts the audit rows on the same
+  connection as the log rows, so both commit or roll back together. Deleting
+  legacy log rows through the session, one by one or in bulk, deletes their
+  audit rows. Retention does not: dropped partitions (partitions.py) and
+  archived rows (log_archive.py) keep their audit rows, which follow
+  audit_events' own retention (RETENTION_MONTHS_AUDIT_EVENTS).
+- Backfill: backfill_audit_events() copies rows written before capture existed
+  (run_audit_backfill.py). It is idempotent and can be re-run at any time.
+- View layer: query_audit_view() rebuilds legacy log objects from audit_events, so
+  the per-type /activity_logs endpoints read from it unchanged when
+  ACTIVITY_LOG_READS=audit_events (switch after the backfill has finished).
+  The setting is read at import time, so switching it needs a restart.
+
+On PostgreSQL audit_events is range-partitioned by month (PH time) on
+occurred_at; partitions.py creates the monthly partitions ahead of time and
+rows outside them land in audit_events_default.
+"""
+import json
+import os
+from datetime import datetime
+
+import pytz
+from sqlalchemy import DateTime, event, select
+from sqlalchemy.orm import Session, make_transient_to_detached, load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db import db
+from activity_log_queries import (LogSource, LogQueryError, LOG_SOURCES, DEFAULT_LOG_LIMIT, LOG_PAGE_QUERY_BUDGET,
+                                  query_logs, filtered_page)
+from outbox import serialize_row, json_default, fetch_server_defaults
+from partitions import ensure_partitions
+from models.audit_event_model import AuditEvent
+from models.activity_logs.admin_activity_logs_model import AdminActivityLogs
+from models.activity_logs.control_activity_logs_model import ControlActivityLogs
+from models.harvest_model import Harvest
+from models.reason_for_rejection_model import ReasonForRejection
+from models.hardware_component_model import HardwareComponents
+from models.planted_crops_model import PlantedCrops
+from models.inventory_model import Inventory, InventoryContainer
+from models.inventory_items import InventoryItem
+
+PH_TZ = pytz.timezone('Asia/Manila')
+# 'tables' (legacy log tables) or 'audit_events' (the view layer below)
+LOG_READS = os.environ.get("ACTIVITY_LOG_READS", "tables").lower()
+BACKFILL_BATCH_SIZE = 1000
+
+# Log type -> LogSource. Same keys as activity_log_queries.LOG_SOURCES, plus control logs.
+AUDIT_SOURCES = dict(LOG_SOURCES, control=LogSource(ControlActivityLogs, "log_date"))
+# Log types whose rows have no greenhouse_id: the greenhouse of the logged entity is used
+GREENHOUSE_FROM_ENTITY = {
+    "harvest": Harvest,
+    "rejection": ReasonForRejection,
+    "hardware_components": HardwareComponents,
+    "planted_crops": PlantedCrops,
+    "inventory": Inventory,
+    "inventory_container": InventoryContainer,
+    "inventory_item": InventoryItem,
+}
+DESCRIPTION_COLUMNS = ("logs_description", "description", "log_message")
+
+_TYPE_BY_MODEL = {source.model: log_type for log_type, source in AUDIT_SOURCES.items()}
+# Payloads and occurred_at need server-default columns such as ControlActivityLogs.log_date
+fetch_server_defaults(_TYPE_BY_MODEL)
+
+
+# --- Capture ---
+def _occurred_at(value):
+    """Aware time of a log row; naive log times are PH local time."""
+    if value is None:
+        return datetime.now(pytz.utc)
+    return PH_TZ.localize(value) if value.tzinfo is None else value
+
+
+def _entity_greenhouses(connection, log_type, entity_ids):
+    """{entity_id: greenhouse_id} for the entities of log_type (one SELECT)."""
+    model = GREENHOUSE_FROM_ENTITY.get(log_type)
+    entity_ids = {entity_id for entity_id in entity_ids if entity_id is not None}
+    if model is None or not entity_ids:
+        return {}
+    id_column = model.__mapper__.primary_key[0]
+    rows = connection.execute(select(id_column, model.greenhouse_id).where(id_column.in_(entity_ids)))
+    return {entity_id: greenhouse_id for entity_id, greenhouse_id in rows}
+
+
+def audit_rows(connection, log_type, logs):
+    """audit_events insert parameters for legacy log objects of one log type."""
+    source = AUDIT_SOURCES[log_type]
+    table_name = source.model.__tablename__
+    columns = {name: column.key if column is not None else None for name, column in source.filter_columns.items()}
+    documents = [serialize_row(log) for log in logs]
+    greenhouses = {}
+    if columns["greenhouse_id"] is None and columns["entity_id"] is not None:
+        greenhouses = _entity_greenhouses(connection, log_type, [document.get(columns["entity_id"]) for document in documents])
+
+    rows = []
+    for document in documents:
+        entity_id = document.get(columns["entity_id"]) if columns["entity_id"] else None
+        actor_id = document.get(columns["user_id"]) if columns["user_id"] else None
+        if columns["greenhouse_id"]:
+            greenhouse_id = document.get(columns["greenhouse_id"])
+        else:
+            greenhouse_id = greenhouses.get(entity_id)
+        rows.append({
+            "entity_type": log_type,
+            "entity_id": entity_id,
+            "actor_type": ("admin" if source.model is AdminActivityLogs else "user") if actor_id is not None else None,
+            "actor_id": actor_id,
+            "greenhouse_id": greenhouse_id,
+            "occurred_at": _occurred_at(document.get(source.time_column.key)),
+            "description": next((document[name] for name in DESCRIPTION_COLUMNS if document.get(name)), None),
+            "source_table": table_name,
+            "source_log_id": document["log_id"],
+            "payload": json.loads(json.dumps(document, default=json_default)),
+        })
+    return rows
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_audit_events(session, flush_context):
+    inserted, deleted = {}, {}
+    for instance in session.new:
+        log_type = _TYPE_BY_MODEL.get(type(instance))
+        if log_type:
+            inserted.setdefault(log_type, []).append(instance)
+    for instance in session.deleted:
+        log_type = _TYPE_BY_MODEL.get(type(instance))
+        if log_type:
+            deleted.setdefault(log_type, []).append(instance.log_id)
+    if not inserted and not deleted:
+        return
+    connection = session.connection()
+    for log_type, logs in inserted.items():
+        connection.execute(AuditEvent.__table__.insert(), audit_rows(connection, log_type, logs))
+    for log_type, log_ids in deleted.items():
+        connection.execute(AuditEvent.__table__.delete().where(
+            AuditEvent.source_table == AUDIT_SOURCES[log_type].model.__tablename__,
+            AuditEvent.source_log_id.in_(log_ids)))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _delete_audit_events_bulk(orm_execute_state):
+    """Mirrors bulk deletes of log rows (query.delete(), delete(Model)) before they run."""
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    log_type = _TYPE_BY_MODEL.get(mapper.class_) if mapper is not None else None
+    if log_type is None:
+        return
+    source = AUDIT_SOURCES[log_type]
+    audit_events = AuditEvent.__table__
+    condition = audit_events.c.source_table == source.model.__tablename__
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        # Same filter as the delete, e.g. the logs of one greenhouse in DELETE /greenhouse
+        condition = condition & audit_events.c.source_log_id.in_(select(source.id_column).where(whereclause))
+    orm_execute_state.session.connection().execute(audit_events.delete().where(condition))
+
+
+# --- Backfill ---
+def backfill_audit_events(log_types=None, batch_size=BACKFILL_BATCH_SIZE, progress=None):
+    """
+    Copies legacy log rows that have no audit_events row yet, in log_id batches (one
+    commit per batch). Returns {log_type: rows copied}. Safe to re-run or interrupt.
+    """
+    copied = {}
+    oldest = None
+    for log_type in log_types or AUDIT_SOURCES:
+        first = db.session.query(db.func.min(AUDIT_SOURCES[log_type].time_column)).scalar()
+        if first is not None and (oldest is None or _occurred_at(first) < oldest):
+            oldest = _occurred_at(first)
+    ensure_partitions(AuditEvent.occurred_at, oldest)
+
+    for log_type in log_types or AUDIT_SOURCES:
+        source = AUDIT_SOURCES[log_type]
+        table_name = source.model.__tablename__
+        copied[log_type] = 0
+        last_id = 0
+        while True:
+            logs = (source.model.query
+                    .filter(source.id_column > last_id)
+                    .order_by(source.id_column)
+                    .limit(batch_size)
+                    .all())
+            if not logs:
+                break
+            last_id = logs[-1].log_id
+            present = {row[0] for row in db.session.query(AuditEvent.source_log_id).filter(
+                AuditEvent.source_table == table_name,
+                AuditEvent.source_log_id.between(logs[0].log_id, last_id))}
+            missing = [log for log in logs if log.log_id not in present]
+            if missing:
+                connection = db.session.connection()
+                connection.execute(AuditEvent.__table__.insert(), audit_rows(connection, log_type, missing))
+            db.session.commit()
+            db.session.expunge_all()
+            copied[log_type] += len(missing)
+            if progress:
+                progress(log_type, last_id, copied[log_type])
+    return copied
+
+
+# --- View layer ---
+def legacy_instance(model, payload):
+    """Detached model instance holding the columns stored in payload (no session, no SQL)."""
+    values = {}
+    for attr in model.__mapper__.column_attrs:
+        value = payload.get(attr.key)
+        if isinstance(value, str) and isinstance(attr.columns[0].type, DateTime):
+            value = datetime.fromisoformat(value)
+        values[attr.key] = value
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
+
+
+def attach_joined(source, instances):
+    """Sets the relationships in source.joined from one IN query per relationship."""
+    for relationship_name, columns in source.joined.items():
+        relationship = getattr(source.model, relationship_name).property
+        target = relationship.mapper.class_
+        local_key = source.model.__mapper__.get_property_by_column(next(iter(relationship.local_columns))).key
+        target_id = relationship.mapper.primary_key[0]
+        ids = {getattr(instance, local_key) for instance in instances} - {None}
+        related = {}
+        if ids:
+            query = target.query.options(load_only(*(getattr(target, column) for column in columns)))
+            related = {getattr(row, target_id.key): row for row in query.filter(target_id.in_(ids))}
+        for instance in instances:
+            set_committed_value(instance, relationship_name, related.get(getattr(instance, local_key)))
+
+
+def query_audit_view(log_type, args, default_limit=DEFAULT_LOG_LIMIT):
+    """
+    Same contract as activity_log_queries.query_logs(), served from audit_events: returns
+    legacy log objects with the joined relationships set. greenhouse_id filters work for
+    every log type here (the greenhouse of the logged entity is recorded).
+    """
+    source = AUDIT_SOURCES[log_type]
+    filter_columns = {
+        "user_id": AuditEvent.actor_id if source.supports("user_id") else None,
+        "greenhouse_id": AuditEvent.greenhouse_id,
+        "entity_id": AuditEvent.entity_id if source.supports("entity_id") else None,
+    }
+    query = AuditEvent.query.filter(AuditEvent.entity_type == log_type)
+    events, next_cursor = filtered_page(query, filter_columns, AuditEvent.occurred_at, AuditEvent.event_id, args,
+                                        f"{log_type} logs", default_limit)
+    logs = [legacy_instance(source.model, audit_event.payload) for audit_event in events]
+    attach_joined(source, logs)
+    return logs, next_cursor
+
+
+def read_log_page(log_type, args):
+    """One page for the per-type /activity_logs endpoints, from the source ACTIVITY_LOG_READS selects."""
+    if LOG_READS == "audit_events":
+        return query_audit_view(log_type, args)
+    return query_logs(log_type, args)
+
+
+def log_page_query_budget(log_type):
+    """Statements one page may issue: the audit view adds one per joined relationship."""
+    if LOG_READS == "audit_events":
+        return LOG_PAGE_QUERY_BUDGET + len(AUDIT_SOURCES[log_type].joined)
+    return LOG_PAGE_QUERY_BUDGET
+
+
+# --- Cross-entity query ---
+def query_audit_events(args, default_limit=DEFAULT_LOG_LIMIT):
+    """
+    One newest-first page of audit_events across log types. args: entity_type
+    (comma-separated log types), user_id, greenhouse_id, entity_id, from, to, limit, cursor.
+    Raises LogQueryError for bad arguments.
+    """
+    query = AuditEvent.query
+    entity_types = [name.strip() for name in (args.get("entity_type") or "").split(",") if name.strip()]
+    unknown = [name for name in entity_types if name not in AUDIT_SOURCES]
+    if unknown:
+        raise LogQueryError({"entity_type": f"Unknown log type(s): {', '.join(unknown)}. Valid: {', '.join(AUDIT_SOURCES)}."})
+    if entity_types:
+        query = query.filter(AuditEvent.entity_type.in_(entity_types))
+    filter_columns = {"user_id": AuditEvent.actor_id, "greenhouse_id": AuditEvent.greenhouse_id, "entity_id": AuditEvent.entity_id}
+    return filtered_page(query, filter_columns, AuditEvent.occurred_at, AuditEvent.event_id, args, "audit events", default_limit)
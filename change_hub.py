@@ -0,0 +1,284 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\change_hub.py
+"""
+In-process fan-out of change events to live clients (SSE, Socket.IO).
+
+One ChangeHub per process holds a single dedicated PostgreSQL connection that
+LISTENs on the outbox_events channel. The outbox relay publishes every captured
+change there with the complete serialized row, so the hub never queries the
+changed tables: subscribers get the row straight from the payload. The only
+query is for the rare event whose row was too large for NOTIFY, fetched once
+by event_id from outbox_events.
+
+Events arriving within coalesce_seconds are merged per entity (a burst of
+updates to one harvest is delivered once, with the latest row) and handed to
+every subscription whose channel filter matches. Each subscription has its own
+bounded queue; a slow client loses its oldest events instead of slowing the hub.
+The last replay_size delivered events are kept for clients resuming a stream
+(see subscribe_from()). Resume points are (transaction_id, event_id) positions
+(outbox.event_position), the order the relay delivers in: event_id alone is not
+monotonic once transactions commit out of event_id order.
+"""
+import json
+import os
+import select
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import func
+
+from db import db
+from outbox import OUTBOX_NOTIFY_CHANNEL, event_position
+
+DEFAULT_COALESCE_SECONDS = 0.1
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 1000
+DEFAULT_REPLAY_SIZE = 1000
+RECONNECT_DELAY_SECONDS = 5
+POLL_TIMEOUT_SECONDS = 5
+# Channels the hub LISTENs on; listen_on() adds more before the hub starts
+LISTEN_CHANNELS = [OUTBOX_NOTIFY_CHANNEL]
+
+
+class Subscription:
+    """A client's view of the hub: events for its channels (all channels if None)."""
+
+    def __init__(self, hub, channels=None, queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self.hub = hub
+        self.channels = set(channels) if channels else None
+        self._queue = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def wants(self, channel):
+        return self.channels is None or channel in self.channels
+
+    def _put_many(self, events):
+        with self._cond:
+            overflow = len(self._queue) + len(events) - self._queue.maxlen
+            if overflow > 0:
+                self.dropped += overflow # deque(maxlen) discards the oldest
+            self._queue.extend(events)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Returns the queued events (possibly []) once any are available or timeout expires."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._queue)
+            self._queue.clear()
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self.hub.unsubscribe(self)
+
+
+class ChangeHub:
+    """Single LISTEN connection + coalescing dispatcher shared by all subscriptions in a process."""
+
+    def __init__(self, app, channels=(OUTBOX_NOTIFY_CHANNEL,), coalesce_seconds=DEFAULT_COALESCE_SECONDS,
+                 replay_size=DEFAULT_REPLAY_SIZE):
+        self.app = app
+        self.listen_channels = tuple(channels)
+        self.coalesce_seconds = coalesce_seconds
+        self._subscriptions = set()
+        self._subscriptions_lock = threading.Lock()
+        self._pending = {} # coalescing key -> event, in arrival order
+        self._replay = deque(maxlen=replay_size)
+        self._replay_floor = (0, 0) # Highest position evicted from the replay buffer
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads = []
+        self.stats = {"received": 0, "coalesced": 0, "delivered": 0, "fetched": 0, "reconnects": 0}
+
+    # --- Subscribers ---
+    def subscribe(self, channels=None, queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        subscription = Subscription(self, channels, queue_size)
+        with self._subscriptions_lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._subscriptions_lock:
+            self._subscriptions.discard(subscription)
+
+    def subscribe_from(self, after_position, channels=None, queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        """
+        Subscribes and returns (subscription, missed events, complete). complete is False
+        when events after after_position, a (transaction_id, event_id), have already left
+        the replay buffer.
+        Subscribing and reading the buffer happen under one lock, so nothing falls in between.
+        """
+        subscription = Subscription(self, channels, queue_size)
+        with self._subscriptions_lock:
+            self._subscriptions.add(subscription)
+            missed = [change for change in self._replay
+                      if event_position(change) > after_position and subscription.wants(change["channel"])]
+            complete = after_position >= self._replay_floor
+        return subscription, missed, complete
+
+    # --- Intake ---
+    @staticmethod
+    def _coalesce_key(change):
+        if change.get("entity_id") is None:
+            return ("event", change.get("event_id"))
+        return (change["channel"], change["entity_type"], change["entity_id"])
+
+    def publish(self, change):
+        """Queues one outbox event dict for delivery (called by the listener; usable directly)."""
+        key = self._coalesce_key(change)
+        with self._cond:
+            self.stats["received"] += 1
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                self.stats["coalesced"] += 1
+                if previous["action"] == "insert" and change["action"] == "update":
+                    # Still new to subscribers: an insert carrying the latest row
+                    change = dict(change, action="insert")
+            self._pending[key] = change
+            self._cond.notify_all()
+
+    def _handle_notification(self, payload):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            self.app.logger.warning(f"Change hub: ignoring malformed payload: {payload[:200]}")
+            return
+        if change.get("truncated"):
+            change = self._fetch_event(change)
+            if change is None:
+                return
+        self.publish(change)
+
+    def _fetch_event(self, change):
+        from models.outbox_model import OutboxEvent
+        from outbox import event_to_dict
+        with self.app.app_context():
+            outbox_event = db.session.get(OutboxEvent, change["event_id"])
+            self.stats["fetched"] += 1
+            if outbox_event is None:
+                return None # Already pruned
+            return event_to_dict(outbox_event)
+
+    # --- Threads ---
+    def _listen_forever(self):
+        while not self._stopping:
+            connection = None
+            try:
+                with self.app.app_context():
+                    connection = db.engine.raw_connection()
+                connection.detach() # Never returned to the pool while LISTENing
+                driver_connection = connection.driver_connection
+                driver_connection.autocommit = True
+                with driver_connection.cursor() as cursor:
+                    for channel in self.listen_channels:
+                        cursor.execute(f"LISTEN {channel}")
+                self.app.logger.info(f"Change hub listening on {', '.join(self.listen_channels)} (PID {os.getpid()}).")
+                while not self._stopping:
+                    if select.select([driver_connection], [], [], POLL_TIMEOUT_SECONDS) == ([], [], []):
+                        continue
+                    driver_connection.poll()
+                    while driver_connection.notifies:
+                        self._handle_notification(driver_connection.notifies.pop(0).payload)
+            except Exception as e:
+                self.stats["reconnects"] += 1
+                self.app.logger.error(f"Change hub: LISTEN connection failed, retrying in {RECONNECT_DELAY_SECONDS}s: {e}")
+                time.sleep(RECONNECT_DELAY_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def _dispatch_forever(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+            # Let the burst settle, then deliver everything that arrived meanwhile
+            time.sleep(self.coalesce_seconds)
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending.clear()
+            self._deliver(batch)
+
+    def _deliver(self, batch):
+        with self._subscriptions_lock:
+            for change in batch:
+                if len(self._replay) == self._replay.maxlen:
+                    self._replay_floor = max(self._replay_floor, event_position(self._replay[0]))
+                self._replay.append(change)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            events = [change for change in batch if subscription.wants(change["channel"])]
+            if events:
+                subscription._put_many(events)
+        with self._cond:
+            self.stats["delivered"] += len(batch)
+
+    def start(self):
+        from models.outbox_model import OutboxEvent
+        with self.app.app_context():
+            # Anything at or below the current head was never seen by this hub
+            head = (db.session.query(OutboxEvent.transaction_id, OutboxEvent.event_id)
+                    .order_by(func.coalesce(OutboxEvent.transaction_id, 0).desc(), OutboxEvent.event_id.desc()).first())
+            self._replay_floor = (head.transaction_id or 0, head.event_id) if head else (0, 0)
+            db.session.remove()
+        dispatcher = threading.Thread(target=self._dispatch_forever, name="change-hub-dispatch", daemon=True)
+        dispatcher.start()
+        self._threads.append(dispatcher)
+        with self.app.app_context():
+            dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            listener = threading.Thread(target=self._listen_forever, name="change-hub-listen", daemon=True)
+            listener.start()
+            self._threads.append(listener)
+        else:
+            self.app.logger.info(f"Change hub: LISTEN requires PostgreSQL ({dialect}); only publish() feeds subscribers.")
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def snapshot_stats(self):
+        with self._cond:
+            stats = dict(self.stats, pending=len(self._pending))
+        with self._subscriptions_lock:
+            stats["subscriptions"] = len(self._subscriptions)
+        return stats
+
+
+_start_lock = threading.Lock()
+
+
+def listen_on(channel):
+    """
+    Also LISTEN on channel. Its payloads must be change dicts like the outbox events
+    (channel, entity_type, entity_id, action, payload). Call before the hub starts.
+    """
+    if channel not in LISTEN_CHANNELS:
+        LISTEN_CHANNELS.append(channel)
+
+
+def get_change_hub(app):
+    """Returns this process's hub, starting it on first use (app.extensions['change_hub'])."""
+    with _start_lock:
+        hub = app.extensions.get('change_hub')
+        if hub is None:
+            hub = ChangeHub(
+                app,
+                channels=tuple(LISTEN_CHANNELS),
+                coalesce_seconds=float(os.environ.get("CHANGE_HUB_COALESCE_SECONDS", DEFAULT_COALESCE_SECONDS)),
+                replay_size=int(os.environ.get("CHANGE_HUB_REPLAY_SIZE", DEFAULT_REPLAY_SIZE)),
+            ).start()
+            app.extensions['change_hub'] = hub
+        return hub
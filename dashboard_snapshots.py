@@ -0,0 +1,196 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\dashboard_snapshots.py
+"""
+Precomputed admin dashboards, one dashboard_snapshots row per greenhouse.
+
+build_dashboard() gathers what the dashboard used to fetch with a dozen calls
+(greenhouse, planted crops, inventory container, hardware status, latest
+sensor values, harvest/rejection/sales totals, today's analytics) into one
+document. refresh_snapshot() stores it with an ETag hashed from the document,
+so GET /dashboard/<greenhouse_id> is one primary-key read and clients holding
+the current ETag get a 304.
+
+Snapshots are refreshed:
+- by the scheduler every DASHBOARD_REFRESH_SECONDS (default 300), which also
+  picks up sensor readings (they are not in the outbox);
+- when the change hub (change_hub.py) delivers an outbox NOTIFY for a row of a
+  greenhouse's dashboard, for that greenhouse only (DASHBOARD_REFRESH_ON_CHANGE,
+  default true).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytz
+from flask import current_app
+from sqlalchemy import case, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from db import db
+from outbox import json_default, serialize_row
+from models.dashboard_snapshot_model import DashboardSnapshot
+from models.greenhouses_model import Greenhouse
+from models.planted_crops_model import PlantedCrops
+from models.inventory_model import InventoryContainer
+from models.hardware_current_status_model import HardwareCurrentStatus
+from models.harvest_model import Harvest
+from models.reason_for_rejection_model import ReasonForRejection
+from models.sensors_readings_model import SensorReading
+from models.sensor_reading_rollup_model import SensorReadingRollup
+from sales_analytics import summarize
+from greenhouse_analytics import analytics_row
+
+PH_TZ = pytz.timezone('Asia/Manila')
+REFRESH_SECONDS = int(os.environ.get("DASHBOARD_REFRESH_SECONDS", 300))
+REFRESH_ON_CHANGE = os.environ.get("DASHBOARD_REFRESH_ON_CHANGE", "true").lower() in ("1", "true", "yes")
+LISTENER_RETRY_SECONDS = 30
+
+# Outbox channels whose rows appear on a dashboard
+DASHBOARD_CHANNELS = (
+    "harvests_updates", "sales_updates", "rejection_updates", "planted_crops_updates",
+    "inventory_container_updates", "hardware_status_updates", "hardware_components_updates",
+    "nutrient_controller_updates",
+)
+
+
+def _latest_sensor_values():
+    """{unit: {"value", "reading_time"}}: the newest reading per unit (readings have no greenhouse yet)."""
+    # Units from the day rollups (small) instead of a DISTINCT over every reading
+    units = db.session.execute(select(SensorReadingRollup.unit).where(SensorReadingRollup.bucket == "day")
+                               .distinct()).scalars().all()
+    latest = {}
+    for unit in units:
+        reading = (SensorReading.query.filter(SensorReading.unit == unit)
+                   .order_by(SensorReading.reading_time.desc(), SensorReading.reading_id.desc()).first())
+        if reading is not None:
+            latest[unit] = {"value": reading.reading_value, "reading_time": reading.reading_time}
+    return latest
+
+
+def _analytics(greenhouse_id, period, day):
+    analytics = analytics_row(greenhouse_id, period, day)
+    if analytics is None:
+        return None
+    return {"period_start": analytics.period_start, "average_ph": analytics.average_ph,
+            "average_temperature": analytics.average_temperature,
+            "yield_prediction": analytics.yield_prediction, "sensor_activations": analytics.sensor_activations}
+
+
+def build_dashboard(greenhouse):
+    """The dashboard document of one greenhouse (JSON-ready except for dates, see json_default)."""
+    greenhouse_id = greenhouse.greenhouse_id
+    today = datetime.now(PH_TZ).date()
+    _, totals = summarize("greenhouse", greenhouse_id=greenhouse_id)
+    container = InventoryContainer.query.filter_by(greenhouse_id=greenhouse_id).first()
+    return {
+        "greenhouse": serialize_row(greenhouse),
+        "planted_crops": [serialize_row(crop) for crop in
+                          PlantedCrops.query.filter_by(greenhouse_id=greenhouse_id).order_by(PlantedCrops.plant_id)],
+        "inventory_container": serialize_row(container) if container else None,
+        "hardware_status": [serialize_row(status) for status in HardwareCurrentStatus.query.filter_by(
+            greenhouse_id=greenhouse_id).order_by(HardwareCurrentStatus.component_id)],
+        "latest_sensors": _latest_sensor_values(),
+        "totals": totals,
+        "not_sold": {
+            "harvests": Harvest.query.filter_by(greenhouse_id=greenhouse_id, status="Not Sold").count(),
+            "rejections": ReasonForRejection.query.filter_by(greenhouse_id=greenhouse_id, status="Not Sold").count(),
+        },
+        "analytics": {"today": _analytics(greenhouse_id, "Daily", today),
+                      "this_month": _analytics(greenhouse_id, "Monthly", today)},
+    }
+
+
+def refresh_snapshot(greenhouse_id):
+    """Recomputes and stores one greenhouse's snapshot (commits). Returns it, or None if the greenhouse is gone."""
+    greenhouse = db.session.get(Greenhouse, greenhouse_id)
+    if greenhouse is None:
+        return None
+    # Round-trip through JSON so the stored payload and the hashed document are identical
+    document = json.dumps(build_dashboard(greenhouse), default=json_default, sort_keys=True, separators=(",", ":"))
+    etag = hashlib.sha256(document.encode("utf-8")).hexdigest()
+    now = datetime.now(pytz.utc)
+    # One upsert: the scheduler, the change listener and a first GET can refresh the same greenhouse at once
+    dialect_insert = postgresql.insert if db.session.get_bind().dialect.name == "postgresql" else sqlite.insert
+    table = DashboardSnapshot.__table__
+    statement = dialect_insert(table).values(greenhouse_id=greenhouse_id, payload=json.loads(document), etag=etag,
+                                             refreshed_at=now, changed_at=now)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.greenhouse_id],
+        set_={"payload": statement.excluded.payload, "etag": statement.excluded.etag,
+              "refreshed_at": statement.excluded.refreshed_at,
+              "changed_at": case((table.c.etag == statement.excluded.etag, table.c.changed_at),
+                                 else_=statement.excluded.changed_at)})
+    db.session.execute(statement)
+    db.session.commit()
+    return db.session.get(DashboardSnapshot, greenhouse_id, populate_existing=True)
+
+
+def refresh_snapshots(greenhouse_ids=None):
+    """Refreshes the given greenhouses (default: all). Returns the number refreshed; failures are logged."""
+    if greenhouse_ids is None:
+        greenhouse_ids = db.session.execute(select(Greenhouse.greenhouse_id)).scalars().all()
+    refreshed = 0
+    for greenhouse_id in greenhouse_ids:
+        try:
+            if refresh_snapshot(greenhouse_id) is not None:
+                refreshed += 1
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Dashboard snapshot refresh failed for greenhouse {greenhouse_id}: {e}", exc_info=True)
+    return refreshed
+
+
+# --- Refresh on change ---
+def _greenhouse_ids(changes):
+    """Greenhouses touched by outbox change events; None when one of them could touch any greenhouse."""
+    greenhouse_ids, harvest_ids, rejection_ids = set(), set(), set()
+    for change in changes:
+        data = (change.get("payload") or {}).get("data")
+        if data is None: # Bulk update/delete: no row to go by
+            return None
+        if data.get("greenhouse_id") is not None:
+            greenhouse_ids.add(data["greenhouse_id"])
+        elif data.get("harvest_id") is not None:
+            harvest_ids.add(data["harvest_id"])
+        elif data.get("rejection_id") is not None:
+            rejection_ids.add(data["rejection_id"])
+    # Sales carry no greenhouse_id: it comes from the harvest or rejection they were sold from
+    if harvest_ids:
+        greenhouse_ids.update(db.session.execute(select(Harvest.greenhouse_id).where(
+            Harvest.harvest_id.in_(harvest_ids))).scalars())
+    if rejection_ids:
+        greenhouse_ids.update(db.session.execute(select(ReasonForRejection.greenhouse_id).where(
+            ReasonForRejection.rejection_id.in_(rejection_ids))).scalars())
+    return greenhouse_ids
+
+
+def _listen_for_changes(app):
+    from change_hub import get_change_hub
+    while True:
+        try:
+            subscription = get_change_hub(app).subscribe(DASHBOARD_CHANNELS)
+            while not subscription.closed:
+                changes = subscription.get(timeout=30)
+                if not changes:
+                    continue
+                with app.app_context():
+                    greenhouse_ids = _greenhouse_ids(changes)
+                    if greenhouse_ids is None or greenhouse_ids:
+                        refresh_snapshots(greenhouse_ids)
+                    db.session.remove()
+            return
+        except Exception as e:
+            app.logger.error(f"Dashboard snapshots: change listener failed, retrying in {LISTENER_RETRY_SECONDS}s: {e}")
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+
+def init_dashboard_snapshots(app):
+    """Starts the change listener thread (when DASHBOARD_REFRESH_ON_CHANGE); the scheduler job is added in app.py."""
+    if not REFRESH_ON_CHANGE:
+        return None
+    listener = threading.Thread(target=_listen_for_changes, args=(app,), name="dashboard-snapshots", daemon=True)
+    listener.start()
+    app.extensions['dashboard_snapshots'] = listener
+    return listener
@@ -1,3 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import PrimaryKeyConstraint
 
 db = SQLAlchemy()
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_primary_key(constraint, compiler, **kw):
+    """
+    Tables partitioned on PostgreSQL (partitions.py) declare (id, time) as primary key and
+    info={"partition_column": <time column>}. SQLite has no partitions, so there the id alone
+    is the key and stays an auto-assigned rowid.
+    """
+    partition_column = constraint.table.info.get("partition_column")
+    if partition_column is None:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = [column for column in constraint.columns if column.name != partition_column]
+    return "PRIMARY KEY (%s)" % ", ".join(compiler.preparer.quote(column.name) for column in columns)
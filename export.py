@@ -0,0 +1,116 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\export.py
+"""
+Streaming exports for list endpoints (?format=ndjson or ?format=csv).
+
+The endpoint passes an ORM query and its row serializer. Rows are read in
+chunks through a server-side cursor (Query.yield_per) and each serialized row
+is written to the response as soon as it is ready, so memory stays flat and
+the first bytes go out before the query has finished, however many rows match.
+
+    export_format = requested_export_format(request.args)  # raises ValueError
+    if export_format:
+        return stream_export(query, serialize_sale, export_format, "sales")
+
+If the query fails mid-stream, NDJSON ends with an {"error": ...} line (like the
+JSON log streams); CSV has no room for one, so the response is aborted and the
+client sees a truncated transfer instead of a file that looks complete.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytz
+from flask import Response, current_app, stream_with_context
+from sqlalchemy.orm import Query
+
+PH_TZ = pytz.timezone('Asia/Manila')
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CHUNK_SIZE = 1000 # Rows fetched per round trip
+
+
+def requested_export_format(args):
+    """'ndjson', 'csv' or None (regular JSON). Raises ValueError for other ?format= values."""
+    value = (args.get("format") or "").strip().lower()
+    if not value or value == "json":
+        return None
+    if value not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format '{value}'. Use json, ndjson or csv.")
+    return value
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def _csv_lines(rows, blank):
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            # Columns come from the first row; serializers return the same keys for every row
+            writer = csv.DictWriter(buffer, fieldnames=list(row), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if writer is None and blank is not None:
+        # No rows: still send the header, from the serialized blank row
+        csv.DictWriter(buffer, fieldnames=list(blank())).writeheader()
+        yield buffer.getvalue()
+
+
+def _blank_query_row(query):
+    """A row shaped like query's results with every value empty: new model instances, None for columns."""
+    row = tuple(description["entity"]() if description["expr"] is description["entity"] else None
+                for description in query.column_descriptions)
+    return row[0] if len(row) == 1 else row
+
+
+def stream_export(rows, serialize, export_format, name, blank_row=None):
+    """
+    Streams rows (a Query, read with yield_per, or any iterable) as NDJSON or CSV.
+    serialize turns one row into a flat dict; it returns None to skip a row.
+    blank_row is a row of the same shape with empty values (e.g. (ReasonForRejection(), None, None));
+    when nothing matches, the CSV header is the keys of its serialized form. For a Query it
+    defaults to one built from the query's columns.
+    """
+    if isinstance(rows, Query):
+        if blank_row is None:
+            blank_row = _blank_query_row(rows)
+        rows = rows.yield_per(EXPORT_CHUNK_SIZE)
+    blank = (lambda: serialize(blank_row)) if blank_row is not None else None
+    logger = current_app.logger
+
+    def serialized():
+        for row in rows:
+            data = serialize(row)
+            if data is not None:
+                yield data
+
+    def lines():
+        try:
+            if export_format == "ndjson":
+                yield from _ndjson_lines(serialized())
+            else:
+                yield from _csv_lines(serialized(), blank)
+        except Exception as e:
+            # Headers are already sent: flag the export as incomplete; the log has the cause
+            logger.error(f"Export of {name} failed mid-stream: {e}", exc_info=True)
+            if export_format != "ndjson":
+                raise # Aborts the chunked response
+            yield json.dumps({"error": {"message": "Internal server error. The export is incomplete."}}) + "\n"
+
+    filename = f"{name}_{datetime.now(PH_TZ):%Y%m%d_%H%M%S}.{export_format}"
+    response = Response(stream_with_context(lines()), mimetype=EXPORT_FORMATS[export_format])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["X-Accel-Buffering"] = "no" # Disable proxy buffering (nginx)
+    return response
@@ -1,9 +1,11 @@
 # C:\Users\Giebert\PycharmProjects\agreemo_api_v2\firebase_listener.py
 import firebase_admin
 from firebase_admin import credentials, db as firebase_db
-import time
 import os
 import traceback  # Import traceback module
+from sensor_ingest import start_sensor_stream
+from latest_values_cache import latest_values
+from metrics import FIREBASE_LISTENER_EVENTS
 
 def firebase_control_listener(app, event):
     """Callback function for Firebase changes. Logs the data directly."""
@@ -13,6 +15,8 @@ def firebase_control_listener(app, event):
     print(f"DEBUG (PID {pid}): Event: {event.event_type}, Path: {event.path}, Data: {event.data}")
 
     current_data = event.data  # Get the data from the event
+    FIREBASE_LISTENER_EVENTS.labels(path="pumpControl", event_type=event.event_type).inc()
+    latest_values.apply_event("pumpControl", event) # Keep GET /control answering from memory
 
     if current_data:
         print(f"DEBUG (PID {pid}): Logging current data: {current_data}")
@@ -20,6 +24,11 @@ def firebase_control_listener(app, event):
         print(f"DEBUG (PID {pid}): No data received from Firebase.")
 
 
+def on_sensor_readings_event(event):
+    FIREBASE_LISTENER_EVENTS.labels(path="sensorReadings", event_type=event.event_type).inc()
+    latest_values.apply_event("sensorReadings", event)
+
+
 def init_firebase_listener(app):
     """Initializes and starts the Firebase listener."""
     print("DEBUG: Initializing Firebase listener...")
@@ -49,4 +58,14 @@ def init_firebase_listener(app):
             return  # Very important: exit the function on failure!
 
     firebase_db.reference("pumpControl").listen(lambda event: firebase_control_listener(app, event))
-    print("DEBUG: Firebase listener started.")
\ No newline at end of file
+    print("DEBUG: Firebase listener started.")
+
+    # Every process keeps its own latest-value cache current for GET /sensor-readings/firebase
+    firebase_db.reference("sensorReadings").listen(on_sensor_readings_event)
+
+    # Stream sensorReadings into PostgreSQL (replaces the 2-hour polling job when running)
+    try:
+        start_sensor_stream(app, firebase_db.reference("sensorReadings"))
+    except Exception as e:
+        print(f"ERROR: Could not start sensorReadings stream: {e}")
+        traceback.print_exc()
\ No newline at end of file
@@ -1,19 +1,15 @@
-from db import db
 from datetime import datetime
 import pytz
 
+from activity_log_writer import write_log
 
-def log_activity(table_name, **kwargs):
-    try:
-        # Get current time in Philippines time zone
-        ph_tz = pytz.timezone('Asia/Manila')
-        manila_now = datetime.now(ph_tz)
-        naive_manila_now = manila_now.replace(tzinfo=None)  # Convert to naive datetime
-        
-        new_activity_log = table_name(**kwargs, log_date=naive_manila_now)
-        db.session.add(new_activity_log)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        raise e
 
+def log_activity(table_name, consistent=False, **kwargs):
+    # Queued for the background writer when ACTIVITY_LOG_MODE=buffered and the session has
+    # no pending changes; consistent=True always writes in the caller's transaction.
+    # Get current time in Philippines time zone
+    ph_tz = pytz.timezone('Asia/Manila')
+    manila_now = datetime.now(ph_tz)
+    naive_manila_now = manila_now.replace(tzinfo=None)  # Convert to naive datetime
+
+    write_log(table_name, consistent=consistent, **kwargs, log_date=naive_manila_now)
@@ -0,0 +1,305 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\greenhouse_analytics.py
+"""
+Incrementally maintained rows of the analytics table (models/analytics_model.py).
+
+Each greenhouse has one row per Daily, Monthly and Yearly period (PH dates). A
+change is folded into the three rows of its date as a delta, with one
+INSERT ... ON CONFLICT DO UPDATE per row, so concurrent writers add up instead
+of overwriting each other and nothing is ever recomputed from raw data:
+- sensor readings (pH, temperature): update_rollups() passes every stored batch
+  to apply_sensor_readings(); averages are kept as sum / count;
+- harvests (yield_prediction: harvested total_yield) and nutrient controller
+  events (sensor_activations): a session after_flush hook adds inserts,
+  subtracts deletes and moves updated rows between periods or greenhouses.
+
+Sensor readings carry no greenhouse yet: they count for
+ANALYTICS_SENSOR_GREENHOUSE_ID (the greenhouse the sensor feed belongs to) and
+are skipped when it is not set. Bulk Query.delete() calls are not seen by the
+hook; rebuild_analytics() (CLI: rebuild_analytics.py) recomputes a date range.
+"""
+import os
+from datetime import date, datetime, timedelta
+
+import pytz
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from db import db
+from models.analytics_model import Analytics
+from models.harvest_model import Harvest
+from models.nutrient_controllers_model import NutrientController
+from models.sensors_readings_model import SensorReading
+
+PH_TZ = pytz.timezone('Asia/Manila')
+PERIODS = ("Daily", "Monthly", "Yearly")
+SENSOR_GREENHOUSE_ID = int(os.environ["ANALYTICS_SENSOR_GREENHOUSE_ID"]) if os.environ.get("ANALYTICS_SENSOR_GREENHOUSE_ID") else None
+PH_UNITS = {"ph"}
+TEMPERATURE_UNITS = {"°c", "c", "celsius", "temperature", "temp"}
+# Asia/Manila has no DST: naive UTC reading times become PH dates with a fixed offset
+PH_OFFSET = PH_TZ.utcoffset(datetime(2000, 1, 1))
+REBUILD_CHUNK_SIZE = 5000
+
+# Delta fields, in the order of Analytics columns they add to
+DELTA_FIELDS = ("ph_sum", "ph_count", "temperature_sum", "temperature_count", "yield_prediction", "sensor_activations")
+
+
+def period_start(day, period):
+    """First date of the Daily, Monthly or Yearly period containing day."""
+    if period == "Monthly":
+        return day.replace(day=1)
+    if period == "Yearly":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def next_period_start(start, period):
+    if period == "Monthly":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    if period == "Yearly":
+        return date(start.year + 1, 1, 1)
+    return start + timedelta(days=1)
+
+
+def _ph_today():
+    return datetime.now(PH_TZ).date()
+
+
+def _reading_day(reading_time):
+    """PH date of a naive UTC reading_time."""
+    return (reading_time + PH_OFFSET).date()
+
+
+class Deltas:
+    """Pending changes per (greenhouse_id, day); expanded to Daily/Monthly/Yearly rows when applied."""
+
+    def __init__(self):
+        self.days = {}
+
+    def add(self, greenhouse_id, day, **changes):
+        if greenhouse_id is None or day is None:
+            return
+        if isinstance(day, datetime):
+            day = day.date()
+        delta = self.days.setdefault((greenhouse_id, day), dict.fromkeys(DELTA_FIELDS, 0))
+        for name, value in changes.items():
+            delta[name] += value
+
+    def rows(self, periods=PERIODS):
+        """{(greenhouse_id, period, period_start): delta} for periods."""
+        rows = {}
+        for (greenhouse_id, day), delta in self.days.items():
+            for period in periods:
+                row = rows.setdefault((greenhouse_id, period, period_start(day, period)), dict.fromkeys(DELTA_FIELDS, 0))
+                for name, value in delta.items():
+                    row[name] += value
+        return rows
+
+
+def apply_deltas(connection, rows):
+    """Upserts delta rows ({(greenhouse_id, period, period_start): delta}) on connection."""
+    rows = {key: delta for key, delta in rows.items() if any(delta.values())}
+    if not rows:
+        return 0
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    table = Analytics.__table__
+    for (greenhouse_id, period, start), delta in sorted(rows.items()):
+        values = dict(delta, greenhouse_id=greenhouse_id, period=period, period_start=start,
+                      average_ph=delta["ph_sum"] / delta["ph_count"] if delta["ph_count"] else None,
+                      average_temperature=(delta["temperature_sum"] / delta["temperature_count"]
+                                           if delta["temperature_count"] else None))
+        statement = dialect_insert(table).values(**values)
+        sums = {name: table.c[name] + statement.excluded[name] for name in DELTA_FIELDS}
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.greenhouse_id, table.c.period, table.c.period_start],
+            set_=dict(sums,
+                      average_ph=sums["ph_sum"] / func.nullif(sums["ph_count"], 0),
+                      average_temperature=sums["temperature_sum"] / func.nullif(sums["temperature_count"], 0)))
+        connection.execute(statement)
+    return len(rows)
+
+
+# --- Sensor readings ---
+def _reading_fields(reading):
+    """(greenhouse_id, unit, reading_time, value) of a SensorReading or a dict with the same keys."""
+    if isinstance(reading, dict):
+        return (reading.get("greenhouse_id", SENSOR_GREENHOUSE_ID), reading.get("unit"),
+                reading.get("reading_time"), reading.get("reading_value"))
+    return (getattr(reading, "greenhouse_id", None) or SENSOR_GREENHOUSE_ID, reading.unit,
+            reading.reading_time, reading.reading_value)
+
+
+def add_sensor_readings(deltas, readings):
+    for reading in readings:
+        greenhouse_id, unit, reading_time, value = _reading_fields(reading)
+        if reading_time is None or value is None:
+            continue
+        unit = (unit or "").strip().lower()
+        if unit in PH_UNITS:
+            deltas.add(greenhouse_id, _reading_day(reading_time), ph_sum=float(value), ph_count=1)
+        elif unit in TEMPERATURE_UNITS:
+            deltas.add(greenhouse_id, _reading_day(reading_time), temperature_sum=float(value), temperature_count=1)
+
+
+def apply_sensor_readings(readings):
+    """Folds newly stored readings into the analytics rows, in the caller's transaction."""
+    deltas = Deltas()
+    add_sensor_readings(deltas, readings)
+    return apply_deltas(db.session.connection(), deltas.rows())
+
+
+# --- Harvests and nutrient controller events ---
+def _harvest_day(value):
+    # harvest_date has a server default (CURRENT_DATE) that is not loaded yet right after an insert
+    return value or _ph_today()
+
+
+def _dispense_day(value):
+    # dispensed_time is stored as naive PH time
+    return value.date() if value else _ph_today()
+
+
+# Model -> (date column, its PH date, {summed column: delta field}, delta field counting the rows)
+TRACKED = {
+    Harvest: ("harvest_date", _harvest_day, {"total_yield": "yield_prediction"}, None),
+    NutrientController: ("dispensed_time", _dispense_day, {}, "sensor_activations"),
+}
+
+
+def _contribution(model, values, sign):
+    """(greenhouse_id, day, changes) of one row given its column values."""
+    date_column, to_day, summed, counted = TRACKED[model]
+    changes = {field: sign * (values.get(column) or 0) for column, field in summed.items()}
+    if counted:
+        changes[counted] = sign
+    return values.get("greenhouse_id"), to_day(values.get(date_column)), changes
+
+
+def _columns(model):
+    date_column, _, summed, _ = TRACKED[model]
+    return ["greenhouse_id", date_column, *summed]
+
+
+def _values(instance, model, old=False):
+    """Current (or, with old, pre-flush) values of the tracked columns."""
+    state = inspect(instance)
+    values = {}
+    for column in _columns(model):
+        history = state.attrs[column].history
+        values[column] = history.deleted[0] if old and history.deleted else state.dict.get(column)
+    return values
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+for _model in TRACKED:
+    for _column in _columns(_model):
+        # active_history loads the old value when an expired column is set, so updates can subtract it
+        event.listen(getattr(_model, _column), "set", _keep_old_value, active_history=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _load_tracked_columns(session, flush_context, instances):
+    # Instances expired by a commit hold no column values until loaded, and the deltas need them all
+    for instance in [*session.dirty, *session.deleted]:
+        model = type(instance)
+        if model in TRACKED and inspect(instance).unloaded.intersection(_columns(model)):
+            for column in _columns(model):
+                getattr(instance, column)
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_analytics(session, flush_context):
+    deltas = Deltas()
+    for instance in session.new:
+        model = type(instance)
+        if model in TRACKED:
+            greenhouse_id, day, changes = _contribution(model, _values(instance, model), 1)
+            deltas.add(greenhouse_id, day, **changes)
+    for instance in session.deleted:
+        model = type(instance)
+        if model in TRACKED:
+            greenhouse_id, day, changes = _contribution(model, _values(instance, model), -1)
+            deltas.add(greenhouse_id, day, **changes)
+    for instance in session.dirty:
+        model = type(instance)
+        if model not in TRACKED or not session.is_modified(instance, include_collections=False):
+            continue
+        state = inspect(instance)
+        if not any(state.attrs[column].history.has_changes() for column in _columns(model)):
+            continue
+        for values, sign in ((_values(instance, model, old=True), -1), (_values(instance, model), 1)):
+            greenhouse_id, day, changes = _contribution(model, values, sign)
+            deltas.add(greenhouse_id, day, **changes)
+    if deltas.days:
+        apply_deltas(session.connection(), deltas.rows())
+
+
+# --- Rebuild ---
+def _stream(query, chunk_size):
+    return db.session.execute(query.execution_options(yield_per=chunk_size))
+
+
+def rebuild_analytics(start, end, greenhouse_id=None, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recomputes the Daily rows for PH dates [start, end) from sensor_readings, harvests and
+    nutrient_controllers, then the Monthly and Yearly rows containing them from the Daily
+    rows. Commits once. Returns the number of Daily rows written.
+    """
+    table = Analytics.__table__
+    deltas = Deltas()
+
+    # Raw rows of the range, streamed: only the per-day sums are kept in memory
+    midnight_start, midnight_end = (datetime.combine(day, datetime.min.time()) for day in (start, end))
+    readings = (select(SensorReading.unit, SensorReading.reading_time, SensorReading.reading_value)
+                .where(SensorReading.reading_time >= midnight_start - PH_OFFSET,
+                       SensorReading.reading_time < midnight_end - PH_OFFSET))
+    if greenhouse_id is None or greenhouse_id == SENSOR_GREENHOUSE_ID:
+        add_sensor_readings(deltas, (dict(row._mapping) for row in _stream(readings, chunk_size)))
+
+    for model in TRACKED:
+        date_column = getattr(model, TRACKED[model][0])
+        # harvest_date is a date, dispensed_time a naive PH datetime
+        first, stop = (start, end) if model is Harvest else (midnight_start, midnight_end)
+        query = (select(*[getattr(model, column) for column in _columns(model)])
+                 .where(date_column >= first, date_column < stop))
+        if greenhouse_id is not None:
+            query = query.where(model.greenhouse_id == greenhouse_id)
+        for row in _stream(query, chunk_size):
+            row_greenhouse_id, day, changes = _contribution(model, dict(row._mapping), 1)
+            deltas.add(row_greenhouse_id, day, **changes)
+
+    connection = db.session.connection()
+    daily = table.delete().where(table.c.period == "Daily", table.c.period_start >= start, table.c.period_start < end)
+    if greenhouse_id is not None:
+        daily = daily.where(table.c.greenhouse_id == greenhouse_id)
+    connection.execute(daily)
+    written = apply_deltas(connection, deltas.rows(periods=("Daily",)))
+
+    # Monthly rows are the sum of their Daily rows, Yearly rows of their Monthly rows
+    last_day = end - timedelta(days=1)
+    for period, source_period in (("Monthly", "Daily"), ("Yearly", "Monthly")):
+        first, stop = period_start(start, period), next_period_start(period_start(last_day, period), period)
+        scope = [table.c.period_start >= first, table.c.period_start < stop]
+        if greenhouse_id is not None:
+            scope.append(table.c.greenhouse_id == greenhouse_id)
+        sources = connection.execute(select(table).where(table.c.period == source_period, *scope)).mappings().all()
+        connection.execute(table.delete().where(table.c.period == period, *scope))
+        rows = {}
+        for source in sources:
+            row = rows.setdefault((source["greenhouse_id"], period, period_start(source["period_start"], period)),
+                                  dict.fromkeys(DELTA_FIELDS, 0))
+            for name in DELTA_FIELDS:
+                row[name] += source[name] or 0
+        apply_deltas(connection, rows)
+    db.session.commit()
+    return written
+
+
+# --- Reads ---
+def analytics_row(greenhouse_id, period, day):
+    """The Analytics row of greenhouse_id for the period containing day, or None."""
+    return Analytics.query.filter_by(greenhouse_id=greenhouse_id, period=period,
+                                     period_start=period_start(day, period)).first()
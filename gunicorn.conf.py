@@ -0,0 +1,21 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\gunicorn.conf.py
+# Read by gunicorn from the working directory (Procfile: gunicorn main:app ...).
+# Prepares the directory where every worker writes its Prometheus samples, so
+# GET /metrics (metrics.py) reports the sum over all workers.
+import os
+import shutil
+import tempfile
+
+
+def on_starting(server):
+    # Set in the master before any worker starts, so every worker inherits it
+    directory = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR",
+                                      os.path.join(tempfile.gettempdir(), "agreemo_prometheus"))
+    # Samples from a previous run would be added to this one's
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,140 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\job_locks.py
+"""
+Cross-process locks for jobs that every process schedules.
+
+Each gunicorn worker, each dyno and run_outbox_relay.py run their own
+APScheduler, so a daily job fires once per process. job_lock() takes a
+PostgreSQL session-level advisory lock on a connection of its own, so only
+one process runs the job at a time; the others skip that run.
+
+    with job_lock("log_archive") as acquired:
+        if acquired:
+            ...
+
+Other databases (SQLite in development) have no advisory locks and always get
+the lock.
+
+Work that one process does for its whole life (the sensorReadings stream) uses
+acquire_process_lock() instead: the lock stays held until release(), and
+lock_held() tells every other process whether someone holds it. Without
+PostgreSQL these fall back to a file lock, which is one holder per host.
+"""
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from db import db
+
+
+def lock_key(name):
+    """Stable 32-bit advisory lock key of a job name."""
+    return zlib.crc32(f"agreemo:{name}".encode("utf-8"))
+
+
+@contextmanager
+def job_lock(name):
+    """Yields True while this process holds the lock name, False if another process holds it."""
+    with db.engine.connect() as connection:
+        if connection.dialect.name != "postgresql":
+            yield True
+            return
+        key = lock_key(name)
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        connection.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                _unlock(connection, key)
+
+
+def _unlock(connection, key):
+    try:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+        connection.commit()
+    except Exception:
+        # Never return a connection that may still hold the lock to the pool
+        connection.invalidate()
+        raise
+
+
+def _lock_file_path(name):
+    return os.path.join(tempfile.gettempdir(), f"agreemo_{name}.lock")
+
+
+class ProcessLock:
+    """A lock taken with acquire_process_lock(), held until release()."""
+
+    def __init__(self, name, connection=None, lock_file=None):
+        self.name = name
+        self._connection = connection
+        self._lock_file = lock_file
+
+    def release(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            try:
+                _unlock(connection, lock_key(self.name))
+            finally:
+                connection.close()
+        if self._lock_file is not None:
+            lock_file, self._lock_file = self._lock_file, None
+            lock_file.close() # Closing the file releases the flock
+
+
+def acquire_process_lock(name):
+    """
+    ProcessLock for name, or None if another process holds it. On PostgreSQL the lock
+    lives on a connection of its own, kept out of the pool until release().
+    """
+    connection = db.engine.connect()
+    if connection.dialect.name == "postgresql":
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": lock_key(name)}).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return None
+        return ProcessLock(name, connection=connection)
+    connection.close()
+
+    try:
+        import fcntl
+    except ImportError:
+        return ProcessLock(name) # No file locks either (Windows development)
+    lock_file = open(_lock_file_path(name), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return ProcessLock(name, lock_file=lock_file)
+
+
+def lock_held(name):
+    """True while any process, this one included, holds name through acquire_process_lock()."""
+    with db.engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # A bigint advisory key is stored as classid (high 32 bits) and objid (low 32 bits)
+            key = lock_key(name)
+            return connection.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted "
+                "AND classid = CAST(:high AS oid) AND objid = CAST(:low AS oid) AND objsubid = 1)"),
+                {"high": key >> 32, "low": key & 0xFFFFFFFF}).scalar()
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(_lock_file_path(name), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
@@ -0,0 +1,115 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\latest_values_cache.py
+"""
+Process-local cache of the latest Firebase values (sensorReadings, pumpControl).
+
+The Firebase listeners apply every put/patch event to the cached snapshot, so
+polling endpoints can answer from memory. A direct Firebase fetch only happens
+when a path has never been loaded or its snapshot is older than the TTL
+(LATEST_VALUE_TTL_SECONDS, default 60). Only one request per path refetches at a
+time; concurrent requests wait for that fetch instead of all hitting Firebase.
+"""
+import copy
+import os
+import threading
+import time
+
+from metrics import FIREBASE_FETCH_SECONDS, observe
+
+DEFAULT_TTL_SECONDS = 60.0
+
+
+def _apply_at_path(snapshot, parts, data, merge):
+    """Returns snapshot with data written at parts (Firebase put/patch semantics)."""
+    if not parts:
+        if merge and isinstance(snapshot, dict) and isinstance(data, dict):
+            merged = dict(snapshot)
+            for key, value in data.items():
+                if value is None:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            return merged
+        return data
+
+    node = dict(snapshot) if isinstance(snapshot, dict) else {}
+    child = _apply_at_path(node.get(parts[0]), parts[1:], data, merge)
+    if child is None:
+        node.pop(parts[0], None)
+    else:
+        node[parts[0]] = child
+    return node
+
+
+class LatestValueCache:
+    def __init__(self, ttl_seconds=None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get("LATEST_VALUE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        self.ttl_seconds = ttl_seconds
+        self._entries = {} # path -> (snapshot, updated_at wall clock, updated_at monotonic)
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self.stats = {"hits": 0, "misses": 0, "events": 0}
+
+    def set(self, path, snapshot):
+        with self._lock:
+            self._entries[path] = (snapshot, time.time(), time.monotonic())
+
+    def apply_event(self, path, event):
+        """Applies a Firebase listener event (event_type, path, data) to the cached snapshot."""
+        if event.event_type not in ("put", "patch"):
+            return
+        parts = [part for part in (event.path or "/").split("/") if part]
+        with self._lock:
+            self.stats["events"] += 1
+            current = self._entries.get(path, (None, None, None))[0]
+            snapshot = _apply_at_path(current, parts, event.data, merge=event.event_type == "patch")
+            self._entries[path] = (snapshot, time.time(), time.monotonic())
+
+    def apply_update(self, path, values):
+        """Mirrors a local ref.update(values) so this process reads its own writes."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return # Cold: the next read fetches the full snapshot
+            snapshot = _apply_at_path(entry[0], [], values, merge=True)
+            self._entries[path] = (snapshot, time.time(), time.monotonic())
+
+    def peek(self, path):
+        """Returns (snapshot copy, updated_at epoch, age seconds) or None if cold."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            snapshot, updated_at, updated_mono = entry
+            return copy.deepcopy(snapshot), updated_at, time.monotonic() - updated_mono
+
+    def get_or_fetch(self, path, fetch):
+        """
+        Returns (snapshot, updated_at epoch, age seconds, source) where source is 'cache' or 'firebase'.
+        fetch() is only called when the path is cold or older than the TTL.
+        """
+        cached = self.peek(path)
+        if cached is not None and cached[2] <= self.ttl_seconds:
+            with self._lock:
+                self.stats["hits"] += 1
+            return cached + ("cache",)
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(path, threading.Lock())
+        with fetch_lock:
+            # Another request may have refreshed it while this one waited
+            cached = self.peek(path)
+            if cached is not None and cached[2] <= self.ttl_seconds:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return cached + ("cache",)
+            with self._lock:
+                self.stats["misses"] += 1
+            with observe(FIREBASE_FETCH_SECONDS, path=path):
+                snapshot = fetch()
+            self.set(path, snapshot)
+        return self.peek(path) + ("firebase",)
+
+
+# Shared by the Firebase listeners and the routes in this process
+latest_values = LatestValueCache()
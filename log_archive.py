@@ -0,0 +1,190 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\log_archive.py
+"""
+Cold storage for old activity logs.
+
+archive_logs() moves log rows older than the hot window (LOG_ARCHIVE_HOT_DAYS,
+default 90) out of the database into gzip NDJSON files with a manifest each
+(archive_store.py). Batches are taken in time order, so files cover
+consecutive time ranges; each batch is deleted in the transaction that follows
+its file, and the file is removed again if that delete fails. Every process
+schedules the archiver; a run only proceeds in the process holding the
+"log_archive" job lock (job_locks.py), so two runs never archive the same batch.
+
+Reads: when an /activity_logs/<type> request has a `from` date before the hot
+window, stream_log_rows() returns the matching rows still in the database
+followed by the archived ones (including partitions archived by partitions.py), newest first,
+as a generator, so the endpoint streams them instead of building one page.
+With ACTIVITY_LOG_READS=audit_events the audit view already holds the full
+history and archives are not scanned.
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytz
+from flask import current_app
+from sqlalchemy import select
+
+from db import db
+from job_locks import job_lock
+from activity_log_queries import LOG_SOURCES, LogQueryError, filter_query, parse_log_datetime
+from archive_store import write_archive, list_manifests, read_archive, delete_archive
+from audit_log import LOG_READS, legacy_instance, attach_joined
+
+PH_TZ = pytz.timezone('Asia/Manila')
+HOT_DAYS = int(os.environ.get("LOG_ARCHIVE_HOT_DAYS", 90))
+# Log types (keys of activity_log_queries.LOG_SOURCES) moved to cold storage
+ARCHIVED_LOG_TYPES = [name.strip() for name in os.environ.get(
+    "LOG_ARCHIVE_TYPES", "harvest,sale,inventory,inventory_container,inventory_item").split(",") if name.strip()]
+ARCHIVE_BATCH_SIZE = 10000 # Rows per archive file
+STREAM_CHUNK_SIZE = 500 # Rows per name lookup while streaming
+
+
+def hot_cutoff(column, now=None):
+    """Start of the hot window, in the form column stores (naive PH time or aware)."""
+    cutoff = (now or datetime.now(PH_TZ)) - timedelta(days=HOT_DAYS)
+    return cutoff if getattr(column.type, "timezone", False) else cutoff.replace(tzinfo=None)
+
+
+# --- Archiver ---
+def archive_logs(log_types=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Moves rows older than the hot window to archive files. Returns {log_type: rows archived},
+    or None when another process is archiving.
+    """
+    with job_lock("log_archive") as acquired:
+        if not acquired:
+            current_app.logger.info("Log archiver: another process is archiving; skipping this run.")
+            return None
+        return _archive_logs(log_types, batch_size)
+
+
+def _archive_logs(log_types, batch_size):
+    archived = {}
+    for log_type in log_types or ARCHIVED_LOG_TYPES:
+        source = LOG_SOURCES[log_type]
+        table = source.model.__table__
+        time_column, id_column = table.c[source.time_column.name], table.c[source.id_column.name]
+        cutoff = hot_cutoff(time_column)
+        archived[log_type] = 0
+        while True:
+            rows = db.session.execute(select(table)
+                                      .where(time_column < cutoff)
+                                      .order_by(time_column, id_column)
+                                      .limit(batch_size)).mappings().all()
+            if not rows:
+                break
+            first = rows[0]
+            name = f"{table.name}_{first[time_column.key]:%Y%m%d%H%M%S}_{first[id_column.key]}"
+            manifest = write_archive(table.name, name, (dict(row) for row in rows), time_column.key)
+            try:
+                # Core delete: archiving is not a change clients or the audit log should see
+                db.session.execute(table.delete().where(id_column.in_([row[id_column.key] for row in rows])))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                delete_archive(manifest)
+                raise
+            archived[log_type] += len(rows)
+    return archived
+
+
+# --- Reads ---
+def reads_archive(log_type, args):
+    """True when a request for log_type asks for rows from before the hot window."""
+    if LOG_READS == "audit_events" or log_type not in ARCHIVED_LOG_TYPES or not args.get("from"):
+        return False
+    column = LOG_SOURCES[log_type].time_column
+    try:
+        return parse_log_datetime(args["from"], column) < hot_cutoff(column)
+    except ValueError:
+        return False # Reported by the regular validation
+
+
+def _stored_time(value, column):
+    """
+    An archived time in column's convention, comparable with parse_log_datetime() bounds.
+    SQLite returns aware columns as naive UTC, and PostgreSQL returns them aware.
+    """
+    value = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if value is None:
+        return None
+    if getattr(column.type, "timezone", False):
+        return value if value.tzinfo else pytz.utc.localize(value)
+    return value.astimezone(PH_TZ).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _archived_rows(source, args):
+    """Archived row dicts matching args, newest first per archive file."""
+    column = source.time_column
+    time_key = column.key
+    start = parse_log_datetime(args["from"], source.time_column) if args.get("from") else None
+    end = parse_log_datetime(args["to"], source.time_column) if args.get("to") else None
+    filters = {column.key: int(args[name]) for name, column in source.filter_columns.items()
+               if column is not None and args.get(name) not in (None, "")}
+
+    manifests = [manifest for manifest in list_manifests(source.model.__tablename__) if manifest["rows"]]
+    for manifest in sorted(manifests, key=lambda manifest: _stored_time(manifest["max_time"], column), reverse=True):
+        if start is not None and _stored_time(manifest["max_time"], column) < start:
+            continue
+        if end is not None and _stored_time(manifest["min_time"], column) >= end:
+            continue
+        matches = []
+        for row in read_archive(manifest):
+            row_time = _stored_time(row.get(time_key), column)
+            if row_time is None or (start is not None and row_time < start) or (end is not None and row_time >= end):
+                continue
+            if all(row.get(key) == value for key, value in filters.items()):
+                matches.append((row_time, row["log_id"], row))
+        # One file is at most ARCHIVE_BATCH_SIZE rows, so sorting it in memory is bounded
+        matches.sort(key=lambda match: (match[0], match[1]), reverse=True)
+        for _, _, row in matches:
+            yield row
+
+
+def stream_log_rows(log_type, args, chunk_size=STREAM_CHUNK_SIZE, include_archive=True):
+    """
+    Validates args (raises LogQueryError) and returns a generator of log objects, newest
+    first: rows in [from, to) still in the database, then (with include_archive) archived
+    ones. limit caps the total; cursors are not used in this mode.
+    """
+    source = LOG_SOURCES[log_type]
+    details = {}
+    query = filter_query(source.model.query.options(*source.load_options()), source.filter_columns,
+                         source.time_column, args, f"{log_type} logs", details)
+    limit = None
+    try:
+        limit = int(args["limit"]) if args.get("limit") else None
+    except ValueError:
+        details["limit"] = "Invalid limit. Must be an integer."
+    if args.get("cursor"):
+        details["cursor"] = "Not supported for ranges that include archived logs; narrow from/to instead."
+    if details:
+        raise LogQueryError(details)
+
+    # Everything still in the database comes first: archived rows are older than the hot window
+    database_rows = query.order_by(source.time_column.desc(), source.id_column.desc()).yield_per(chunk_size)
+
+    def generate():
+        sent = 0
+        for log in database_rows:
+            if limit is not None and sent >= limit:
+                return
+            yield log
+            sent += 1
+        if not include_archive:
+            return
+        chunk = []
+        for row in _archived_rows(source, args):
+            if limit is not None and sent + len(chunk) >= limit:
+                break
+            chunk.append(legacy_instance(source.model, row))
+            if len(chunk) >= chunk_size:
+                attach_joined(source, chunk)
+                yield from chunk
+                sent += len(chunk)
+                chunk = []
+        if chunk:
+            attach_joined(source, chunk)
+            yield from chunk
+
+    return generate()
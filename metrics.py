@@ -0,0 +1,145 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\metrics.py
+"""
+Prometheus metrics, exposed at GET /metrics (routes/metrics_routes.py).
+
+- agreemo_http_request_duration_seconds{blueprint, endpoint, method, status}
+- agreemo_db_pool_checkout_seconds, agreemo_db_pool_checkouts_total{outcome}
+  (time to get a connection from the pool, waiting included; PostgreSQL only)
+- agreemo_notify_sent_total{channel}, agreemo_notify_failed_total{channel}
+- agreemo_firebase_fetch_duration_seconds{path, outcome}
+- agreemo_firebase_listener_events_total{path, event_type}
+- agreemo_scheduler_job_duration_seconds{job, outcome}
+- agreemo_smtp_send_duration_seconds{purpose, outcome}
+
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(prepared by gunicorn.conf.py) and /metrics sums them over all workers, so
+whichever worker answers the scrape reports the whole dyno. Without that
+variable (flask run, scripts) the metrics are this process's only.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_SUBMITTED
+from flask import g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "agreemo_http_request_duration_seconds", "Time to produce a response (streamed bodies excluded).",
+    ["blueprint", "endpoint", "method", "status"])
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "agreemo_db_pool_checkout_seconds", "Time to check a connection out of the pool, waiting included.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+DB_POOL_CHECKOUTS = Counter("agreemo_db_pool_checkouts", "Connection checkouts from the pool.", ["outcome"])
+NOTIFY_SENT = Counter("agreemo_notify_sent", "NOTIFY events sent.", ["channel"])
+NOTIFY_FAILED = Counter("agreemo_notify_failed", "NOTIFY events that could not be sent.", ["channel"])
+FIREBASE_FETCH_SECONDS = Histogram(
+    "agreemo_firebase_fetch_duration_seconds", "Direct Firebase reads.", ["path", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+FIREBASE_LISTENER_EVENTS = Counter(
+    "agreemo_firebase_listener_events", "Events received by the Firebase listeners.", ["path", "event_type"])
+SCHEDULER_JOB_SECONDS = Histogram(
+    "agreemo_scheduler_job_duration_seconds", "APScheduler job run time.", ["job", "outcome"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800))
+SMTP_SEND_SECONDS = Histogram(
+    "agreemo_smtp_send_duration_seconds", "Time to connect, log in and send one email.", ["purpose", "outcome"],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
+
+@contextmanager
+def observe(histogram, **labels):
+    """Times the block into histogram, with outcome="ok" or "error" (the error is re-raised)."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - started)
+
+
+def render_metrics():
+    """(body, content type) for GET /metrics."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# --- Database pool ---
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout (waiting for a free connection or opening one)."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUTS.labels(outcome="timeout").inc()
+            raise
+        except Exception:
+            DB_POOL_CHECKOUTS.labels(outcome="error").inc()
+            raise
+        DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+        DB_POOL_CHECKOUTS.labels(outcome="ok").inc()
+        return connection
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the instrumented pool (SQLite keeps its default pool)."""
+    if database_uri and not database_uri.startswith("sqlite"):
+        return {"poolclass": InstrumentedQueuePool}
+    return {}
+
+
+# --- Requests ---
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _observe_request(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            blueprint=request.blueprint or "app", endpoint=request.endpoint or "unmatched",
+            method=request.method, status=str(response.status_code),
+        ).observe(time.perf_counter() - started)
+    return response
+
+
+def init_metrics(app):
+    """Registers the request latency hooks."""
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+
+
+# --- Scheduler ---
+def init_scheduler_metrics(scheduler):
+    """Records the run time of every job of scheduler, labelled with the job's name."""
+    started = {}
+    lock = threading.Lock()
+
+    def on_submitted(event):
+        now = time.perf_counter()
+        with lock:
+            for run_time in event.scheduled_run_times:
+                started[(event.job_id, run_time)] = now
+
+    def on_finished(event):
+        with lock:
+            submitted = started.pop((event.job_id, event.scheduled_run_time), None)
+        if submitted is None:
+            return
+        job = scheduler.get_job(event.job_id)
+        SCHEDULER_JOB_SECONDS.labels(
+            job=job.name if job else event.job_id, outcome="error" if event.exception else "ok",
+        ).observe(time.perf_counter() - submitted)
+
+    scheduler.add_listener(on_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(on_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
@@ -0,0 +1,44 @@
+"""add sensor reading rollups table
+
+Revision ID: 1762dc10a7be
+Revises: be3b25264f34
+Create Date: 2026-10-17 09:12:40.512201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1762dc10a7be'
+down_revision = 'be3b25264f34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sensor_reading_rollups',
+    sa.Column('rollup_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('bucket', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('unit', sa.String(), nullable=False),
+    sa.Column('greenhouse_id', sa.Integer(), nullable=True),
+    sa.Column('min_value', sa.Float(), nullable=False),
+    sa.Column('max_value', sa.Float(), nullable=False),
+    sa.Column('sum_value', sa.Float(), nullable=False),
+    sa.Column('reading_count', sa.Integer(), nullable=False),
+    sa.Column('last_value', sa.Float(), nullable=False),
+    sa.Column('last_time', sa.DateTime(), nullable=False),
+    sa.CheckConstraint("bucket IN ('minute', 'hour', 'day')", name='valid_rollup_bucket'),
+    sa.PrimaryKeyConstraint('rollup_id'),
+    sa.UniqueConstraint('bucket', 'unit', 'greenhouse_id', 'bucket_start', name='uq_sensor_rollup_key')
+    )
+    with op.batch_alter_table('sensor_reading_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_sensor_rollups_lookup', ['bucket', 'unit', 'bucket_start'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sensor_reading_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_sensor_rollups_lookup')
+
+    op.drop_table('sensor_reading_rollups')
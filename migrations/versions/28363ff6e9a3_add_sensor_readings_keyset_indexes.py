@@ -0,0 +1,27 @@
+"""add sensor readings keyset indexes
+
+Revision ID: 28363ff6e9a3
+Revises: 1762dc10a7be
+Create Date: 2026-10-17 10:03:18.274630
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '28363ff6e9a3'
+down_revision = '1762dc10a7be'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sensor_readings', schema=None) as batch_op:
+        batch_op.create_index('ix_sensor_readings_time', ['reading_time', 'reading_id'], unique=False)
+        batch_op.create_index('ix_sensor_readings_unit_time', ['unit', 'reading_time', 'reading_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sensor_readings', schema=None) as batch_op:
+        batch_op.drop_index('ix_sensor_readings_unit_time')
+        batch_op.drop_index('ix_sensor_readings_time')
@@ -0,0 +1,71 @@
+"""add activity log keyset indexes
+
+Revision ID: 4d2a9e61c0b8
+Revises: b51f0c2e9d47
+Create Date: 2026-10-17 14:41:09.552031
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4d2a9e61c0b8'
+down_revision = 'b51f0c2e9d47'
+branch_labels = None
+depends_on = None
+
+# (table, index, columns) as declared by activity_log_queries.LOG_SOURCES
+KEYSET_INDEXES = [
+    ('admin_activity_logs', 'ix_admin_activity_logs_keyset', ['log_date', 'log_id']),
+    ('admin_activity_logs', 'ix_admin_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('user_activity_logs', 'ix_user_activity_logs_keyset', ['log_date', 'log_id']),
+    ('user_activity_logs', 'ix_user_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('greenhouse_activity_logs', 'ix_greenhouse_activity_logs_keyset', ['log_date', 'log_id']),
+    ('greenhouse_activity_logs', 'ix_greenhouse_activity_logs_greenhouse_id_keyset', ['greenhouse_id', 'log_date', 'log_id']),
+    ('greenhouse_activity_logs', 'ix_greenhouse_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('rejection_activity_logs', 'ix_rejection_activity_logs_keyset', ['log_date', 'log_id']),
+    ('rejection_activity_logs', 'ix_rejection_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('rejection_activity_logs', 'ix_rejection_activity_logs_rejection_id_keyset', ['rejection_id', 'log_date', 'log_id']),
+    ('hardware_status_activity_logs', 'ix_hardware_status_activity_logs_keyset', ['timestamp', 'log_id']),
+    ('hardware_status_activity_logs', 'ix_hardware_status_activity_logs_component_id_keyset', ['component_id', 'timestamp', 'log_id']),
+    ('hardware_status_activity_logs', 'ix_hardware_status_activity_logs_greenhouse_id_keyset', ['greenhouse_id', 'timestamp', 'log_id']),
+    ('maintenance_activity_logs', 'ix_maintenance_activity_logs_keyset', ['log_date', 'log_id']),
+    ('maintenance_activity_logs', 'ix_maintenance_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('maintenance_activity_logs', 'ix_maintenance_activity_logs_maintenance_id_keyset', ['maintenance_id', 'log_date', 'log_id']),
+    ('harvest_activity_logs', 'ix_harvest_activity_logs_keyset', ['log_date', 'log_id']),
+    ('harvest_activity_logs', 'ix_harvest_activity_logs_harvest_id_keyset', ['harvest_id', 'log_date', 'log_id']),
+    ('harvest_activity_logs', 'ix_harvest_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('hardware_components_activity_logs', 'ix_hardware_components_activity_logs_keyset', ['log_date', 'log_id']),
+    ('hardware_components_activity_logs', 'ix_hardware_components_activity_logs_component_id_keyset', ['component_id', 'log_date', 'log_id']),
+    ('hardware_components_activity_logs', 'ix_hardware_components_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('nutrient_controller_activity_logs', 'ix_nutrient_controller_activity_logs_keyset', ['logs_date', 'log_id']),
+    ('nutrient_controller_activity_logs', 'ix_nutrient_controller_activity_logs_controller_id_keyset', ['controller_id', 'logs_date', 'log_id']),
+    ('nutrient_controller_activity_logs', 'ix_nutrient_controller_activity_logs_greenhouse_id_keyset', ['greenhouse_id', 'logs_date', 'log_id']),
+    ('inventory_logs', 'ix_inventory_logs_keyset', ['timestamp', 'log_id']),
+    ('inventory_logs', 'ix_inventory_logs_inventory_id_keyset', ['inventory_id', 'timestamp', 'log_id']),
+    ('inventory_logs', 'ix_inventory_logs_user_id_keyset', ['user_id', 'timestamp', 'log_id']),
+    ('planted_crop_activity_logs', 'ix_planted_crop_activity_logs_keyset', ['log_date', 'log_id']),
+    ('planted_crop_activity_logs', 'ix_planted_crop_activity_logs_login_id_keyset', ['login_id', 'log_date', 'log_id']),
+    ('planted_crop_activity_logs', 'ix_planted_crop_activity_logs_plant_id_keyset', ['plant_id', 'log_date', 'log_id']),
+    ('inventory_container_logs', 'ix_inventory_container_logs_keyset', ['timestamp', 'log_id']),
+    ('inventory_container_logs', 'ix_inventory_container_logs_inventory_container_id_keyset', ['inventory_container_id', 'timestamp', 'log_id']),
+    ('inventory_container_logs', 'ix_inventory_container_logs_user_id_keyset', ['user_id', 'timestamp', 'log_id']),
+    ('sale_logs', 'ix_sale_logs_keyset', ['timestamp', 'log_id']),
+    ('sale_logs', 'ix_sale_logs_login_id_keyset', ['login_id', 'timestamp', 'log_id']),
+    ('sale_logs', 'ix_sale_logs_sale_id_keyset', ['sale_id', 'timestamp', 'log_id']),
+    ('inventory_item_logs', 'ix_inventory_item_logs_keyset', ['timestamp', 'log_id']),
+    ('inventory_item_logs', 'ix_inventory_item_logs_inventory_item_id_keyset', ['inventory_item_id', 'timestamp', 'log_id']),
+    ('inventory_item_logs', 'ix_inventory_item_logs_user_id_keyset', ['user_id', 'timestamp', 'log_id']),
+]
+
+
+def upgrade():
+    for table, index, columns in KEYSET_INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(index, columns, unique=False)
+
+
+def downgrade():
+    for table, index, columns in reversed(KEYSET_INDEXES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(index)
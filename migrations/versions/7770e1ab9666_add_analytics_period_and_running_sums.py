@@ -0,0 +1,39 @@
+"""add analytics period start and running sums
+
+Revision ID: 7770e1ab9666
+Revises: a93f0c6d51e2
+Create Date: 2026-10-17 19:04:12.318540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7770e1ab9666'
+down_revision = 'a93f0c6d51e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing populated analytics before this revision, and existing rows have no period
+    # start to key them by; rebuild_analytics.py recreates them from the raw data.
+    op.execute("DELETE FROM analytics")
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('period_start', sa.Date(), nullable=False))
+        batch_op.add_column(sa.Column('ph_sum', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('ph_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('temperature_sum', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('temperature_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_unique_constraint('uq_analytics_period', ['greenhouse_id', 'period', 'period_start'])
+
+
+def downgrade():
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_analytics_period', type_='unique')
+        batch_op.drop_column('temperature_count')
+        batch_op.drop_column('temperature_sum')
+        batch_op.drop_column('ph_count')
+        batch_op.drop_column('ph_sum')
+        batch_op.drop_column('period_start')
@@ -0,0 +1,113 @@
+"""partition append-only tables by month
+
+Revision ID: a93f0c6d51e2
+Revises: e8c4d27a9f13
+Create Date: 2026-10-17 17:20:44.907531
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+import pytz
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93f0c6d51e2'
+down_revision = 'e8c4d27a9f13'
+branch_labels = None
+depends_on = None
+
+PH_TZ = pytz.timezone('Asia/Manila')
+PARTITION_MONTHS_AHEAD = 3
+
+# (table, id column, time column, time column is timezone-aware), as in partitions.PARTITION_FAMILIES
+PARTITIONED_TABLES = [
+    ('sensor_readings', 'reading_id', 'reading_time', False),
+    ('harvest_activity_logs', 'log_id', 'log_date', False),
+    ('hardware_status_activity_logs', 'log_id', 'timestamp', False),
+    ('nutrient_controller_activity_logs', 'log_id', 'logs_date', False),
+    ('control_activity_logs', 'log_id', 'log_date', False),
+    ('inventory_logs', 'log_id', 'timestamp', True),
+    ('inventory_container_logs', 'log_id', 'timestamp', True),
+    ('inventory_item_logs', 'log_id', 'timestamp', True),
+]
+
+
+def _month_bound(index, aware):
+    start = datetime(index // 12, index % 12 + 1, 1)
+    return PH_TZ.localize(start).isoformat() if aware else start.isoformat(sep=' ')
+
+
+def _partition(bind, table, id_column, time_column, aware):
+    """Rebuilds table as a monthly range-partitioned table with the same rows, keys and indexes."""
+    indexes = bind.execute(sa.text(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = :table AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table))"), {"table": table}).scalars().all()
+    constraints = bind.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype IN ('f', 'u', 'c')"), {"table": table}).all()
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, :column)"),
+                            {"table": table, "column": id_column}).scalar()
+
+    # The primary key must include the partition key, which makes it NOT NULL
+    op.execute(f"UPDATE {table} SET {time_column} = CURRENT_TIMESTAMP WHERE {time_column} IS NULL")
+    op.execute(f"CREATE TABLE {table}_partitioned (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({time_column})")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+
+    now = datetime.now(PH_TZ)
+    oldest = bind.execute(sa.text(f"SELECT min({time_column}) FROM {table}")).scalar() or now
+    if oldest.tzinfo is not None:
+        oldest = oldest.astimezone(PH_TZ)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table}_partitioned DEFAULT")
+    for index in range(oldest.year * 12 + oldest.month - 1, now.year * 12 + now.month - 1 + PARTITION_MONTHS_AHEAD + 1):
+        op.execute(f"CREATE TABLE {table}_{index // 12:04d}_{index % 12 + 1:02d} PARTITION OF {table}_partitioned "
+                   f"FOR VALUES FROM ('{_month_bound(index, aware)}') TO ('{_month_bound(index + 1, aware)}')")
+
+    op.execute(f"INSERT INTO {table}_partitioned SELECT * FROM {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {table}_partitioned RENAME TO {table}")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({id_column}, {time_column})")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{id_column}")
+    for name, definition in constraints:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    for definition in indexes:
+        op.execute(definition)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return # Partitioning is PostgreSQL-only; other databases keep plain tables
+    for table, id_column, time_column, aware in PARTITIONED_TABLES:
+        _partition(bind, table, id_column, time_column, aware)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for table, id_column, time_column, aware in reversed(PARTITIONED_TABLES):
+        indexes = bind.execute(sa.text(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = :table AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table))"), {"table": table}).scalars().all()
+        constraints = bind.execute(sa.text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:table) AND contype IN ('f', 'u', 'c')"), {"table": table}).all()
+        sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, :column)"),
+                                {"table": table, "column": id_column}).scalar()
+        op.execute(f"CREATE TABLE {table}_plain (LIKE {table} INCLUDING DEFAULTS)")
+        if sequence:
+            op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+        op.execute(f"INSERT INTO {table}_plain SELECT * FROM {table}")
+        op.execute(f"DROP TABLE {table}") # Drops every partition
+        op.execute(f"ALTER TABLE {table}_plain RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({id_column})")
+        if sequence:
+            op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{id_column}")
+        for name, definition in constraints:
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        for definition in indexes:
+            op.execute(definition)
@@ -0,0 +1,33 @@
+"""add dashboard snapshots table
+
+Revision ID: b35720b7efa2
+Revises: 7770e1ab9666
+Create Date: 2026-10-17 20:11:53.602947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b35720b7efa2'
+down_revision = '7770e1ab9666'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dashboard_snapshots',
+    sa.Column('greenhouse_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('payload', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.Column('etag', sa.String(length=64), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['greenhouse_id'], ['greenhouses.greenhouse_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('greenhouse_id')
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_snapshots')
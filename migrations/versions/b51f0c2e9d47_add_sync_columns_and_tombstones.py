@@ -0,0 +1,54 @@
+"""add sync updated_at columns and tombstones
+
+Revision ID: b51f0c2e9d47
+Revises: 7cd1507ed887
+Create Date: 2026-10-17 14:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b51f0c2e9d47'
+down_revision = '7cd1507ed887'
+branch_labels = None
+depends_on = None
+
+SYNCED_TABLES = ['planted_crops', 'inventory', 'reason_for_rejection', 'sales']
+
+
+def upgrade():
+    op.create_table('sync_tombstones',
+    sa.Column('tombstone_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('entity_type', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('tombstone_id')
+    )
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_sync_tombstones_type_deleted', ['entity_type', 'deleted_at'], unique=False)
+
+    for table in SYNCED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            # Existing rows start out as changed now, so the first delta sync after deploy reports them once
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{table}_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('harvests', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_harvests_last_updated'), ['last_updated'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('harvests', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_harvests_last_updated'))
+
+    for table in reversed(SYNCED_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_updated_at'))
+            batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_sync_tombstones_type_deleted')
+
+    op.drop_table('sync_tombstones')
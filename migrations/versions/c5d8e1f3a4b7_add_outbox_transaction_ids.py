@@ -0,0 +1,37 @@
+"""add outbox transaction ids
+
+Revision ID: c5d8e1f3a4b7
+Revises: b35720b7efa2
+Create Date: 2026-10-17 22:05:31.418092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8e1f3a4b7'
+down_revision = 'b35720b7efa2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('transaction_id', sa.BigInteger(), nullable=True))
+        batch_op.create_index('ix_outbox_events_transaction_event', ['transaction_id', 'event_id'], unique=False)
+    with op.batch_alter_table('outbox_consumer_offsets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_transaction_id', sa.BigInteger(), server_default='0', nullable=False))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Existing events sort before every new transaction (transaction ids start at 3)
+        op.execute("UPDATE outbox_events SET transaction_id = 0")
+        op.execute("ALTER TABLE outbox_events ALTER COLUMN transaction_id SET DEFAULT (pg_current_xact_id()::text::bigint)")
+
+
+def downgrade():
+    with op.batch_alter_table('outbox_consumer_offsets', schema=None) as batch_op:
+        batch_op.drop_column('last_transaction_id')
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_outbox_events_transaction_event')
+        batch_op.drop_column('transaction_id')
@@ -0,0 +1,62 @@
+"""make sensor rollup greenhouse not null
+
+Revision ID: e2f7a9c4b6d1
+Revises: c5d8e1f3a4b7
+Create Date: 2026-10-17 23:14:52.907315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f7a9c4b6d1'
+down_revision = 'c5d8e1f3a4b7'
+branch_labels = None
+depends_on = None
+
+NO_GREENHOUSE_ID = 0 # sensor_rollups.NO_GREENHOUSE_ID
+
+
+def _merge_duplicate_rollups(connection):
+    """
+    NULLs never conflicted in uq_sensor_rollup_key, so racing writers could insert a bucket
+    twice. Folds each such bucket into its first row before the NULLs become NO_GREENHOUSE_ID.
+    """
+    duplicates = connection.execute(sa.text(
+        "SELECT bucket, unit, bucket_start FROM sensor_reading_rollups WHERE greenhouse_id IS NULL "
+        "GROUP BY bucket, unit, bucket_start HAVING COUNT(*) > 1")).all()
+    for bucket, unit, bucket_start in duplicates:
+        rows = connection.execute(sa.text(
+            "SELECT rollup_id, min_value, max_value, sum_value, reading_count, last_value, last_time "
+            "FROM sensor_reading_rollups WHERE greenhouse_id IS NULL AND bucket = :bucket AND unit = :unit "
+            "AND bucket_start = :bucket_start ORDER BY rollup_id"),
+            {"bucket": bucket, "unit": unit, "bucket_start": bucket_start}).all()
+        latest = max(rows, key=lambda row: row.last_time)
+        connection.execute(sa.text(
+            "UPDATE sensor_reading_rollups SET min_value = :min_value, max_value = :max_value, "
+            "sum_value = :sum_value, reading_count = :reading_count, last_value = :last_value, "
+            "last_time = :last_time WHERE rollup_id = :rollup_id"), {
+                "rollup_id": rows[0].rollup_id,
+                "min_value": min(row.min_value for row in rows), "max_value": max(row.max_value for row in rows),
+                "sum_value": sum(row.sum_value for row in rows), "reading_count": sum(row.reading_count for row in rows),
+                "last_value": latest.last_value, "last_time": latest.last_time})
+        connection.execute(sa.text("DELETE FROM sensor_reading_rollups WHERE rollup_id IN :rollup_ids")
+                           .bindparams(sa.bindparam("rollup_ids", expanding=True)),
+                           {"rollup_ids": [row.rollup_id for row in rows[1:]]})
+
+
+def upgrade():
+    connection = op.get_bind()
+    _merge_duplicate_rollups(connection)
+    connection.execute(sa.text("UPDATE sensor_reading_rollups SET greenhouse_id = :sentinel WHERE greenhouse_id IS NULL"),
+                       {"sentinel": NO_GREENHOUSE_ID})
+    with op.batch_alter_table('sensor_reading_rollups', schema=None) as batch_op:
+        batch_op.alter_column('greenhouse_id', existing_type=sa.Integer(), nullable=False, server_default='0')
+
+
+def downgrade():
+    with op.batch_alter_table('sensor_reading_rollups', schema=None) as batch_op:
+        batch_op.alter_column('greenhouse_id', existing_type=sa.Integer(), nullable=True, server_default=None)
+    op.get_bind().execute(sa.text("UPDATE sensor_reading_rollups SET greenhouse_id = NULL WHERE greenhouse_id = :sentinel"),
+                          {"sentinel": NO_GREENHOUSE_ID})
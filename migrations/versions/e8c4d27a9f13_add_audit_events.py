@@ -0,0 +1,92 @@
+"""add audit events
+
+Revision ID: e8c4d27a9f13
+Revises: 4d2a9e61c0b8
+Create Date: 2026-10-17 16:02:37.418206
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+import pytz
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4d27a9f13'
+down_revision = '4d2a9e61c0b8'
+branch_labels = None
+depends_on = None
+
+PH_TZ = pytz.timezone('Asia/Manila')
+PARTITION_MONTHS_AHEAD = 3
+
+# (index, columns) as declared on models.audit_event_model.AuditEvent
+AUDIT_INDEXES = [
+    ('ix_audit_events_keyset', ['occurred_at', 'event_id']),
+    ('ix_audit_events_type_keyset', ['entity_type', 'occurred_at', 'event_id']),
+    ('ix_audit_events_entity_keyset', ['entity_type', 'entity_id', 'occurred_at', 'event_id']),
+    ('ix_audit_events_greenhouse_keyset', ['greenhouse_id', 'occurred_at', 'event_id']),
+    ('ix_audit_events_actor_keyset', ['actor_id', 'occurred_at', 'event_id']),
+    ('ix_audit_events_source', ['source_table', 'source_log_id']),
+]
+
+
+def _month_start(year, month):
+    return PH_TZ.localize(datetime(year + (month - 1) // 12, (month - 1) % 12 + 1, 1))
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Partitioned by month on occurred_at; the partition key must be part of the primary key
+        op.execute("""
+            CREATE TABLE audit_events (
+                event_id BIGSERIAL NOT NULL,
+                entity_type VARCHAR(50) NOT NULL,
+                entity_id INTEGER,
+                actor_type VARCHAR(20),
+                actor_id INTEGER,
+                greenhouse_id INTEGER,
+                occurred_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                description TEXT,
+                source_table VARCHAR(64) NOT NULL,
+                source_log_id INTEGER NOT NULL,
+                payload JSONB NOT NULL,
+                PRIMARY KEY (event_id, occurred_at)
+            ) PARTITION BY RANGE (occurred_at)
+        """)
+        op.execute("CREATE TABLE audit_events_default PARTITION OF audit_events DEFAULT")
+        # Current month and the next few; audit_log.ensure_audit_partitions() keeps creating them
+        now = datetime.now(PH_TZ)
+        for offset in range(PARTITION_MONTHS_AHEAD + 1):
+            start = _month_start(now.year, now.month + offset)
+            end = _month_start(now.year, now.month + offset + 1)
+            op.execute(f"CREATE TABLE audit_events_{start.year:04d}_{start.month:02d} PARTITION OF audit_events "
+                       f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+        for index, columns in AUDIT_INDEXES:
+            op.create_index(index, 'audit_events', columns, unique=False)
+        return
+
+    op.create_table('audit_events',
+    sa.Column('event_id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('entity_type', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('actor_type', sa.String(length=20), nullable=True),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('greenhouse_id', sa.Integer(), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('source_table', sa.String(length=64), nullable=False),
+    sa.Column('source_log_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    with op.batch_alter_table('audit_events', schema=None) as batch_op:
+        for index, columns in AUDIT_INDEXES:
+            batch_op.create_index(index, columns, unique=False)
+
+
+def downgrade():
+    # Dropping the partitioned parent drops its partitions and indexes too
+    op.drop_table('audit_events')
@@ -0,0 +1,42 @@
+"""sync from outbox positions: drop tombstones, index events by type
+
+Revision ID: f3c8d2a1b9e4
+Revises: e2f7a9c4b6d1
+Create Date: 2026-10-17 23:48:06.512930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8d2a1b9e4'
+down_revision = 'e2f7a9c4b6d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.create_index('ix_outbox_events_type_position', ['entity_type', 'transaction_id', 'event_id'], unique=False)
+
+    # GET /sync reads deletes from outbox_events now
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_sync_tombstones_type_deleted')
+
+    op.drop_table('sync_tombstones')
+
+
+def downgrade():
+    op.create_table('sync_tombstones',
+    sa.Column('tombstone_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('entity_type', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('tombstone_id')
+    )
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_sync_tombstones_type_deleted', ['entity_type', 'deleted_at'], unique=False)
+
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_outbox_events_type_position')
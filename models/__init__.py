@@ -65,3 +65,12 @@ from models.sale_model import Sale
 from models.inventory_items import InventoryItem
 
 from models.activity_logs.inventory_item_logs import InventoryItemLog
+
+from models.sensor_reading_rollup_model import SensorReadingRollup
+
+from models.outbox_model import OutboxEvent, OutboxConsumerOffset
+
+
+from models.audit_event_model import AuditEvent
+
+from models.dashboard_snapshot_model import DashboardSnapshot
@@ -5,9 +5,10 @@ from sqlalchemy import text  # Import
 class ControlActivityLogs(db.Model):
     __tablename__ = "control_activity_logs"
 
-    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (log_id, log_date) because the table is partitioned on log_date
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     logs_description = db.Column(db.String(255), nullable=False)
-    log_date = db.Column(db.DateTime, server_default=text('CURRENT_TIMESTAMP'), nullable=False)
+    log_date = db.Column(db.DateTime, server_default=text('CURRENT_TIMESTAMP'), primary_key=True)
     pump1 = db.Column(db.Boolean)
     pump2 = db.Column(db.Boolean)
     exhaust = db.Column(db.Boolean)
@@ -16,7 +17,9 @@ class ControlActivityLogs(db.Model):
     # Add a unique constraint
     __table_args__ = (
         db.UniqueConstraint('log_date', 'pump1', 'pump2', 'exhaust', 'automode', 'logs_description', name='uq_control_activity_logs'),
+        {"info": {"partition_column": "log_date"}},
     )
+    __mapper_args__ = {"primary_key": [log_id]}
 
     def __repr__(self):
         return f"<ControlActivityLog {self.log_id}: {self.logs_description}>"
\ No newline at end of file
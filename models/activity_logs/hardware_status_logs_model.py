@@ -4,14 +4,18 @@ from db import db
 class HardwareStatusActivityLogs(db.Model):
     __tablename__ = "hardware_status_activity_logs"
 
-    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (log_id, timestamp) because the table is partitioned on timestamp
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     logs_description = db.Column(db.String(200))
-    timestamp = db.Column(db.DateTime, nullable=False)
+    timestamp = db.Column(db.DateTime, primary_key=True)
     status = db.Column(db.Boolean, nullable=False, default=False)
     duration = db.Column(db.String(200))
     component_id = db.Column(db.Integer, db.ForeignKey('hardware_components.component_id'))  # ForeignKey to HardwareComponents
     greenhouse_id = db.Column(db.Integer, db.ForeignKey('greenhouses.greenhouse_id'))  # ForeignKey to Greenhouse
 
+    __table_args__ = {"info": {"partition_column": "timestamp"}}
+    __mapper_args__ = {"primary_key": [log_id]}
+
     # Relationship to HardwareComponents
     hardware_components = db.relationship("HardwareComponents",
                                           back_populates="hardware_status_activity_logs",
@@ -5,11 +5,15 @@ from db import db
 class HarvestActivityLogs(db.Model):
     __tablename__ = "harvest_activity_logs"
 
-    log_id = db.Column(db.Integer, primary_key=True)
+    # Serial id; the primary key is (log_id, log_date) because the table is partitioned on log_date
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     login_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
     harvest_id = db.Column(db.Integer, db.ForeignKey('harvests.harvest_id'))
     logs_description = db.Column(db.String(255), nullable=False)
-    log_date = db.Column(db.DateTime, nullable=False)
+    log_date = db.Column(db.DateTime, primary_key=True)
+
+    __table_args__ = {"info": {"partition_column": "log_date"}}
+    __mapper_args__ = {"primary_key": [log_id]}
 
     harvests = db.relationship("Harvest", back_populates="harvest_activity_logs", lazy=True)
     users = db.relationship("Users", back_populates="harvest_activity_logs", lazy=True)
@@ -6,10 +6,11 @@ from db import db
 class InventoryContainerLog(db.Model):
     __tablename__ = 'inventory_container_logs'
 
-    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (log_id, timestamp) because the table is partitioned on timestamp
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     inventory_container_id = db.Column(db.Integer, db.ForeignKey('inventory_container.inventory_container_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False) # *** ADD THIS LINE ***
-    timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc)) # Use lambda
+    timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), primary_key=True) # Use lambda
     change_type = db.Column(db.String(50), nullable=False)  # e.g., "update", "delete"
     item = db.Column(db.String(50), nullable=True)  # Item updated or N/A for delete
     old_quantity = db.Column(db.Integer, nullable=True)
@@ -23,6 +24,9 @@ class InventoryContainerLog(db.Model):
     inventory_container = db.relationship("InventoryContainer", back_populates="inventory_container_logs", lazy=True)
     users = db.relationship("Users", back_populates="inventory_container_logs", lazy=True) # *** ADD THIS LINE ***
 
+    __table_args__ = {"info": {"partition_column": "timestamp"}}
+    __mapper_args__ = {"primary_key": [log_id]}
+
 
     def __repr__(self):
         # ... (repr can be updated)
@@ -9,10 +9,11 @@ from db import db
 class InventoryItemLog(db.Model):
     __tablename__ = 'inventory_item_logs'
 
-    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (log_id, timestamp) because the table is partitioned on timestamp
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     inventory_item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.inventory_item_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
-    timestamp = db.Column(db.DateTime(timezone=True), default=datetime.now(pytz.utc))
+    timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), primary_key=True)
     activity_type = db.Column(db.String(50), nullable=False)  # e.g., "create", "update", "delete"
     description = db.Column(db.String(500), nullable=True)
 
@@ -20,5 +21,8 @@ class InventoryItemLog(db.Model):
     inventory_items = db.relationship("InventoryItem", back_populates="inventory_item_logs", lazy=True)
     users = db.relationship("Users", back_populates="inventory_item_logs", lazy=True) # Direct relationship
 
+    __table_args__ = {"info": {"partition_column": "timestamp"}}
+    __mapper_args__ = {"primary_key": [log_id]}
+
     def __repr__(self):
         return f"<InventoryItemLog(item_id={self.inventory_item_id}, activity='{self.activity_type}')>"
\ No newline at end of file
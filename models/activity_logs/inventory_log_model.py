@@ -10,11 +10,12 @@ from db import db
 class InventoryLog(db.Model):
     __tablename__ = 'inventory_logs'
 
-    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (log_id, timestamp) because the table is partitioned on timestamp
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     # RECOMMENDED CHANGE: Rename column and FK reference to be clear
     inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.inventory_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False) # Track WHICH user made the change
-    timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc)) # Use lambda for default
+    timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), primary_key=True) # Use lambda for default
     change_type = db.Column(db.String(50), nullable=False)  # e.g., "create", "update", "delete"
     description = db.Column(db.String(255), nullable=True)
 
@@ -22,5 +23,8 @@ class InventoryLog(db.Model):
     inventory = db.relationship("Inventory", back_populates="inventory_logs", lazy=True)
     users = db.relationship("Users", back_populates="inventory_logs", lazy=True)
 
+    __table_args__ = {"info": {"partition_column": "timestamp"}}
+    __mapper_args__ = {"primary_key": [log_id]}
+
     def __repr__(self):
         return f"<InventoryLog(log_id={self.log_id}, inventory_id={self.inventory_id}, user_id={self.user_id}, change_type='{self.change_type}')>"
\ No newline at end of file
@@ -5,12 +5,16 @@ from db import db
 class NutrientControllerActivityLogs(db.Model):
     __tablename__ = "nutrient_controller_activity_logs"
 
-    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (log_id, logs_date) because the table is partitioned on logs_date
+    log_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     controller_id = db.Column(db.Integer, db.ForeignKey('nutrient_controllers.controller_id'))
     logs_description = db.Column(db.String(200))
-    logs_date = db.Column(db.DateTime, nullable=False)
+    logs_date = db.Column(db.DateTime, primary_key=True)
     greenhouse_id = db.Column(db.Integer, db.ForeignKey('greenhouses.greenhouse_id'))  # ForeignKey to Greenhouse
     activated_by = db.Column(db.String(200), nullable=False)
 
+    __table_args__ = {"info": {"partition_column": "logs_date"}}
+    __mapper_args__ = {"primary_key": [log_id]}
+
     greenhouses = db.relationship("Greenhouse", back_populates="nutrient_controller_activity_logs", lazy=True)
     nutrient_controllers = db.relationship("NutrientController", back_populates="nutrient_controller_activity_logs", lazy=True)
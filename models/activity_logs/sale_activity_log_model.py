@@ -11,7 +11,7 @@ class SaleLog(db.Model):
     sale_id = db.Column(db.Integer, db.ForeignKey('sales.sale_id'), nullable=False)  # Foreign key referencing Sale.id
     login_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)  # Foreign key to Users table - Removed for now
     log_message = db.Column(db.String(255), nullable=False)
-    timestamp = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.now(pytz.utc))
+    timestamp = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(pytz.utc))
 
     sales = db.relationship("Sale", back_populates="sale_logs")  # Relationship to Sale
     users = db.relationship("Users", backref="sale_logs")  # Relationship to Users - Removed for now
@@ -5,17 +5,27 @@ from sqlalchemy import ForeignKey
 from models.greenhouses_model import Greenhouse # Assuming path
 
 class Analytics(db.Model):
-    """Represents calculated analytics data for a greenhouse over a period."""
+    """
+    Represents calculated analytics data for a greenhouse over a period.
+    Kept up to date incrementally by greenhouse_analytics.py.
+    """
     __tablename__ = 'analytics'
 
     analytics_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     # If Greenhouse deleted, delete associated analytics
     greenhouse_id = db.Column(db.Integer, db.ForeignKey('greenhouses.greenhouse_id', ondelete='CASCADE'), nullable=False)
     period = db.Column(db.String, nullable=False) # e.g., 'Daily', 'Monthly'
+    period_start = db.Column(db.Date, nullable=False) # First PH date of the day, month or year
     average_ph = db.Column(db.Float, nullable=True)
     average_temperature = db.Column(db.Float, nullable=True)
-    yield_prediction = db.Column(db.Float, nullable=True)
-    sensor_activations = db.Column(db.Integer, nullable=True)
+    yield_prediction = db.Column(db.Float, nullable=True) # Harvested total_yield of the period so far
+    sensor_activations = db.Column(db.Integer, nullable=True) # Nutrient controller dispense events
+
+    # Running sums behind the averages, so new readings are applied as deltas
+    ph_sum = db.Column(db.Float, nullable=False, default=0)
+    ph_count = db.Column(db.Integer, nullable=False, default=0)
+    temperature_sum = db.Column(db.Float, nullable=False, default=0)
+    temperature_count = db.Column(db.Integer, nullable=False, default=0)
 
     # --- Relationships ---
     greenhouses = db.relationship('Greenhouse', back_populates='analytics', lazy=True)
@@ -24,8 +34,9 @@ class Analytics(db.Model):
     # --- Constraints ---
     __table_args__ = (
         db.CheckConstraint(period.in_(['Daily', 'Monthly', 'Yearly']), name='valid_period'),
+        db.UniqueConstraint('greenhouse_id', 'period', 'period_start', name='uq_analytics_period'),
     )
 
     def __repr__(self):
-        return f"<Analytics(id={self.analytics_id}, gh={self.greenhouse_id}, period='{self.period}')>"
+        return f"<Analytics(id={self.analytics_id}, gh={self.greenhouse_id}, period='{self.period}', start={self.period_start})>"
 
@@ -0,0 +1,39 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\audit_event_model.py
+from db import db
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class AuditEvent(db.Model):
+    """
+    One activity-log entry of any type (see audit_log.py). Written in the same transaction
+    as the legacy log row it mirrors; payload holds that row's columns unchanged.
+    On PostgreSQL the table is range-partitioned by month on occurred_at, so the primary
+    key is (event_id, occurred_at); SQLite keys on event_id alone (db.py).
+    """
+    __tablename__ = 'audit_events'
+
+    event_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, server_default=db.FetchedValue())
+    entity_type = db.Column(db.String(50), nullable=False) # Log type, e.g. 'harvest', 'sale', 'control'
+    entity_id = db.Column(db.Integer, nullable=True) # Id of the logged harvest, sale, component, ...
+    actor_type = db.Column(db.String(20), nullable=True) # 'user' or 'admin'; NULL for device/system logs
+    actor_id = db.Column(db.Integer, nullable=True)
+    greenhouse_id = db.Column(db.Integer, nullable=True) # From the log row, or from the logged entity
+    occurred_at = db.Column(db.DateTime(timezone=True), primary_key=True)
+    description = db.Column(db.Text, nullable=True)
+    source_table = db.Column(db.String(64), nullable=False) # Legacy log table and id the event mirrors
+    source_log_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_audit_events_keyset', 'occurred_at', 'event_id'),
+        db.Index('ix_audit_events_type_keyset', 'entity_type', 'occurred_at', 'event_id'),
+        db.Index('ix_audit_events_entity_keyset', 'entity_type', 'entity_id', 'occurred_at', 'event_id'),
+        db.Index('ix_audit_events_greenhouse_keyset', 'greenhouse_id', 'occurred_at', 'event_id'),
+        db.Index('ix_audit_events_actor_keyset', 'actor_id', 'occurred_at', 'event_id'),
+        db.Index('ix_audit_events_source', 'source_table', 'source_log_id'),
+        {"info": {"partition_column": "occurred_at"}},
+    )
+    __mapper_args__ = {"primary_key": [event_id]}
+
+    def __repr__(self):
+        return f"<AuditEvent(id={self.event_id}, type='{self.entity_type}', entity_id={self.entity_id}, at={self.occurred_at})>"
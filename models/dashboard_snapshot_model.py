@@ -0,0 +1,21 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\dashboard_snapshot_model.py
+from db import db
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class DashboardSnapshot(db.Model):
+    """
+    Precomputed admin dashboard of one greenhouse (see dashboard_snapshots.py).
+    etag is a hash of payload, so it only changes when the dashboard does.
+    """
+    __tablename__ = 'dashboard_snapshots'
+
+    # If Greenhouse deleted, delete its snapshot
+    greenhouse_id = db.Column(db.Integer, db.ForeignKey('greenhouses.greenhouse_id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    payload = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=False)
+    etag = db.Column(db.String(64), nullable=False)
+    refreshed_at = db.Column(db.DateTime(timezone=True), nullable=False) # UTC; last time payload was recomputed
+    changed_at = db.Column(db.DateTime(timezone=True), nullable=False) # UTC; last time payload (and etag) changed
+
+    def __repr__(self):
+        return f"<DashboardSnapshot(gh={self.greenhouse_id}, etag='{self.etag[:12]}', refreshed_at='{self.refreshed_at}')>"
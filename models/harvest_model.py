@@ -39,7 +39,7 @@ class Harvest(db.Model):
     status = db.Column(db.String(50), nullable=False, server_default='Not Sold', index=True) # Added index
 
     # Timestamp for the last update to the record. Automatically updates.
-    last_updated = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), onupdate=lambda: datetime.now(pytz.utc)) # Store UTC
+    last_updated = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), onupdate=lambda: datetime.now(pytz.utc), index=True) # Store UTC; collection ETags read this column
 
     # --- Relationships ---
     greenhouses = db.relationship("Greenhouse", back_populates="harvests", lazy=True)
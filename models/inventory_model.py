@@ -73,6 +73,8 @@ class Inventory(db.Model):
     max_total_ml = db.Column(db.Float, nullable=True, default=0.0) # Optional: Size of package (e.g., 1000 for 1L bottle)
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(pytz.utc)) # Use lambda for default
     price = db.Column(db.Float, nullable=False, default=0.0) # Price per unit/package
+    # Last insert/update (UTC); collection ETags read this column
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), onupdate=lambda: datetime.now(pytz.utc), index=True)
 
     # --- Relationships ---
     # Relationship back to the container (Many-to-One)
@@ -0,0 +1,41 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\outbox_model.py
+from db import db
+
+
+class OutboxEvent(db.Model):
+    """
+    A change event written in the same transaction as the row it describes (see outbox.py).
+    The relay delivers events in event_id order to each consumer, then prunes them.
+    """
+    __tablename__ = 'outbox_events'
+
+    event_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    channel = db.Column(db.String(100), nullable=False) # Same names as the NOTIFY channels, e.g. 'harvests_updates'
+    entity_type = db.Column(db.String(50), nullable=False) # e.g. 'harvest', 'sale'
+    entity_id = db.Column(db.Integer, nullable=True) # NULL for bulk operations
+    action = db.Column(db.String(20), nullable=False) # 'insert', 'update', 'delete', 'bulk_delete', 'bulk_update'
+    payload = db.Column(db.Text, nullable=False) # JSON document
+    created_at = db.Column(db.DateTime, nullable=False, index=True) # Naive UTC
+    # Id of the writing transaction, set by the database on PostgreSQL (NULL elsewhere); see outbox.py
+    transaction_id = db.Column(db.BigInteger, server_default=db.FetchedValue(), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_outbox_events_transaction_event', 'transaction_id', 'event_id'),
+        db.Index('ix_outbox_events_type_position', 'entity_type', 'transaction_id', 'event_id'), # GET /sync
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.event_id}, channel='{self.channel}', action='{self.action}', entity_id={self.entity_id})>"
+
+
+class OutboxConsumerOffset(db.Model):
+    """Position (transaction_id, event_id) of the last event each relay consumer (sink) has delivered."""
+    __tablename__ = 'outbox_consumer_offsets'
+
+    consumer = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=False, default=0)
+    last_transaction_id = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True) # Naive UTC
+
+    def __repr__(self):
+        return f"<OutboxConsumerOffset(consumer='{self.consumer}', last_event_id={self.last_event_id})>"
@@ -1,6 +1,8 @@
 # C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\planted_crops_model.py
 from sqlalchemy import Column, Integer, Date, ForeignKey, CheckConstraint, Numeric, String
 from db import db
+from datetime import datetime
+import pytz
 
 
 class PlantedCrops(db.Model):
@@ -25,6 +27,8 @@ class PlantedCrops(db.Model):
     # Status of the crop batch
     status = Column(String(50), nullable=False, default="not harvested") # e.g., "not harvested", "harvested", "failed"
     total_days_grown = Column(Integer, nullable=False)
+    # Last insert/update (UTC); collection ETags read this column
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), onupdate=lambda: datetime.now(pytz.utc), index=True)
 
     # --- Relationships ---
     greenhouses = db.relationship("Greenhouse", back_populates="planted_crops", lazy=True)
@@ -1,6 +1,8 @@
 # C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\reason_for_rejection_model.py
 from db import db
 from sqlalchemy import func, ForeignKey
+from datetime import datetime
+import pytz
 
 class ReasonForRejection(db.Model):
     """
@@ -23,6 +25,8 @@ class ReasonForRejection(db.Model):
     total_price = db.Column(db.Float, nullable=False) # Calculated potential value after deductions
     # Status: Not Sold, Sold, Disposed, Processing
     status = db.Column(db.String(50), nullable=False, server_default='Not Sold', index=True) # Added index
+    # Last insert/update (UTC); collection ETags read this column
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), onupdate=lambda: datetime.now(pytz.utc), index=True)
 
     # --- Relationships ---
     greenhouses = db.relationship("Greenhouse", back_populates="reason_for_rejection", lazy=True) # Renamed from greenhouses
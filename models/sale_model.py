@@ -48,6 +48,8 @@ class Sale(db.Model):
 
     cropDescription = db.Column(db.String(200), nullable=True) # Optional description for the sale
     salesDate = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(pytz.utc)) # Use lambda, store UTC
+    # Last insert/update (UTC); collection ETags read this column
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(pytz.utc), onupdate=lambda: datetime.now(pytz.utc), index=True)
 
     # --- Relationships ---
     # If Sale deleted, delete its logs
@@ -0,0 +1,39 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\sensor_reading_rollup_model.py
+from db import db
+
+
+class SensorReadingRollup(db.Model):
+    """
+    Pre-aggregated sensor readings for one unit (and greenhouse, when known)
+    over one minute, hour or day bucket (greenhouse_id 0 when unknown). Kept up to date by sensor_rollups.py.
+    """
+    __tablename__ = 'sensor_reading_rollups'
+
+    rollup_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    bucket = db.Column(db.String(10), nullable=False) # 'minute', 'hour', 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False) # Naive UTC, same as sensor_readings.reading_time
+    unit = db.Column(db.String, nullable=False)
+    # No FK yet: sensor_readings has no greenhouse column, so this is 0 (sensor_rollups.NO_GREENHOUSE_ID) until it does.
+    # Not NULL: NULLs never conflict in uq_sensor_rollup_key, which the rollup upsert relies on.
+    greenhouse_id = db.Column(db.Integer, nullable=False, server_default='0')
+
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    sum_value = db.Column(db.Float, nullable=False) # mean = sum_value / reading_count
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    last_value = db.Column(db.Float, nullable=False)
+    last_time = db.Column(db.DateTime, nullable=False)
+
+    # --- Constraints ---
+    __table_args__ = (
+        db.CheckConstraint(bucket.in_(['minute', 'hour', 'day']), name='valid_rollup_bucket'),
+        db.UniqueConstraint('bucket', 'unit', 'greenhouse_id', 'bucket_start', name='uq_sensor_rollup_key'),
+        db.Index('ix_sensor_rollups_lookup', 'bucket', 'unit', 'bucket_start'),
+    )
+
+    @property
+    def mean_value(self):
+        return self.sum_value / self.reading_count if self.reading_count else None
+
+    def __repr__(self):
+        return f"<SensorReadingRollup(bucket='{self.bucket}', unit='{self.unit}', start='{self.bucket_start}', count={self.reading_count})>"
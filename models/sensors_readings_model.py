@@ -1,4 +1,8 @@
 #C:\Users\Giebert\PycharmProjects\agreemo_api_v2\models\sensors_readings_model.py
+from datetime import datetime
+
+import pytz
+
 from db import db
 
 
@@ -6,15 +10,28 @@ class SensorReading(db.Model):
     """Represents a single reading from a sensor."""
     __tablename__ = 'sensor_readings'
 
-    reading_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Serial id; the primary key is (reading_id, reading_time) because the table is partitioned on reading_time
+    reading_id = db.Column(db.Integer, primary_key=True, server_default=db.FetchedValue())
     # Consider adding ForeignKey to a Sensor/HardwareComponent table if applicable
     # component_id = db.Column(db.Integer, db.ForeignKey("hardware_components.component_id", ondelete='CASCADE'), nullable=True)
     # Consider adding ForeignKey to Greenhouse
     # greenhouse_id = db.Column(db.Integer, db.ForeignKey("greenhouses.greenhouse_id", ondelete='CASCADE'), nullable=True)
     reading_value = db.Column(db.Float, nullable=False)
-    reading_time = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    # Naive UTC, set in Python so every row has microsecond precision: SQLite's CURRENT_TIMESTAMP drops it,
+    # and a cursor bound with '.000000' would then compare as a later string than the stored time
+    reading_time = db.Column(db.DateTime, primary_key=True, default=lambda: datetime.now(pytz.utc).replace(tzinfo=None),
+                             server_default=db.func.current_timestamp())
     unit = db.Column(db.String, nullable=False) # e.g., '°C', 'pH', 'ppm'
 
+    # --- Indexes ---
+    # Keyset pagination on (reading_time, reading_id), optionally filtered by unit
+    __table_args__ = (
+        db.Index('ix_sensor_readings_time', 'reading_time', 'reading_id'),
+        db.Index('ix_sensor_readings_unit_time', 'unit', 'reading_time', 'reading_id'),
+        {"info": {"partition_column": "reading_time"}},
+    )
+    __mapper_args__ = {"primary_key": [reading_id]}
+
     # Define relationships if ForeignKeys are added above
     # hardware_component = db.relationship(...)
     # greenhouse = db.relationship(...)
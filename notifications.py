@@ -0,0 +1,156 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\notifications.py
+"""
+PostgreSQL NOTIFY publisher shared by all route modules.
+
+send_notification() never opens its own connection:
+- Called while the session transaction has pending or flushed writes (i.e. before
+  db.session.commit()), the event is queued on the session and sent with pg_notify
+  on the same connection just before the commit. PostgreSQL delivers it only if
+  the commit succeeds; a rollback drops it.
+- Called after the commit (no writes in the current transaction), the event is
+  queued for the end of the request / app context and sent on a pooled connection.
+Queued events are sent together, several pg_notify calls per round trip.
+"""
+import json
+import re
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from db import db
+from metrics import NOTIFY_FAILED, NOTIFY_SENT
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7999
+# pg_notify calls per statement when sending a batch
+NOTIFY_BATCH_SIZE = 50
+
+_CHANNEL_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+_SESSION_KEY = "pending_notifications"
+_WRITES_KEY = "transaction_has_writes"
+
+
+def _log():
+    return current_app.logger if has_app_context() else None
+
+
+def _prepare(channel, payload):
+    """Returns (channel, json string), or None if the event cannot be sent."""
+    logger = _log()
+    if not isinstance(channel, str) or not _CHANNEL_RE.match(channel):
+        if logger: logger.error(f"Invalid notification channel name: {channel!r}")
+        return None
+    try:
+        json_payload = json.dumps(payload, default=str)
+    except (TypeError, ValueError) as e:
+        if logger: logger.error(f"JSON serialization error for notification to '{channel}': {e}. Payload: {payload}", exc_info=True)
+        return None
+    if len(json_payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+        if logger: logger.error(f"Notification payload for '{channel}' exceeds {MAX_PAYLOAD_BYTES} bytes; not sent.")
+        return None
+    return channel, json_payload
+
+
+def send_notification(channel, payload):
+    """Queues a NOTIFY event on channel; see the module docstring for when it is sent."""
+    prepared = _prepare(channel, payload)
+    if prepared is None:
+        return
+
+    session = db.session()
+    if session.in_transaction() and transaction_has_writes(session):
+        session.info.setdefault(_SESSION_KEY, []).append(prepared)
+    elif has_app_context():
+        if "post_commit_notifications" not in g:
+            g.post_commit_notifications = []
+        g.post_commit_notifications.append(prepared)
+    else:
+        _send_on_new_transaction([prepared])
+
+
+def transaction_has_writes(session):
+    """True when session's current transaction has pending, flushed or bulk writes."""
+    return bool(session.info.get(_WRITES_KEY) or session.new or session.dirty or session.deleted)
+
+
+def _execute_batch(connection, events):
+    """Sends events with multi-call SELECT pg_notify(...) statements on connection."""
+    if connection.dialect.name != "postgresql":
+        logger = _log()
+        if logger: logger.debug(f"Skipping {len(events)} notification(s): NOTIFY requires PostgreSQL.")
+        return 0
+    for start in range(0, len(events), NOTIFY_BATCH_SIZE):
+        chunk = events[start:start + NOTIFY_BATCH_SIZE]
+        calls = ", ".join(f"pg_notify(:c{i}, :p{i})" for i in range(len(chunk)))
+        params = {}
+        for i, (channel, json_payload) in enumerate(chunk):
+            params[f"c{i}"] = channel
+            params[f"p{i}"] = json_payload
+        connection.execute(text(f"SELECT {calls}"), params)
+    return len(events)
+
+
+def _count(counter, events):
+    for channel, _ in events:
+        counter.labels(channel=channel).inc()
+
+
+def _send_on_new_transaction(events):
+    try:
+        with db.engine.begin() as connection:
+            sent = _execute_batch(connection, events)
+        if sent: _count(NOTIFY_SENT, events)
+        logger = _log()
+        if logger and sent: logger.info(f"Sent {sent} notification(s): {', '.join(sorted({c for c, _ in events}))}")
+    except Exception as e:
+        _count(NOTIFY_FAILED, events)
+        logger = _log()
+        if logger: logger.error(f"Error sending {len(events)} notification(s): {e}", exc_info=True)
+
+
+def flush_post_commit_notifications(exception=None):
+    """Sends events queued outside a transaction. Registered as an app-context teardown."""
+    events = g.pop("post_commit_notifications", None) if has_app_context() else None
+    if events:
+        _send_on_new_transaction(events)
+
+
+@event.listens_for(Session, "before_commit")
+def _send_pending_on_commit(session):
+    events = session.info.pop(_SESSION_KEY, None)
+    if not events:
+        return
+    # Same connection and transaction as the data being committed
+    try:
+        sent = _execute_batch(session.connection(), events)
+    except Exception:
+        _count(NOTIFY_FAILED, events) # The commit fails with it
+        raise
+    if sent: _count(NOTIFY_SENT, events)
+    logger = _log()
+    if logger: logger.info(f"Sent {len(events)} notification(s) with commit: {', '.join(sorted({c for c, _ in events}))}")
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info[_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reset_on_transaction_end(session, transaction):
+    if transaction.parent is None:
+        # Anything still queued here was rolled back or never committed
+        session.info.pop(_SESSION_KEY, None)
+        session.info.pop(_WRITES_KEY, None)
+
+
+def init_notifications(app):
+    """Registers the teardown that sends notifications queued after a commit."""
+    app.teardown_appcontext(flush_post_commit_notifications)
@@ -0,0 +1,351 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\outbox.py
+"""
+Transactional outbox for changes to the tables clients watch live (harvests, sales,
+inventory, rejections, planted crops, maintenance, hardware, and their activity logs).
+
+Capture: a session after_flush hook appends one outbox_events row per inserted,
+updated or deleted row of the tracked models, on the same connection and in the
+same transaction as the change itself. A crash after commit can no longer lose
+the event, and payloads are not limited by NOTIFY's 8 KB cap.
+
+Relay: relay_outbox() delivers events to every registered sink ('notify',
+'webhooks', and any added with register_sink()). Each sink has its own offset in
+outbox_consumer_offsets, advanced only after a batch is delivered
+(at-least-once). Events every consumer has passed are pruned after
+OUTBOX_RETENTION_HOURS, or later for channels registered with retain_channel().
+
+event_id is assigned at flush time, so a transaction can commit events with
+lower ids after higher ids are already visible. On PostgreSQL every event
+therefore records its transaction id, and events are delivered in
+(transaction_id, event_id) order, only from transactions older than the
+relay's snapshot xmin: all of those have ended, and no transaction can still
+write below that position. SQLite runs one write transaction at a time, so
+event_id order is commit order there.
+"""
+import json
+import os
+import urllib.request
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytz
+from sqlalchemy import event, func, inspect, text, tuple_
+from sqlalchemy.orm import Session
+
+from db import db
+from models.outbox_model import OutboxEvent, OutboxConsumerOffset
+from models.harvest_model import Harvest
+from models.sale_model import Sale
+from models.reason_for_rejection_model import ReasonForRejection
+from models.planted_crops_model import PlantedCrops
+from models.inventory_model import Inventory, InventoryContainer
+from models.maintenance_model import Maintenance
+from models.hardware_component_model import HardwareComponents
+from models.hardware_current_status_model import HardwareCurrentStatus
+from models.nutrient_controllers_model import NutrientController
+from models.activity_logs.admin_activity_logs_model import AdminActivityLogs
+from models.activity_logs.greenhouse_activity_logs_model import GreenHouseActivityLogs
+from models.activity_logs.harvest_activity_logs_model import HarvestActivityLogs
+from models.activity_logs.rejection_activity_logs_model import RejectionActivityLogs
+from models.activity_logs.maintenance_activity_logs_model import MaintenanceActivityLogs
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.activity_logs.hardware_components_activity_logs_model import HardwareComponentActivityLogs
+from models.activity_logs.nutrient_controller_activity_logs_model import NutrientControllerActivityLogs
+from models.activity_logs.planted_crop_activity_logs_model import PlantedCropActivityLogs
+from models.activity_logs.inventory_log_model import InventoryLog
+from models.activity_logs.inventory_container_activity_logs import InventoryContainerLog
+from models.activity_logs.sale_activity_log_model import SaleLog
+
+# Tracked model -> (channel, entity_type). Channels match the existing NOTIFY channel names.
+TRACKED_MODELS = {
+    Harvest: ("harvests_updates", "harvest"),
+    Sale: ("sales_updates", "sale"),
+    ReasonForRejection: ("rejection_updates", "rejection"),
+    PlantedCrops: ("planted_crops_updates", "planted_crop"),
+    Inventory: ("inventory_updates", "inventory"),
+    InventoryContainer: ("inventory_container_updates", "inventory_container"),
+    Maintenance: ("maintenance_updates", "maintenance"),
+    HardwareComponents: ("hardware_components_updates", "hardware_component"),
+    HardwareCurrentStatus: ("hardware_status_updates", "hardware_status"),
+    NutrientController: ("nutrient_controller_updates", "nutrient_controller"),
+    AdminActivityLogs: ("admin_logs_updates", "admin_log"),
+    GreenHouseActivityLogs: ("greenhouse_logs_updates", "greenhouse_log"),
+    HarvestActivityLogs: ("harvests_logs_updates", "harvest_log"),
+    RejectionActivityLogs: ("rejection_logs_updates", "rejection_log"),
+    MaintenanceActivityLogs: ("maintenance_logs_updates", "maintenance_log"),
+    HardwareStatusActivityLogs: ("hardware_status_logs_updates", "hardware_status_log"),
+    HardwareComponentActivityLogs: ("hardware_components_logs_updates", "hardware_component_log"),
+    NutrientControllerActivityLogs: ("nutrient_controller_logs_updates", "nutrient_controller_log"),
+    PlantedCropActivityLogs: ("planted_crops_logs_updates", "planted_crop_log"),
+    InventoryLog: ("inventory_logs_updates", "inventory_log"),
+    InventoryContainerLog: ("inventory_container_logs_updates", "inventory_container_log"),
+    SaleLog: ("sale_logs_updates", "sale_log"),
+}
+
+OUTBOX_NOTIFY_CHANNEL = "outbox_events"
+RELAY_BATCH_SIZE = int(os.environ.get("OUTBOX_RELAY_BATCH_SIZE", 200))
+RETENTION_HOURS = float(os.environ.get("OUTBOX_RETENTION_HOURS", 24))
+WEBHOOK_TIMEOUT_SECONDS = 5
+
+
+def _utcnow():
+    return datetime.now(pytz.utc).replace(tzinfo=None)
+
+
+def json_default(value):
+    """json.dumps default for the column types used by the models."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def fetch_server_defaults(models):
+    """
+    Makes flushes of models fetch their server-generated columns (server_default,
+    FetchedValue) with RETURNING, or a SELECT where that is unsupported, so
+    serialize_row() sees them in after_flush.
+    """
+    for model in models:
+        model.__mapper__.base_mapper.eager_defaults = True
+
+
+fetch_server_defaults(TRACKED_MODELS)
+
+
+def serialize_row(instance):
+    """Column values of instance that are already loaded (never emits SQL)."""
+    state = inspect(instance)
+    loaded = state.dict
+    return {attr.key: loaded[attr.key] for attr in state.mapper.column_attrs if attr.key in loaded}
+
+
+def _changed_fields(instance):
+    state = inspect(instance)
+    return [attr.key for attr in state.mapper.column_attrs if state.attrs[attr.key].history.has_changes()]
+
+
+def _event_row(instance, action, now):
+    channel, entity_type = TRACKED_MODELS[type(instance)]
+    # Not inspect(instance).identity: new objects get their identity key only after after_flush
+    identity = inspect(instance).mapper.primary_key_from_instance(instance)
+    entity_id = identity[0] if len(identity) == 1 else None
+    document = {"action": action, "entity_type": entity_type, "entity_id": entity_id, "data": serialize_row(instance)}
+    if action == "update":
+        document["changed_fields"] = _changed_fields(instance)
+    return {
+        "channel": channel, "entity_type": entity_type, "entity_id": entity_id, "action": action,
+        "payload": json.dumps(document, default=json_default), "created_at": now,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_changes(session, flush_context):
+    now = _utcnow()
+    rows = []
+    for instance in session.new:
+        if type(instance) in TRACKED_MODELS:
+            rows.append(_event_row(instance, "insert", now))
+    for instance in session.dirty:
+        if type(instance) in TRACKED_MODELS and session.is_modified(instance, include_collections=False):
+            rows.append(_event_row(instance, "update", now))
+    for instance in session.deleted:
+        if type(instance) in TRACKED_MODELS:
+            rows.append(_event_row(instance, "delete", now))
+    if rows:
+        # Core insert on the flushing connection: same transaction, no extra flush cycle
+        session.connection().execute(OutboxEvent.__table__.insert(), rows)
+
+
+def _capture_bulk(context, action):
+    tracked = TRACKED_MODELS.get(context.mapper.class_)
+    if tracked is None:
+        return
+    channel, entity_type = tracked
+    document = {"action": action, "entity_type": entity_type, "entity_id": None, "rowcount": context.result.rowcount}
+    context.session.connection().execute(OutboxEvent.__table__.insert(), [{
+        "channel": channel, "entity_type": entity_type, "entity_id": None, "action": action,
+        "payload": json.dumps(document, default=json_default), "created_at": _utcnow(),
+    }])
+
+
+@event.listens_for(Session, "after_bulk_delete")
+def _capture_bulk_delete(delete_context):
+    _capture_bulk(delete_context, "bulk_delete")
+
+
+@event.listens_for(Session, "after_bulk_update")
+def _capture_bulk_update(update_context):
+    _capture_bulk(update_context, "bulk_update")
+
+
+# --- Relay ---
+def event_to_dict(outbox_event):
+    return {
+        "event_id": outbox_event.event_id,
+        "transaction_id": outbox_event.transaction_id or 0,
+        "channel": outbox_event.channel,
+        "entity_type": outbox_event.entity_type,
+        "entity_id": outbox_event.entity_id,
+        "action": outbox_event.action,
+        "created_at": outbox_event.created_at.isoformat() + "Z",
+        "payload": json.loads(outbox_event.payload),
+    }
+
+
+def notify_sink(events):
+    """Publishes each event on the outbox_events NOTIFY channel (payload dropped if over 8 KB)."""
+    from notifications import MAX_PAYLOAD_BYTES, _execute_batch
+    prepared = []
+    for outbox_event in events:
+        message = json.dumps(outbox_event, default=json_default)
+        if len(message.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            # Listeners can read the full row from outbox_events by event_id
+            message = json.dumps(dict(outbox_event, payload=None, truncated=True), default=json_default)
+        prepared.append((OUTBOX_NOTIFY_CHANNEL, message))
+    with db.engine.begin() as connection:
+        _execute_batch(connection, prepared)
+
+
+def webhooks_sink(events):
+    """POSTs {"events": [...]} to every URL in OUTBOX_WEBHOOK_URLS. Any failure retries the batch."""
+    urls = [url.strip() for url in os.environ.get("OUTBOX_WEBHOOK_URLS", "").split(",") if url.strip()]
+    body = json.dumps({"events": events}, default=json_default).encode("utf-8")
+    for url in urls:
+        request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT_SECONDS) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"Webhook {url} returned HTTP {response.status}")
+
+
+_sinks = {"notify": notify_sink}
+_channel_retention_hours = {} # channel -> hours, for channels kept longer than OUTBOX_RETENTION_HOURS
+if os.environ.get("OUTBOX_WEBHOOK_URLS"):
+    _sinks["webhooks"] = webhooks_sink
+
+
+def register_sink(name, sink):
+    """Adds a consumer; sink(events) receives lists of event dicts and raises to retry."""
+    _sinks[name] = sink
+
+
+def _is_postgresql():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def event_position(change):
+    """(transaction_id, event_id) of an event dict: its place in delivery order."""
+    return (change.get("transaction_id") or 0, change.get("event_id") or 0)
+
+
+def after_position(position):
+    """Filter for events after position, a (transaction_id, event_id) offset."""
+    if _is_postgresql():
+        return tuple_(OutboxEvent.transaction_id, OutboxEvent.event_id) > position
+    return OutboxEvent.event_id > position[1]
+
+
+def delivery_horizon():
+    """
+    Transaction id below which every writer has ended (PostgreSQL snapshot xmin).
+    None on SQLite, where event_id order is already commit order.
+    """
+    if not _is_postgresql():
+        return None
+    return db.session.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+
+
+def deliverable_events(position, horizon=None):
+    """Events after position written by transactions that have all ended, in delivery order."""
+    query = OutboxEvent.query.filter(after_position(position))
+    if not _is_postgresql():
+        return query.order_by(OutboxEvent.event_id)
+    if horizon is None:
+        horizon = delivery_horizon()
+    return query.filter(OutboxEvent.transaction_id < horizon).order_by(OutboxEvent.transaction_id, OutboxEvent.event_id)
+
+
+def _relay_consumer(name, sink):
+    offset = (OutboxConsumerOffset.query
+              .filter_by(consumer=name)
+              .with_for_update(skip_locked=True)
+              .first())
+    if offset is None:
+        if db.session.get(OutboxConsumerOffset, name) is not None:
+            db.session.rollback()
+            return 0 # Another relay process holds this consumer
+        offset = OutboxConsumerOffset(consumer=name, last_transaction_id=0, last_event_id=0, updated_at=_utcnow())
+        db.session.add(offset)
+        db.session.flush()
+
+    events = deliverable_events((offset.last_transaction_id, offset.last_event_id)).limit(RELAY_BATCH_SIZE).all()
+    if not events:
+        db.session.commit()
+        return 0
+
+    sink([event_to_dict(outbox_event) for outbox_event in events])
+    offset.last_transaction_id = events[-1].transaction_id or 0
+    offset.last_event_id = events[-1].event_id
+    offset.updated_at = _utcnow()
+    db.session.commit()
+    return len(events)
+
+
+def retain_channel(channel, hours):
+    """Keeps channel's events for at least hours, for readers other than the sinks (e.g. GET /sync)."""
+    _channel_retention_hours[channel] = max(hours, _channel_retention_hours.get(channel, 0))
+
+
+def prune_outbox(retention_hours=RETENTION_HOURS):
+    """Deletes events older than the retention window that every consumer has delivered."""
+    consumers = list(_sinks)
+    offsets = OutboxConsumerOffset.query.filter(OutboxConsumerOffset.consumer.in_(consumers)).all()
+    if len(offsets) < len(consumers):
+        return 0 # A consumer has not started yet; keep everything for it
+    delivered = min((offset.last_transaction_id, offset.last_event_id) for offset in offsets)
+    now = _utcnow()
+    retained = list(_channel_retention_hours)
+    deleted = (OutboxEvent.query
+               .filter(~after_position(delivered),
+                       OutboxEvent.created_at < now - timedelta(hours=retention_hours),
+                       OutboxEvent.channel.notin_(retained))
+               .delete(synchronize_session=False))
+    for channel, hours in _channel_retention_hours.items():
+        deleted += (OutboxEvent.query
+                    .filter(~after_position(delivered),
+                            OutboxEvent.created_at < now - timedelta(hours=max(hours, retention_hours)),
+                            OutboxEvent.channel == channel)
+                    .delete(synchronize_session=False))
+    db.session.commit()
+    return deleted
+
+
+def relay_outbox(app, max_batches=10):
+    """One relay pass: up to max_batches batches per consumer, then pruning. Safe to run in many processes."""
+    with app.app_context():
+        delivered = {}
+        for name, sink in list(_sinks.items()):
+            delivered[name] = 0
+            try:
+                for _ in range(max_batches):
+                    count = _relay_consumer(name, sink)
+                    delivered[name] += count
+                    if count < RELAY_BATCH_SIZE:
+                        break
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Outbox relay: consumer '{name}' failed, will retry: {e}", exc_info=True)
+        try:
+            prune_outbox()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Outbox relay: pruning failed: {e}", exc_info=True)
+        return delivered
+
+
+def outbox_lag():
+    """Returns {consumer: approximate number of undelivered events} (for monitoring)."""
+    latest = db.session.query(func.max(OutboxEvent.event_id)).scalar() or 0
+    offsets = {offset.consumer: offset.last_event_id for offset in OutboxConsumerOffset.query.all()}
+    return {name: max(0, latest - offsets.get(name, 0)) for name in _sinks}
@@ -0,0 +1,63 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\pagination.py
+"""
+Keyset (cursor) pagination helpers shared by list endpoints.
+
+Pages are ordered newest first on (time column, id column). The cursor is the
+(time, id) of the last row on the previous page, so fetching any page is one
+index range scan no matter how deep into the table it is.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Row
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
+def encode_cursor(time_value, id_value):
+    """Builds an opaque, URL-safe cursor from the last row of a page."""
+    raw = json.dumps([time_value.isoformat() if time_value else None, id_value])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Reverses encode_cursor(). Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        time_str, id_value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(time_str), int(id_value)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def parse_limit(value, default=DEFAULT_PAGE_LIMIT, maximum=MAX_PAGE_LIMIT):
+    """Parses the 'limit' query arg, clamped to [1, maximum]. Raises ValueError if not an int."""
+    if value in (None, ""):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def keyset_page(query, time_column, id_column, cursor=None, limit=DEFAULT_PAGE_LIMIT):
+    """
+    Returns (rows, next_cursor) for one newest-first page of query.
+    Rows with a NULL time value cannot be placed on the keyset and are excluded.
+    rows may be ORM objects or result tuples; the key is read from the first entity.
+    """
+    query = query.filter(time_column.isnot(None))
+    if cursor:
+        last_time, last_id = decode_cursor(cursor)
+        query = query.filter(tuple_(time_column, id_column) < tuple_(last_time, last_id))
+
+    # Fetch one extra row to know whether another page exists without a COUNT(*)
+    rows = query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    entity = last[0] if isinstance(last, Row) else last
+    next_cursor = encode_cursor(getattr(entity, time_column.key), getattr(entity, id_column.key))
+    return rows, next_cursor
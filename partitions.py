@@ -0,0 +1,194 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\partitions.py
+"""
+Monthly range partitions and retention for the append-only tables (PostgreSQL).
+
+Each family in PARTITION_FAMILIES groups tables that share a retention policy.
+Every table is partitioned by month on its time column (migration
+a93f0c6d51e2); maintain_partitions() runs daily and:
+- creates the partitions for the next PARTITION_MONTHS_AHEAD months, so inserts
+  never fall into the default partition;
+- for families with RETENTION_MONTHS_<FAMILY> set, drops partitions whose whole
+  month is older than that, after writing them to ARCHIVE_DIR
+  (archive_store.py) unless ARCHIVE_<FAMILY>=false.
+
+Dropping a partition is a metadata operation, unlike a DELETE over millions of
+rows. It removes rows without touching the audit_events rows that mirror them
+(audit_log.py): audit_events is a family of its own with its own retention
+(RETENTION_MONTHS_AUDIT_EVENTS), so the audit trail can outlive the legacy logs.
+Only one process runs maintain_partitions() at a time (job_locks.py). Month boundaries are PH time for time-zone aware columns; naive columns
+are compared as stored. On other databases every function here is a no-op.
+"""
+import os
+from datetime import datetime
+
+import pytz
+from flask import current_app
+from sqlalchemy import text
+
+from db import db
+from archive_store import write_archive
+from job_locks import job_lock
+from models.sensors_readings_model import SensorReading
+from models.audit_event_model import AuditEvent
+from models.activity_logs.harvest_activity_logs_model import HarvestActivityLogs
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.activity_logs.nutrient_controller_activity_logs_model import NutrientControllerActivityLogs
+from models.activity_logs.control_activity_logs_model import ControlActivityLogs
+from models.activity_logs.inventory_log_model import InventoryLog
+from models.activity_logs.inventory_container_activity_logs import InventoryContainerLog
+from models.activity_logs.inventory_item_logs import InventoryItemLog
+
+PH_TZ = pytz.timezone('Asia/Manila')
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 3))
+ARCHIVE_FETCH_SIZE = 5000
+
+# Family -> time columns of its tables. Retention is configured per family:
+# RETENTION_MONTHS_SENSOR_READINGS=6, ARCHIVE_SENSOR_READINGS=false, ...
+PARTITION_FAMILIES = {
+    "sensor_readings": [SensorReading.reading_time],
+    "harvest_logs": [HarvestActivityLogs.log_date],
+    "hardware_status_logs": [HardwareStatusActivityLogs.timestamp],
+    "nutrient_controller_logs": [NutrientControllerActivityLogs.logs_date],
+    "control_logs": [ControlActivityLogs.log_date],
+    "inventory_logs": [InventoryLog.timestamp, InventoryContainerLog.timestamp, InventoryItemLog.timestamp],
+    "audit_events": [AuditEvent.occurred_at],
+}
+
+
+def retention_months(family):
+    """Months of data kept for family, or None to keep everything."""
+    value = os.environ.get(f"RETENTION_MONTHS_{family.upper()}")
+    return int(value) if value else None
+
+
+def archive_enabled(family):
+    return os.environ.get(f"ARCHIVE_{family.upper()}", "true").lower() in ("1", "true", "yes")
+
+
+def _month_index(year, month):
+    return year * 12 + month - 1
+
+
+def _month_bound(index, column):
+    """SQL literal for the start of month index, in PH time for aware columns."""
+    start = datetime(index // 12, index % 12 + 1, 1)
+    if getattr(column.type, "timezone", False):
+        return PH_TZ.localize(start).isoformat()
+    return start.isoformat(sep=" ")
+
+
+def partition_name(table, index):
+    return f"{table}_{index // 12:04d}_{index % 12 + 1:02d}"
+
+
+def is_partitioned(connection, table):
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+                              {"table": table}).first() is not None
+
+
+def monthly_partitions(connection, table):
+    """{month index: partition name} of the existing monthly partitions of table."""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"), {"table": table}).scalars()
+    partitions = {}
+    prefix = f"{table}_"
+    for name in names:
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        year, _, month = suffix.partition("_")
+        if year.isdigit() and month.isdigit():
+            partitions[_month_index(int(year), int(month))] = name
+    return partitions
+
+
+def ensure_partitions(column, oldest=None, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Creates the monthly partitions of column's table from oldest's month (default:
+    this month) through months_ahead months from now. Returns the names created.
+    """
+    table = column.table.name
+    connection = db.session.connection()
+    if not is_partitioned(connection, table):
+        return []
+    now = datetime.now(PH_TZ)
+    if oldest is None:
+        oldest = now
+    elif oldest.tzinfo is not None:
+        oldest = oldest.astimezone(PH_TZ)
+    existing = monthly_partitions(connection, table)
+    created = []
+    for index in range(_month_index(oldest.year, oldest.month), _month_index(now.year, now.month) + months_ahead + 1):
+        if index in existing:
+            continue
+        name = partition_name(table, index)
+        connection.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{_month_bound(index, column)}') TO ('{_month_bound(index + 1, column)}')"))
+        created.append(name)
+    db.session.commit()
+    return created
+
+
+def _partition_rows(connection, partition):
+    result = connection.execution_options(stream_results=True, yield_per=ARCHIVE_FETCH_SIZE).execute(
+        text(f"SELECT * FROM {partition}"))
+    for row in result.mappings():
+        yield dict(row)
+
+
+def apply_retention(family, now=None):
+    """
+    Archives (unless disabled) and drops the partitions of family's tables whose whole
+    month is older than its retention. Returns the names of partitions dropped.
+    """
+    months = retention_months(family)
+    if months is None:
+        return []
+    now = now or datetime.now(PH_TZ)
+    # Keep the current month plus `months` full months before it
+    first_kept = _month_index(now.year, now.month) - months
+    dropped = []
+    for column in PARTITION_FAMILIES[family]:
+        table = column.table.name
+        connection = db.session.connection()
+        if not is_partitioned(connection, table):
+            continue
+        for index, partition in sorted(monthly_partitions(connection, table).items()):
+            if index >= first_kept:
+                break
+            if archive_enabled(family):
+                manifest = write_archive(table, partition, _partition_rows(connection, partition), column.key)
+                current_app.logger.info(f"Archived {manifest['rows']} rows of {partition} to {manifest['file']}.")
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+            connection.execute(text(f"DROP TABLE {partition}"))
+            db.session.commit()
+            connection = db.session.connection()
+            dropped.append(partition)
+    return dropped
+
+
+def maintain_partitions():
+    """
+    Daily job: creates upcoming partitions and applies every family's retention. Skipped
+    (returns None) while another process runs it.
+    """
+    with job_lock("partition_maintenance") as acquired:
+        if not acquired:
+            current_app.logger.info("Partition maintenance is running in another process; skipping this run.")
+            return None
+        return _maintain_partitions()
+
+
+def _maintain_partitions():
+    summary = {}
+    for family, columns in PARTITION_FAMILIES.items():
+        try:
+            created = [name for column in columns for name in ensure_partitions(column)]
+            dropped = apply_retention(family)
+            summary[family] = {"created": created, "dropped": dropped}
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Partition maintenance failed for {family}: {e}", exc_info=True)
+    return summary
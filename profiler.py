@@ -0,0 +1,280 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\profiler.py
+"""
+Opt-in sampling profiler for slow endpoints (PROFILER_ENABLED, default off).
+
+While a request is profiled, a sampler thread reads the request thread's stack
+every PROFILER_INTERVAL_MS (default 5) with sys._current_frames(). The stacks
+are saved as collapsed stacks ("frame;frame;frame count" per line, what
+flamegraph.pl and speedscope read) in PROFILER_DIR/<name>.collapsed, next to a
+<name>.json manifest (endpoint, status, duration, samples, trigger).
+
+A request is profiled when:
+- it sends X-Profile: 1 together with X-Profiler-Key: <PROFILER_ADMIN_KEY>;
+- it is picked by PROFILER_SAMPLE_RATE (default 0), optionally only for the
+  endpoints in PROFILER_ENDPOINTS (comma-separated, e.g.
+  harvests_api.get_all_harvests);
+- a window started with POST /profiles/window is open: every request this
+  worker handles during the window goes into one combined profile.
+List and download profiles with GET /profiles and GET /profiles/<name>
+(routes/profiler_routes.py). Only the newest PROFILER_MAX_FILES are kept.
+
+When disabled no request hook is registered and the sampler thread never starts.
+"""
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import pytz
+from flask import current_app, g, request
+
+ENABLED = os.environ.get("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+ADMIN_KEY = os.environ.get("PROFILER_ADMIN_KEY")
+SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", 0))
+PROFILED_ENDPOINTS = {name.strip() for name in os.environ.get("PROFILER_ENDPOINTS", "").split(",") if name.strip()}
+INTERVAL_SECONDS = float(os.environ.get("PROFILER_INTERVAL_MS", 5)) / 1000
+PROFILER_DIR = os.environ.get("PROFILER_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+MAX_FILES = int(os.environ.get("PROFILER_MAX_FILES", 200))
+MAX_WINDOW_SECONDS = 600
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def is_admin(request):
+    """True when the request carries the profiler admin key (never when PROFILER_ADMIN_KEY is unset)."""
+    key = request.headers.get("X-Profiler-Key")
+    return bool(ADMIN_KEY) and key is not None and hmac.compare_digest(key, ADMIN_KEY)
+
+
+class Profile:
+    """Stack counts of one request, or of every request in a window."""
+
+    def __init__(self, trigger, endpoint=None, method=None, path=None):
+        self.name = f"{datetime.now(pytz.utc).strftime('%Y%m%dT%H%M%S%f')}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.trigger = trigger
+        self.endpoint, self.method, self.path = endpoint, method, path
+        self.status = None
+        self.requests = 0
+        self.started_at = datetime.now(pytz.utc)
+        self._started = time.perf_counter()
+        self.stacks = Counter()
+        self.closed = False
+
+    def manifest(self, duration_ms):
+        return {
+            "name": self.name,
+            "file": f"{self.name}.collapsed",
+            "trigger": self.trigger,
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "requests": self.requests,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(duration_ms, 1),
+            "samples": sum(self.stacks.values()),
+            "interval_ms": INTERVAL_SECONDS * 1000,
+            "pid": os.getpid(),
+        }
+
+
+# --- Sampling ---
+_lock = threading.Condition()
+_targets = {} # thread ident -> Profile being filled from that thread
+_window = None # Profile of the open window, if any
+_sampler = None
+_frame_names = {} # code object -> "function (file:line)"
+
+
+def _frame_name(code):
+    name = _frame_names.get(code)
+    if name is None:
+        filename = code.co_filename
+        if filename.startswith(PROJECT_ROOT):
+            filename = os.path.relpath(filename, PROJECT_ROOT)
+        else:
+            filename = "/".join(filename.replace("\\", "/").split("/")[-2:])
+        name = _frame_names[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return name
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def _sample_forever():
+    while True:
+        with _lock:
+            while not _targets:
+                _lock.wait()
+            targets = dict(_targets)
+        frames = sys._current_frames()
+        samples = [(profile, _collapse(frames[ident])) for ident, profile in targets.items() if ident in frames]
+        del frames
+        with _lock:
+            for profile, stack in samples:
+                if not profile.closed:
+                    profile.stacks[stack] += 1
+        time.sleep(INTERVAL_SECONDS)
+
+
+def _track(profile):
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_forever, name="profiler-sampler", daemon=True)
+            _sampler.start()
+        _targets[threading.get_ident()] = profile
+        profile.requests += 1
+        _lock.notify_all()
+
+
+def _untrack():
+    with _lock:
+        return _targets.pop(threading.get_ident(), None)
+
+
+# --- Storage ---
+def save_profile(profile):
+    """Writes the profile's collapsed stacks and manifest, then prunes old profiles. Returns the manifest."""
+    with _lock:
+        profile.closed = True
+        stacks = profile.stacks.most_common()
+    duration_ms = (time.perf_counter() - profile._started) * 1000
+    os.makedirs(PROFILER_DIR, exist_ok=True)
+    manifest = profile.manifest(duration_ms)
+    path = os.path.join(PROFILER_DIR, manifest["file"])
+    with open(path + ".partial", "w", encoding="utf-8") as collapsed:
+        for stack, count in stacks:
+            collapsed.write(f"{stack} {count}\n")
+    os.replace(path + ".partial", path)
+    with open(os.path.join(PROFILER_DIR, f"{profile.name}.json"), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    _prune()
+    return manifest
+
+
+def _prune():
+    manifests = sorted(name for name in os.listdir(PROFILER_DIR) if name.endswith(".json"))
+    for name in manifests[:max(0, len(manifests) - MAX_FILES)]:
+        stem = name[:-len(".json")]
+        for file_name in (name, f"{stem}.collapsed"):
+            try:
+                os.remove(os.path.join(PROFILER_DIR, file_name))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Manifests of the stored profiles, newest first."""
+    if not os.path.isdir(PROFILER_DIR):
+        return []
+    manifests = []
+    for name in os.listdir(PROFILER_DIR):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(PROFILER_DIR, name), encoding="utf-8") as manifest_file:
+                    manifests.append(json.load(manifest_file))
+            except (OSError, ValueError):
+                continue
+    manifests.sort(key=lambda manifest: manifest.get("started_at") or "", reverse=True)
+    return manifests
+
+
+def profile_path(name):
+    """Path of the collapsed stacks of profile name, or None if there is no such profile."""
+    if not name or os.path.basename(name) != name or name.startswith("."):
+        return None
+    path = os.path.join(PROFILER_DIR, f"{name}.collapsed")
+    return path if os.path.isfile(path) else None
+
+
+# --- Windows ---
+def start_window(seconds, endpoint=None):
+    """Profiles every request of this worker (optionally one endpoint) for seconds. Returns the Profile."""
+    global _window
+    with _lock:
+        if _window is not None and not _window.closed:
+            raise RuntimeError(f"A profiling window is already open ({_window.name}).")
+        _window = Profile("window", endpoint=endpoint)
+        window = _window
+    app = current_app._get_current_object()
+    timer = threading.Timer(seconds, _close_window, args=(app, window))
+    timer.daemon = True
+    timer.start()
+    return window
+
+
+def _close_window(app, window):
+    global _window
+    with _lock:
+        if _window is window:
+            _window = None
+        for ident, profile in list(_targets.items()):
+            if profile is window:
+                del _targets[ident]
+    try:
+        manifest = save_profile(window)
+        app.logger.info(f"Profiler: window {window.name} saved ({manifest['samples']} samples, {window.requests} requests).")
+    except Exception as e:
+        app.logger.error(f"Profiler: could not save window {window.name}: {e}", exc_info=True)
+
+
+# --- Flask hooks ---
+def _start_profile():
+    if request.blueprint == "profiler_api":
+        return
+    window = _window
+    if window is not None and not window.closed and window.endpoint in (None, request.endpoint):
+        _track(window)
+        return
+    if request.headers.get("X-Profile") == "1" and is_admin(request):
+        trigger = "header"
+    elif SAMPLE_RATE and (not PROFILED_ENDPOINTS or request.endpoint in PROFILED_ENDPOINTS) \
+            and random.random() < SAMPLE_RATE:
+        trigger = "sample"
+    else:
+        return
+    g.profile = Profile(trigger, endpoint=request.endpoint, method=request.method, path=request.path)
+    _track(g.profile)
+
+
+def _record_status(response):
+    profile = g.get("profile")
+    if profile is not None:
+        profile.status = response.status_code
+        if profile.trigger == "header":
+            response.headers["X-Profile-Name"] = profile.name
+    return response
+
+
+def _finish_profile(exception=None):
+    profile = _untrack()
+    if profile is None or profile is not g.get("profile"):
+        return # Not profiled, or part of a window (saved when the window closes)
+    try:
+        save_profile(profile)
+    except Exception as e:
+        current_app.logger.error(f"Profiler: could not save profile {profile.name}: {e}", exc_info=True)
+
+
+def init_profiler(app):
+    """Registers the request hooks when PROFILER_ENABLED is on."""
+    if not ENABLED:
+        return False
+    app.before_request(_start_profile)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_profile)
+    app.logger.info(f"Profiler on (sample rate {SAMPLE_RATE}, every {INTERVAL_SECONDS * 1000:.0f} ms, files in {PROFILER_DIR}).")
+    return True
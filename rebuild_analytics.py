@@ -0,0 +1,54 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\rebuild_analytics.py
+"""
+Rebuilds the analytics rows from sensor_readings, harvests and nutrient_controllers.
+
+Usage:
+    python rebuild_analytics.py --from 2025-04-01 --to 2025-05-01
+    python rebuild_analytics.py --from 2025-01-01 --to 2026-01-01 --greenhouse 3
+Dates are PH dates, 'to' exclusive. Daily rows in the range are recomputed from the
+raw data; the Monthly and Yearly rows containing them are re-summed from the Daily rows.
+"""
+import sys
+import os
+import argparse
+import traceback
+from datetime import datetime
+
+# --- Project Setup ---
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# --- Flask App and DB ---
+try:
+    from app import app
+    from db import db
+except ImportError as e:
+    print(f"Error importing Flask app or db instance: {e}")
+    sys.exit(1)
+
+from greenhouse_analytics import rebuild_analytics
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild greenhouse analytics for a date range.")
+    parser.add_argument("--from", dest="start", required=True, type=parse_date, help="First PH date to rebuild (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="end", required=True, type=parse_date, help="PH date to stop before (YYYY-MM-DD).")
+    parser.add_argument("--greenhouse", type=int, help="Only rebuild this greenhouse_id.")
+    args = parser.parse_args()
+    if args.start >= args.end:
+        parser.error("--from must be earlier than --to.")
+
+    with app.app_context():
+        try:
+            written = rebuild_analytics(args.start, args.end, greenhouse_id=args.greenhouse)
+            print(f"Rebuilt {written} daily analytics row(s) and the monthly/yearly rows containing them.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rebuilding analytics: {e}")
+            traceback.print_exc()
+            sys.exit(1)
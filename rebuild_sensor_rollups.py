@@ -0,0 +1,58 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\rebuild_sensor_rollups.py
+"""
+Rebuilds sensor_reading_rollups from the raw sensor_readings table.
+
+Usage:
+    python rebuild_sensor_rollups.py                      # everything
+    python rebuild_sensor_rollups.py --from 2025-04-01 --to 2025-05-01
+Dates are PH dates; whole days are rebuilt.
+"""
+import sys
+import os
+import argparse
+import traceback
+from datetime import datetime
+
+import pytz
+
+# --- Project Setup ---
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# --- Flask App and DB ---
+try:
+    from app import app
+    from db import db
+except ImportError as e:
+    print(f"Error importing Flask app or db instance: {e}")
+    sys.exit(1)
+
+from sensor_rollups import rebuild_rollups
+
+PH_TZ = pytz.timezone('Asia/Manila')
+
+
+def parse_ph_date(value):
+    """Parses a YYYY-MM-DD PH date into naive UTC."""
+    if not value:
+        return None
+    local = PH_TZ.localize(datetime.strptime(value, "%Y-%m-%d"))
+    return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild sensor reading rollups from raw readings.")
+    parser.add_argument("--from", dest="start", help="First PH date to rebuild (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="end", help="PH date to stop before (YYYY-MM-DD).")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            total = rebuild_rollups(parse_ph_date(args.start), parse_ph_date(args.end))
+            print(f"Rebuilt rollups from {total} sensor reading(s).")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rebuilding rollups: {e}")
+            traceback.print_exc()
+            sys.exit(1)
@@ -0,0 +1,144 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\request_instrumentation.py
+"""
+Per-request SQL and serialization timing (REQUEST_INSTRUMENTATION, default off).
+
+When enabled, SQLAlchemy cursor events and Flask request hooks record for each
+request the number of statements, their total time, the slowest statement and
+the time spent serializing JSON, and add them to the response as
+
+    Server-Timing: db;dur=41.2;desc="12 queries", db-slowest;dur=18.0;desc="3f9a2c1e", serialize;dur=3.1, app;dur=65.4
+
+db-slowest's desc is a short hash of the slowest statement's text (statement
+text can hold data and is too long for a header). The statement itself is
+logged at DEBUG level with the same hash, once per request, and statements
+slower than SLOW_QUERY_MS (default 500) are logged as warnings with the route
+that ran them. Statements outside a request (scheduler, listener
+threads, CLI scripts) are not counted. When disabled, nothing is registered.
+
+Queries and serialization of streamed responses (exports) happen after the
+headers are sent and are not counted.
+"""
+import hashlib
+import os
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ENABLED = os.environ.get("REQUEST_INSTRUMENTATION", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 500))
+# Longest statement text kept for the slow-query log
+MAX_STATEMENT_CHARS = 1000
+
+_START_KEY = "instrumentation_query_start"
+
+
+class RequestStats:
+    __slots__ = ("started", "query_count", "db_ms", "slowest_ms", "slowest_statement", "serialize_ms")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+        self.serialize_ms = 0.0
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        slowest = f';desc="{statement_hash(self.slowest_statement)}"' if self.slowest_statement else ""
+        return (f'db;dur={self.db_ms:.1f};desc="{self.query_count} queries", '
+                f'db-slowest;dur={self.slowest_ms:.1f}{slowest}, serialize;dur={self.serialize_ms:.1f}, '
+                f'app;dur={self.elapsed_ms():.1f}')
+
+
+def statement_hash(statement):
+    """Short hash of a statement's text (whitespace-insensitive), to match Server-Timing with the logs."""
+    return hashlib.sha1(" ".join(statement.split()).encode("utf-8")).hexdigest()[:8]
+
+
+def request_stats():
+    """The current request's RequestStats, or None (disabled or outside a request)."""
+    return g.get("request_stats") if has_request_context() else None
+
+
+def route_name():
+    return request.url_rule.rule if request.url_rule else request.path
+
+
+# --- SQLAlchemy events ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats = request_stats()
+    if stats is None:
+        return
+    stats.query_count += 1
+    stats.db_ms += elapsed_ms
+    if elapsed_ms > stats.slowest_ms:
+        stats.slowest_ms, stats.slowest_statement = elapsed_ms, statement
+    if elapsed_ms >= SLOW_QUERY_MS:
+        current_app.logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {statement_hash(statement)}) in "
+                                   f"{request.method} {route_name()}: {' '.join(statement.split())[:MAX_STATEMENT_CHARS]}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_KEY):
+        connection.info[_START_KEY].pop()
+
+
+# --- JSON serialization ---
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, adding the time spent in dumps() to the request's stats."""
+
+    def dumps(self, obj, **kwargs):
+        stats = request_stats()
+        if stats is None:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats.serialize_ms += (time.perf_counter() - started) * 1000
+
+
+# --- Flask hooks ---
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _add_server_timing(response):
+    stats = request_stats()
+    if stats is not None:
+        response.headers["Server-Timing"] = stats.server_timing()
+        if stats.slowest_statement:
+            current_app.logger.debug(
+                f"Slowest query ({stats.slowest_ms:.1f} ms, {statement_hash(stats.slowest_statement)}) in "
+                f"{request.method} {route_name()}: {' '.join(stats.slowest_statement.split())[:MAX_STATEMENT_CHARS]}")
+    return response
+
+
+def init_request_instrumentation(app):
+    """Registers the engine events and request hooks when REQUEST_INSTRUMENTATION is on."""
+    if not ENABLED:
+        return False
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_request)
+    app.after_request(_add_server_timing)
+    app.logger.info(f"Request instrumentation on (slow query threshold {SLOW_QUERY_MS:.0f} ms).")
+    return True
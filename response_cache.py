@@ -0,0 +1,348 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\response_cache.py
+"""
+Read-through cache for GET endpoints that are read far more often than they change.
+
+    @greenhouses_api.get("/greenhouses")
+    @cached("greenhouses")
+    def greenhouses_data(): ...
+
+Entries are keyed by route path, normalized query args and the current version
+of each entity tag the route depends on. Invalidating a tag bumps its version,
+so every entry built from the old version is simply never read again (and ages
+out of the LRU or expires in Redis). Only 200 responses to requests with the
+valid x-api-key are cached; anything else goes straight to the view.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- 'lru' (default): per process, RESPONSE_CACHE_MAX_ENTRIES entries;
+- 'redis': shared, at RESPONSE_CACHE_URL (any Redis-compatible server; needs the
+  redis package, falls back to 'lru' without it);
+- 'off': disabled.
+
+Invalidation:
+- any POST/PUT/PATCH/DELETE handled by a blueprint registered with
+  invalidate_on_mutation() bumps that blueprint's tags;
+- any committed transaction that wrote rows of a model registered with
+  invalidate_on_write() bumps that model's tags, whichever blueprint, job or
+  script wrote them (e.g. /admin/activate changing Users);
+- outbox NOTIFY events (change_hub.py) bump the tags in CHANNEL_TAGS, which
+  covers writes made through other blueprints (e.g. a harvest updating its
+  planted crop);
+- with the LRU backend, local invalidations are also sent on
+  CACHE_NOTIFY_CHANNEL so the other worker processes drop their entries.
+Hit/miss counters: snapshot_stats(), GET /response-cache/stats, X-Cache header.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from notifications import send_notification
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 1000
+CACHE_NOTIFY_CHANNEL = "response_cache_invalidations"
+LISTENER_RETRY_SECONDS = 30
+
+# Outbox channel -> tags it invalidates
+CHANNEL_TAGS = {
+    "planted_crops_updates": ("planted_crops",),
+    "inventory_container_updates": ("inventory_container",),
+    "hardware_components_updates": ("hardware_components",),
+    "hardware_status_updates": ("hardware_components",),
+}
+
+# Model -> tags its rows are served under (see invalidate_on_write)
+MODEL_TAGS = {}
+_PENDING_TAGS_KEY = "response_cache_pending_tags"
+_COMMITTED_TAGS_KEY = "response_cache_committed_tags"
+
+
+class LRUBackend:
+    """In-process LRU with per-entry expiry; tag versions are process-local too."""
+
+    shared = False
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (expires_at monotonic, value)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisBackend:
+    """Entries and tag versions in Redis, shared by every process."""
+
+    shared = True
+    PREFIX = "agreemo:response_cache:"
+
+    def __init__(self, url):
+        import redis # Optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self.client.get(self.PREFIX + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.PREFIX + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def versions(self, tags):
+        values = self.client.mget([f"{self.PREFIX}tag:{tag}" for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f"{self.PREFIX}tag:{tag}")
+        pipeline.execute()
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "errors": 0}
+        self.route_stats = {} # route -> {"hits", "misses"}
+
+    def _count(self, name, route=None):
+        with self._lock:
+            self.stats[name] += 1
+            if route is not None:
+                counts = self.route_stats.setdefault(route, {"hits": 0, "misses": 0})
+                counts[name] += 1
+
+    @staticmethod
+    def normalized_args(args):
+        """Query args sorted by name and value, so ?b=1&a=2 and ?a=2&b=1 share an entry."""
+        return urlencode(sorted((name, value) for name, values in args.lists() for value in values
+                                if name != "api_key"))
+
+    def key_for(self, path, args, tags):
+        versions = self.backend.versions(tags)
+        return f"{path}?{self.normalized_args(args)}#" + ",".join(f"{tag}.{version}" for tag, version in zip(tags, versions))
+
+    def lookup(self, key, route):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            current_app.logger.warning(f"Response cache read failed: {e}")
+            return None
+        self._count("hits" if value is not None else "misses", route)
+        return value
+
+    def store(self, key, response):
+        try:
+            self.backend.set(key, {"status": response.status_code, "mimetype": response.mimetype,
+                                   "body": response.get_data(as_text=True)}, self.ttl_seconds)
+            self._count("stores")
+        except Exception as e:
+            self._count("errors")
+            current_app.logger.warning(f"Response cache write failed: {e}")
+
+    def invalidate(self, tags, broadcast=True):
+        """Bumps tags. broadcast also tells the other processes (LRU backend only)."""
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        try:
+            self.backend.bump(tags)
+        except Exception as e:
+            self._count("errors")
+            current_app.logger.error(f"Response cache invalidation of {tags} failed: {e}")
+            return
+        with self._lock:
+            self.stats["invalidations"] += len(tags)
+        if broadcast and not self.backend.shared:
+            for tag in tags:
+                send_notification(CACHE_NOTIFY_CHANNEL, {
+                    "channel": CACHE_NOTIFY_CHANNEL, "entity_type": "response_cache", "entity_id": tag,
+                    "action": "invalidate", "event_id": None, "payload": {"tags": [tag], "pid": os.getpid()},
+                })
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats, routes={route: dict(counts) for route, counts in self.route_stats.items()})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["backend"] = type(self.backend).__name__
+        stats["entries"] = self.backend.size()
+        return stats
+
+
+def get_response_cache():
+    return current_app.extensions.get('response_cache')
+
+
+def cached(*tags):
+    """Caches the 200 responses of a GET view under tags (see module docstring)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            # Unauthorised requests always reach the view, which rejects them
+            if cache is None or request.method != "GET" or request.headers.get("x-api-key") != os.environ.get("API_KEY"):
+                return view(*args, **kwargs)
+            route = request.url_rule.rule if request.url_rule else request.path
+            key = cache.key_for(request.path, request.args, tags)
+            entry = cache.lookup(key, route)
+            if entry is not None:
+                response = Response(entry["body"], status=entry["status"], mimetype=entry["mimetype"])
+                response.headers["X-Cache"] = "HIT"
+                return response
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.store(key, response)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_on_mutation(blueprint, *tags):
+    """Invalidates tags after every POST/PUT/PATCH/DELETE request handled by blueprint."""
+    @blueprint.after_request
+    def _invalidate_response_cache(response):
+        cache = get_response_cache()
+        if cache is not None and request.method in ("POST", "PUT", "PATCH", "DELETE"):
+            # Failed requests too: some still write (e.g. failed login counters)
+            cache.invalidate(tags)
+        return response
+    return blueprint
+
+
+def invalidate_on_write(model, *tags):
+    """Invalidates tags after every committed transaction that inserted, updated or deleted model rows."""
+    MODEL_TAGS.setdefault(model, set()).update(tags)
+    return model
+
+
+# --- Invalidation from session commits ---
+def _pending_tags(session):
+    return session.info.setdefault(_PENDING_TAGS_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tags(session, flush_context):
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        tags = MODEL_TAGS.get(type(instance))
+        if tags:
+            _pending_tags(session).update(tags)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tags(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    tags = MODEL_TAGS.get(mapper.class_) if mapper is not None else None
+    if tags:
+        _pending_tags(orm_execute_state.session).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _keep_committed_tags(session):
+    tags = session.info.pop(_PENDING_TAGS_KEY, None)
+    if tags:
+        session.info.setdefault(_COMMITTED_TAGS_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _invalidate_committed_tags(session, transaction):
+    if transaction.parent is not None:
+        return
+    session.info.pop(_PENDING_TAGS_KEY, None) # Rolled back
+    tags = session.info.pop(_COMMITTED_TAGS_KEY, None)
+    # After the transaction has ended, so the broadcast NOTIFY is not queued on it
+    cache = get_response_cache() if tags and has_app_context() else None
+    if cache is not None:
+        cache.invalidate(tags)
+
+
+# --- Invalidation from NOTIFY ---
+def _listen_for_changes(app, cache):
+    from change_hub import get_change_hub
+    while True:
+        try:
+            subscription = get_change_hub(app).subscribe(list(CHANNEL_TAGS) + [CACHE_NOTIFY_CHANNEL])
+            while not subscription.closed:
+                tags = set()
+                for change in subscription.get(timeout=30):
+                    if change["channel"] == CACHE_NOTIFY_CHANNEL:
+                        if (change.get("payload") or {}).get("pid") != os.getpid():
+                            tags.update(change["payload"].get("tags") or [])
+                    else:
+                        tags.update(CHANNEL_TAGS.get(change["channel"], ()))
+                if tags:
+                    with app.app_context():
+                        cache.invalidate(tags, broadcast=False)
+            return
+        except Exception as e:
+            app.logger.error(f"Response cache: change listener failed, retrying in {LISTENER_RETRY_SECONDS}s: {e}")
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+
+def init_response_cache(app):
+    """Creates the cache (app.extensions['response_cache']) and starts its NOTIFY listener."""
+    backend_name = os.environ.get("RESPONSE_CACHE_BACKEND", "lru").lower()
+    if backend_name == "off":
+        return None
+    backend = None
+    if backend_name == "redis":
+        try:
+            backend = RedisBackend(os.environ.get("RESPONSE_CACHE_URL", "redis://localhost:6379/0"))
+        except ImportError:
+            app.logger.warning("Response cache: the redis package is not installed; using the in-process LRU.")
+    if backend is None:
+        backend = LRUBackend(int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+    cache = ResponseCache(backend, float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+    app.extensions['response_cache'] = cache
+
+    from change_hub import listen_on
+    listen_on(CACHE_NOTIFY_CHANNEL)
+    listener = threading.Thread(target=_listen_for_changes, args=(app, cache), name="response-cache-invalidation", daemon=True)
+    listener.start()
+    return cache
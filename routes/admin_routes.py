@@ -4,6 +4,7 @@ import pytz
 from flask import Blueprint, request, jsonify, render_template
 from flask_login import logout_user  # Although imported, it isn't directly used in this admin context.
 from db import db
+from metrics import SMTP_SEND_SECONDS, observe
 from functions import log_activity
 from models import AdminUser, Users
 from forms import ChangePasswordForm
@@ -161,7 +162,7 @@ def send_login_attempt_notification(email, username, reset_token):
     msg['To'] = email
 
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        with observe(SMTP_SEND_SECONDS, purpose="admin_login_attempt"), smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
             server.login(MY_EMAIL, MY_PASSWORD)
             server.sendmail(MY_EMAIL, [email], msg.as_string())
@@ -466,7 +467,7 @@ def send_reset_email(email, reset_token, name):
     msg['To'] = email
 
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        with observe(SMTP_SEND_SECONDS, purpose="admin_password_reset"), smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
             server.login(MY_EMAIL, MY_PASSWORD)
             server.sendmail(MY_EMAIL, [email], msg.as_string())
@@ -0,0 +1,87 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\analytics_routes.py
+import os
+from datetime import datetime
+
+import pytz
+from flask import Blueprint, request, jsonify, current_app
+
+from sales_analytics import SummaryQueryError, parse_summary_args, summarize
+from greenhouse_analytics import PERIODS, analytics_row
+
+analytics_api = Blueprint("analytics_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+PH_TZ = pytz.timezone('Asia/Manila')
+
+
+def check_api_key(request):
+    """Checks if the provided API key in the header is valid."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY:
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
+    return None
+
+
+@analytics_api.get("/analytics/summary")
+def get_analytics_summary():
+    """
+    Yield, rejection and sales totals grouped in the database, e.g.
+    /analytics/summary?group_by=month&from=2025-01-01&to=2026-01-01
+    Query params: group_by (greenhouse, plant, day, month; required), from, to
+    (YYYY-MM-DD, 'to' exclusive), greenhouse_id.
+    """
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+    try:
+        group_by, start, end, greenhouse_id = parse_summary_args(request.args)
+        rows, totals = summarize(group_by, start, end, greenhouse_id)
+        return jsonify(group_by=group_by, summary=rows, totals=totals, count=len(rows)), 200
+    except SummaryQueryError as e:
+        return jsonify(error={"message": "Validation failed.", "details": e.details}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error computing analytics summary: {e}", exc_info=True)
+        return jsonify(error={"message": "Internal server error."}), 500
+
+
+def serialize_analytics(analytics):
+    return {
+        "analytics_id": analytics.analytics_id,
+        "greenhouse_id": analytics.greenhouse_id,
+        "period": analytics.period,
+        "period_start": analytics.period_start.isoformat(),
+        "average_ph": analytics.average_ph,
+        "average_temperature": analytics.average_temperature,
+        "yield_prediction": analytics.yield_prediction,
+        "sensor_activations": analytics.sensor_activations,
+        "ph_readings": analytics.ph_count,
+        "temperature_readings": analytics.temperature_count,
+    }
+
+
+@analytics_api.get("/analytics/<int:greenhouse_id>")
+def get_greenhouse_analytics(greenhouse_id):
+    """
+    The analytics row of one greenhouse for one period, e.g. /analytics/3?period=Monthly&date=2025-04-15
+    Query params: period (Daily, Monthly, Yearly; default Daily), date (YYYY-MM-DD, PH; default today).
+    """
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+    period = (request.args.get("period") or "Daily").strip().capitalize()
+    errors = {}
+    if period not in PERIODS:
+        errors["period"] = f"Must be one of: {', '.join(PERIODS)}."
+    try:
+        day = datetime.strptime(request.args["date"], "%Y-%m-%d").date() if request.args.get("date") \
+            else datetime.now(PH_TZ).date()
+    except ValueError:
+        errors["date"] = "Invalid date. Use YYYY-MM-DD."
+    if errors:
+        return jsonify(error={"message": "Validation failed.", "details": errors}), 400
+    try:
+        analytics = analytics_row(greenhouse_id, period, day)
+        if analytics is None:
+            return jsonify(error={"message": f"No {period.lower()} analytics for greenhouse {greenhouse_id} on {day.isoformat()}."}), 404
+        return jsonify(analytics=serialize_analytics(analytics)), 200
+    except Exception as e:
+        current_app.logger.error(f"Error fetching analytics for greenhouse {greenhouse_id}: {e}", exc_info=True)
+        return jsonify(error={"message": "Internal server error."}), 500
@@ -0,0 +1,61 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\audit_routes.py
+import os
+import pytz
+from flask import Blueprint, request, jsonify, current_app
+
+from activity_log_queries import LogQueryError
+from audit_log import query_audit_events
+
+audit_api = Blueprint("audit_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+PH_TZ = pytz.timezone('Asia/Manila')
+
+
+def check_api_key(request):
+    """Checks if the provided API key in the header is valid."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY:
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
+    return None
+
+
+def format_datetime(dt):
+    """Formats datetime to YYYY-MM-DD HH:MM:SS AM/PM in PH time (naive values are PH time)."""
+    if not dt: return None
+    aware_dt = PH_TZ.localize(dt) if dt.tzinfo is None else dt.astimezone(PH_TZ)
+    return aware_dt.strftime("%Y-%m-%d %I:%M:%S %p")
+
+
+def serialize_audit_event(audit_event):
+    return {
+        "event_id": audit_event.event_id,
+        "entity_type": audit_event.entity_type,
+        "entity_id": audit_event.entity_id,
+        "actor_type": audit_event.actor_type,
+        "actor_id": audit_event.actor_id,
+        "greenhouse_id": audit_event.greenhouse_id,
+        "occurred_at": format_datetime(audit_event.occurred_at),
+        "description": audit_event.description,
+        "data": audit_event.payload,
+    }
+
+
+@audit_api.get("/audit_events")
+def get_audit_events():
+    """
+    Activity-log entries of every type, newest first, from audit_events.
+    Query params: entity_type (comma-separated log types, e.g. harvest,sale), user_id,
+    greenhouse_id, entity_id, from, to (YYYY-MM-DD or ISO, PH time when naive), limit, cursor.
+    """
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+    try:
+        events, next_cursor = query_audit_events(request.args)
+        data = [serialize_audit_event(audit_event) for audit_event in events]
+        return jsonify(audit_events=data, count=len(data), next_cursor=next_cursor), 200
+    except LogQueryError as e:
+        return jsonify(error={"message": "Validation failed.", "details": e.details}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error listing audit events: {e}", exc_info=True)
+        return jsonify(error={"message": "Internal server error."}), 500
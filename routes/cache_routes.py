@@ -0,0 +1,28 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\cache_routes.py
+import os
+from flask import Blueprint, request, jsonify
+
+from response_cache import get_response_cache
+
+cache_api = Blueprint("cache_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+
+
+def check_api_key(request):
+    """Checks if the provided API key in the header is valid."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY:
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
+    return None
+
+
+@cache_api.get("/response-cache/stats")
+def get_response_cache_stats():
+    """Hit/miss counters of this process's response cache (response_cache.py)."""
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+    cache = get_response_cache()
+    if cache is None:
+        return jsonify(enabled=False), 200
+    return jsonify(enabled=True, stats=cache.snapshot_stats()), 200
@@ -12,6 +12,8 @@ import pytz  # Import pytz
 from models.activity_logs.control_activity_logs_model import ControlActivityLogs
 # If using SQLAlchemy for logs, ensure db is imported from your app's db setup
 from db import db as sqlalchemy_db
+from latest_values_cache import latest_values
+from activity_log_writer import write_log
 
 
 control_api = Blueprint("control_api", __name__)
@@ -54,17 +56,17 @@ def format_datetime(dt):
 def log_control_change_db(pump1=None, pump2=None, exhaust=None, automode=None, description="Control values updated"):
     """Logs control changes to the PostgreSQL database via SQLAlchemy."""
     try:
-        # Assuming ControlActivityLogs uses default timestamp
-        log_entry = ControlActivityLogs(
+        # Buffered when ACTIVITY_LOG_MODE=buffered (activity_log_writer.py); log_date is set here
+        # so a queued row keeps the time of the change, not the time it is written
+        write_log(
+            ControlActivityLogs,
             pump1=pump1,
             pump2=pump2,
             exhaust=exhaust,
             automode=automode,
-            logs_description=description
-            # log_date will use the default defined in the model
+            logs_description=description,
+            log_date=datetime.now(PH_TZ).replace(tzinfo=None)
         )
-        sqlalchemy_db.session.add(log_entry)
-        sqlalchemy_db.session.commit() # Commit immediately for logging? Or handle in caller?
         if current_app:
             current_app.logger.info(f"Control change logged: {description}")
     except Exception as e:
@@ -80,9 +82,10 @@ def get_control():
         if api_key_header != API_KEY:
             return jsonify(error={"Not Authorised": "Invalid API Key"}), 403
 
-        # Reference the specific path in Firebase RTDB
-        ref = db.reference("pumpControl") # Or the correct path for your control data
-        pump_data = ref.get()
+        # Served from the listener-fed cache; Firebase is only read when it is cold or stale
+        pump_data, updated_at, cache_age, source = latest_values.get_or_fetch(
+            "pumpControl", lambda: db.reference("pumpControl").get()
+        )
 
         if pump_data is None:
             # It's better to return 200 OK with a message/empty object if data not existing isn't an error
@@ -93,9 +96,13 @@ def get_control():
 
         # Log successful retrieval
         if current_app:
-            current_app.logger.info("Successfully retrieved control data from Firebase.")
+            current_app.logger.debug(f"Served control data from {source} (age {cache_age:.3f}s).")
 
-        return jsonify(pump_data), 200
+        response = jsonify(pump_data)
+        # Body shape is unchanged for existing clients; staleness is reported in headers
+        response.headers["X-Cache-Source"] = source
+        response.headers["X-Cache-Age"] = f"{cache_age:.3f}"
+        return response, 200
 
     except Exception as e:
         # Log the error
@@ -190,6 +197,7 @@ def update_control():
 
         # --- Update Firebase ---
         ref.update(update_payload)
+        latest_values.apply_update("pumpControl", update_payload)
         if current_app:
             current_app.logger.info(f"Firebase control data updated: {update_payload}")
 
@@ -0,0 +1,46 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\dashboard_routes.py
+import os
+from flask import Blueprint, request, jsonify, current_app
+
+from db import db
+from models.dashboard_snapshot_model import DashboardSnapshot
+from dashboard_snapshots import refresh_snapshot
+
+dashboard_api = Blueprint("dashboard_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+
+
+def check_api_key(request):
+    """Checks if the provided API key in the header is valid."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY:
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
+    return None
+
+
+@dashboard_api.get("/dashboard/<int:greenhouse_id>")
+def get_dashboard(greenhouse_id):
+    """
+    The precomputed dashboard of one greenhouse (dashboard_snapshots.py), with an ETag.
+    Send it back as If-None-Match to get 304 Not Modified while the dashboard is unchanged.
+    """
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+    try:
+        snapshot = db.session.get(DashboardSnapshot, greenhouse_id)
+        if snapshot is None:
+            # First request before the scheduler got to this greenhouse
+            snapshot = refresh_snapshot(greenhouse_id)
+            if snapshot is None:
+                return jsonify(error={"message": f"Greenhouse with ID {greenhouse_id} not found."}), 404
+        response = jsonify(dashboard=snapshot.payload, refreshed_at=snapshot.refreshed_at.isoformat(),
+                           changed_at=snapshot.changed_at.isoformat())
+        # Weak: the body also carries refreshed_at, which moves on every refresh while the dashboard (and etag) stays
+        response.set_etag(snapshot.etag, weak=True)
+        response.headers["Cache-Control"] = "no-cache" # Cache, but revalidate with the ETag every time
+        return response.make_conditional(request)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error fetching dashboard for greenhouse {greenhouse_id}: {e}", exc_info=True)
+        return jsonify(error={"message": "Internal server error."}), 500
@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from itsdangerous import URLSafeTimedSerializer
 
 from db import db
+from metrics import SMTP_SEND_SECONDS, observe
 from models import Users, StoredEmail
 
 email_sender_api = Blueprint("email_sender_api", __name__)
@@ -89,7 +90,7 @@ def send_email(email):
 
     # Connect to the SMTP server and send the email
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        with observe(SMTP_SEND_SECONDS, purpose="email_sender"), smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
             server.login(MY_EMAIL, MY_PASSWORD)
             server.sendmail(MY_EMAIL, [email], msg.as_string())
@@ -3,6 +3,7 @@ import os
 import pytz
 from flask import Blueprint, request, jsonify, current_app # Import current_app for logging
 from db import db
+from response_cache import cached, invalidate_on_mutation, invalidate_on_write
 # Removed unused 'functions' import if 'log_activity' isn't used directly here
 from models import ( # Consolidate model imports
     Greenhouse, Users, Harvest, ReasonForRejection,
@@ -23,6 +24,8 @@ from models.activity_logs.rejection_activity_logs_model import RejectionActivity
 # UserActivityLogs might not be directly needed here unless logging user actions *on users*
 
 greenhouses_api = Blueprint("greenhouses_api", __name__)
+invalidate_on_mutation(greenhouses_api, "greenhouses")
+invalidate_on_write(Greenhouse, "greenhouses") # Writes from other blueprints and jobs too
 
 API_KEY = os.environ.get("API_KEY")
 PH_TZ = pytz.timezone('Asia/Manila') # Define timezone
@@ -74,6 +77,7 @@ def log_greenhouse_activity(user_id, greenhouse_id, description):
 
 # GET all data
 @greenhouses_api.get("/greenhouses")
+@cached("greenhouses")
 def greenhouses_data():
     try:
         api_key_header = request.headers.get("x-api-key")
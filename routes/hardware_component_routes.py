@@ -5,45 +5,22 @@ import pytz
 from flask import Blueprint, request, jsonify, current_app  # Import current_app
 from datetime import datetime # Keep only one datetime import
 from db import db
+from response_cache import cached, invalidate_on_mutation, invalidate_on_write
 from functions import log_activity # Assuming this function exists elsewhere if needed
 from models import HardwareComponents, Greenhouse, Users
 from models.activity_logs.hardware_components_activity_logs_model import HardwareComponentActivityLogs
 from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs # Keep if used elsewhere
-import psycopg2  # import
-import json  # import
+from notifications import send_notification
 
 
 hardware_components_api = Blueprint("hardware_components_api", __name__)
+invalidate_on_mutation(hardware_components_api, "hardware_components")
+invalidate_on_write(HardwareComponents, "hardware_components") # Writes from other blueprints and jobs too
 
 API_KEY = os.environ.get("API_KEY")
 
-# Create method trigger:
-def send_hardware_component_notification(payload):  # Pass to trigger new change
-    db_uri = current_app.config['SQLALCHEMY_DATABASE_URI']  # Config
-    try:
-        conn = psycopg2.connect(db_uri)  # new Connection.
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:  # Handle by with wrapper for the cursor.
-            curs.execute(f"NOTIFY hardware_components_updates, %s;", (json.dumps(payload),))  # Trigger New Change
-        conn.close()  # CLose Connectino
-    except psycopg2.Error as e:  # Error checking
-        print(f"Sending hardware component notification error : {e}") # Corrected print message
-
-#Added send method for hardware_components : Listener name consistent on Postgrest  Channel. postgress. Listen/notification channel,. logs: name
-def send_hardware_components_logs_notification(payload):  # Add method `notificaton logs table:., harvest activity changes ,/sent and: callback,. to listen,.: using instances , harvest
-    """Sends a notification for hardware components activity log updates."""
-    db_uri = current_app.config['SQLALCHEMY_DATABASE_URI'] # sent and make it and harvest activity changes., in table: data : `changes in logs, sent.
-    try:  # try/except/ Best Handling /Exceptions,.. database connection or related : , check issue,. problems./ checking via,. checking if error issue logs ` and other bugs report.`.,`
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:#,. Create : and Cursor is `Wrapper in with, ` statment it, safe /clean: to call. safely, on cursor best  in method rather use outside ,best practice/better
-            curs.execute(f"NOTIFY hardware_components_logs_updates, %s;", (json.dumps(payload),)) # Trigger the NOtifiy
-        conn.close() # Close connection , close if after,. ` trigger/ sent update data,. using: postgrest socket: ` : changes: record and
-
-    except psycopg2.Error as e:# Exception handling. and catch connection issue /etc,..  and: error raise to this Logs debuggs and debugging via check issue., . ` related /error/. problems
-        print(f"Error sending hardware components activity log notification: {e}")#logs report during trigger connection issues..
-
 @hardware_components_api.get("/hardware_components")
+@cached("hardware_components")
 def hardware_component_data():
     try:
         api_key_header = request.headers.get("x-api-key")
@@ -144,14 +121,14 @@ def hardware_components_add():
 
             # --- Send Notifications (After successful commit) --- #
             try:
-                send_hardware_component_notification({
+                send_notification('hardware_components_updates', {
                     "action": "insert",
                     "component_id": new_hardware_components.component_id,
                      # Optionally include more data if needed by listeners
                     "componentName": componentName,
                     "greenhouse_id": greenhouse_id
                 })
-                send_hardware_components_logs_notification({
+                send_notification('hardware_components_logs_updates', {
                      "action": "insert",
                      "log_id": new_hardware_components_activity_logs.log_id,
                      # Optionally include more data
@@ -216,13 +193,13 @@ def delete_hardware_component(component_id):
 
         # 6. Send Notification (After successful commit)
         try:
-            send_hardware_component_notification({
+            send_notification('hardware_components_updates', {
                 "action": "delete",
                 "component_id": component_id,
                 "componentName": deleted_component_name # Send name for context
             })
             # Optional: Notify about log deletion? Usually not needed unless specifically required.
-            # send_hardware_components_logs_notification({
+            # send_notification('hardware_components_logs_updates', {
             #     "action": "delete_bulk",
             #     "component_id": component_id,
             #     "deleted_count": logs_deleted_count
@@ -2,33 +2,19 @@
 import datetime
 import os
 from datetime import datetime, timezone
-from flask import Blueprint, request, jsonify, current_app  # Import current_app
+from flask import Blueprint, request, jsonify
 from datetime import datetime
 from db import db
 import pytz
 from functions import log_activity
 from models import HardwareCurrentStatus, Greenhouse, HardwareComponents
 from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
-import psycopg2  # Import
-import json  # Import
+from notifications import send_notification
 
 hardware_status_api = Blueprint("hardware_status_api", __name__)
 
 API_KEY = os.environ.get("API_KEY")
 
-
-# --Trigger new method, update changes to database
-def send_hardware_status_notification(payload): #add
-    db_uri = current_app.config['SQLALCHEMY_DATABASE_URI'] # get db uri
-    try:#Error Checking best
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:  # curs wrapper to the try catch block.
-            curs.execute(f"NOTIFY hardware_status_updates, %s;", (json.dumps(payload),))# Trigger notifications.
-        conn.close() # Close connect.
-    except psycopg2.Error as e:#If Error exception handle.
-        print(f"Failed and Issue :  {e}") #print the logs.
-
 @hardware_status_api.get("/hardware_status")
 def hardware_status_data():
     try:
@@ -145,7 +131,7 @@ def hardware_status_add():
         db.session.commit()#commit chanes
 
 
-        send_hardware_status_notification({#sends new hardware trigger notifications.
+        send_notification('hardware_status_updates', {#sends new hardware trigger notifications.
              "action":"insert",# set and Pass Action
              "component_id": component_id# component id new updates.
          })
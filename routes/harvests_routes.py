@@ -27,8 +27,9 @@ except ImportError:
 
 from datetime import datetime, date
 import pytz
-import psycopg2 # For sending NOTIFY commands
-import json
+from notifications import send_notification
+from export import requested_export_format, stream_export
+from conditional_get import collection_etag
 from sqlalchemy.exc import IntegrityError, DataError
 from sqlalchemy import func
 from decimal import Decimal, InvalidOperation # Keep if needed elsewhere, though update uses float
@@ -99,37 +100,6 @@ def format_datetime(dt):
         current_app.logger.error(f"Error formatting date/datetime {dt}: {e}", exc_info=True)
         return str(dt) # Fallback on error
 
-def send_notification(channel, payload):
-    """Sends a notification payload to a specified PostgreSQL NOTIFY channel."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error(f"Database URI not configured. Cannot send notification to channel '{channel}'.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            # Ensure payload is serializable to JSON, using default=str for robustness
-            json_payload = json.dumps(payload, default=str)
-             # Ensure channel name is safe (basic validation)
-            if not channel.isalnum() and '_' not in channel:
-                 current_app.logger.error(f"Invalid channel name attempted: {channel}")
-                 conn.close() # Close connection before returning
-                 return
-            curs.execute(f"NOTIFY {channel}, %s;", (json_payload,))
-        conn.close()
-        current_app.logger.info(f"Sent notification to channel '{channel}'. Payload: {json_payload}")
-    except psycopg2.Error as db_err:
-        current_app.logger.error(f"Database error sending notification to channel '{channel}': {db_err}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close() # Ensure connection is closed on error
-    except TypeError as json_err:
-         current_app.logger.error(f"JSON serialization error for notification payload to channel '{channel}': {json_err}. Payload: {payload}", exc_info=True)
-         if 'conn' in locals() and conn: conn.close() # Ensure connection is closed on error
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error sending notification to channel '{channel}': {e}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close() # Ensure connection is closed on error
-
-
 def log_harvest_activity(user_id_to_log, harvest_id, description):
     """Creates and adds a harvest activity log (linked to users.user_id), sends notification."""
     if user_id_to_log is None:
@@ -443,7 +413,47 @@ def add_harvest():
 
 
 # --- GET /harvests (Read All or Filtered) ---
+def serialize_harvest_row(row):
+    """Response dict for one (Harvest, first_name, last_name) row of GET /harvests."""
+    h, user_first_name, user_last_name = row
+    # Get related data, handling potential None values
+    plant_planting_date = h.planted_crops.planting_date if h.planted_crops else None
+    plant_name = h.plant_name
+    # Fallback if plant_name wasn't stored on the harvest record itself
+    if not plant_name and h.planted_crops:
+        plant_name = h.planted_crops.plant_name
+
+    # Construct harvester name safely
+    harvester_name_val = f"{user_first_name or ''} {user_last_name or ''}".strip()
+    if not harvester_name_val: harvester_name_val = "Unknown User" # Handle case where user might be deleted or null
+
+    return {
+        "harvest_id": h.harvest_id,
+        "user_id": h.user_id,
+        # "harvester_name": harvester_name_val, # REMOVED this field as per desired output
+        "greenhouse_id": h.greenhouse_id,
+        # "greenhouse_name": gh_name, # REMOVED
+        "plant_id": h.plant_id,
+        "plant_name": plant_name,
+        "planted_crop_planting_date": format_datetime(plant_planting_date),
+        # *** Assign harvester_name_val to the 'name' key ***
+        "name": harvester_name_val, # Represents the harvester's name now
+        # *** END CHANGE ***
+        "plant_type": h.plant_type,
+        "total_yield": h.total_yield,
+        "accepted": h.accepted,
+        "total_rejected": h.total_rejected,
+        "price": format_price(h.price),
+        "total_price": format_price(h.total_price),
+        "harvest_date": format_datetime(h.harvest_date),
+        "notes": h.notes,
+        "status": h.status,
+        "last_updated": format_datetime(h.last_updated)
+    }
+
+
 @harvests_api.get("/harvests")
+@collection_etag(Harvest.last_updated, PlantedCrops.updated_at)
 def get_all_harvests():
     """
     Retrieves a list of harvest records. Supports filtering by greenhouse_id and plant_id.
@@ -451,9 +461,14 @@ def get_all_harvests():
     last_updated timestamp (formatted to PH time).
     The 'name' field in the response represents the name of the user who recorded the harvest.
     Does NOT include greenhouse_name.
+    ?format=ndjson or ?format=csv streams the same rows as an export.
     """
     api_key_error = check_api_key(request)
     if api_key_error: return api_key_error
+    try:
+        export_format = requested_export_format(request.args)
+    except ValueError as e:
+        return jsonify(error={"message": str(e)}), 400
     try:
         gh_id_filter = request.args.get('greenhouse_id', type=int)
         plant_id_filter = request.args.get('plant_id', type=int)
@@ -476,12 +491,15 @@ def get_all_harvests():
         if plant_id_filter:
             query = query.filter(Harvest.plant_id == plant_id_filter)
 
-        # Execute query, order results
-        harvest_results = query.order_by(
+        # Order results
+        query = query.order_by(
             Harvest.harvest_date.desc(),
             Harvest.last_updated.desc(),
             Harvest.harvest_id.desc()
-        ).all()
+        )
+        if export_format:
+            return stream_export(query, serialize_harvest_row, export_format, "harvests")
+        harvest_results = query.all()
 
         status_code = 200
         count = len(harvest_results)
@@ -489,42 +507,7 @@ def get_all_harvests():
         if count == 0:
             message = "No harvests found matching the specified criteria." if (gh_id_filter or plant_id_filter) else "No harvests found in the system."
 
-        result_list = []
-        for h, user_first_name, user_last_name in harvest_results:
-            # Get related data, handling potential None values
-            plant_planting_date = h.planted_crops.planting_date if h.planted_crops else None
-            plant_name = h.plant_name
-            # Fallback if plant_name wasn't stored on the harvest record itself
-            if not plant_name and h.planted_crops:
-                plant_name = h.planted_crops.plant_name
-
-            # Construct harvester name safely
-            harvester_name_val = f"{user_first_name or ''} {user_last_name or ''}".strip()
-            if not harvester_name_val: harvester_name_val = "Unknown User" # Handle case where user might be deleted or null
-
-            result_list.append({
-                "harvest_id": h.harvest_id,
-                "user_id": h.user_id,
-                # "harvester_name": harvester_name_val, # REMOVED this field as per desired output
-                "greenhouse_id": h.greenhouse_id,
-                # "greenhouse_name": gh_name, # REMOVED
-                "plant_id": h.plant_id,
-                "plant_name": plant_name,
-                "planted_crop_planting_date": format_datetime(plant_planting_date),
-                # *** Assign harvester_name_val to the 'name' key ***
-                "name": harvester_name_val, # Represents the harvester's name now
-                # *** END CHANGE ***
-                "plant_type": h.plant_type,
-                "total_yield": h.total_yield,
-                "accepted": h.accepted,
-                "total_rejected": h.total_rejected,
-                "price": format_price(h.price),
-                "total_price": format_price(h.total_price),
-                "harvest_date": format_datetime(h.harvest_date),
-                "notes": h.notes,
-                "status": h.status,
-                "last_updated": format_datetime(h.last_updated)
-             })
+        result_list = [serialize_harvest_row(row) for row in harvest_results]
 
         current_app.logger.info(f"GET /harvests request successful. Filters: GH={gh_id_filter}, Plant={plant_id_filter}. Count: {count}")
         return jsonify(message=message, count=count, harvests=result_list), status_code
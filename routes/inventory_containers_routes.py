@@ -7,6 +7,7 @@ import traceback # Keep traceback import for detailed error response
 
 # Assuming 'db' is your SQLAlchemy instance initialized elsewhere
 from db import db
+from response_cache import cached, invalidate_on_mutation, invalidate_on_write
 # Import your database models
 from models.inventory_model import InventoryContainer
 from models.activity_logs.inventory_container_activity_logs import InventoryContainerLog
@@ -14,6 +15,8 @@ from models.users_model import Users
 from models.greenhouses_model import Greenhouse
 
 inventory_container_api = Blueprint("inventory_container_api", __name__)
+invalidate_on_mutation(inventory_container_api, "inventory_container")
+invalidate_on_write(InventoryContainer, "inventory_container") # Writes from other blueprints and jobs too
 
 # Consistent API Key loading and Timezone
 API_KEY = os.environ.get("API_KEY", "default_api_key_please_replace")
@@ -243,6 +246,7 @@ def get_inventory_container_by_id(container_id):
         return jsonify(error={"message": "An internal server error occurred."}), 500
 
 @inventory_container_api.get("/inventory_container")
+@cached("inventory_container")
 def get_all_inventory_containers():
     """Gets all inventory containers, ordered by greenhouse ID."""
     api_key_error = check_api_key(request)
@@ -5,6 +5,7 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
 
 from db import db
+from response_cache import cached, invalidate_on_mutation, invalidate_on_write
 from models.inventory_items import InventoryItem # Assumes this model now has user_id
 from models.activity_logs.inventory_item_logs import InventoryItemLog
 from models.users_model import Users  # Import User model
@@ -12,6 +13,8 @@ from models.users_model import Users  # Import User model
 from models.greenhouses_model import Greenhouse
 
 inventory_item_api = Blueprint("inventory_item_api", __name__)
+invalidate_on_mutation(inventory_item_api, "inventory_items")
+invalidate_on_write(InventoryItem, "inventory_items") # Writes from other blueprints and jobs too
 
 # It's generally better practice to load sensitive keys from config or environment variables
 # Ensure API_KEY is set in your environment for production
@@ -49,6 +52,7 @@ def log_inventory_item_activity(item_id, user_id, activity_type, description):
 # --- Routes ---
 
 @inventory_item_api.get("/inventory_items")
+@cached("inventory_items")
 def get_all_inventory_items():
     """Retrieves all inventory items."""
     api_key_header = request.headers.get("x-api-key")
@@ -14,8 +14,9 @@ from models.users_model import Users
 # Import for DB specific errors if needed
 from sqlalchemy.exc import IntegrityError, DataError
 from sqlalchemy import func # Import func for case-insensitive comparison if needed
-import psycopg2 # For sending NOTIFY commands
-import json # For formatting notification payload
+from notifications import send_notification
+from export import requested_export_format, stream_export
+from conditional_get import collection_etag
 
 inventory_api = Blueprint('inventory_api', __name__)
 
@@ -51,26 +52,6 @@ def format_datetime(dt):
         except:
             return str(dt)
 
-def send_notification(channel, payload):
-    """Sends a notification payload to a specified PostgreSQL NOTIFY channel."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error(f"SQLALCHEMY_DATABASE_URI not configured for channel {channel}.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            # Use default=str to handle potential non-serializable types like Decimal or datetime
-            curs.execute(f"NOTIFY {channel}, %s;", (json.dumps(payload, default=str),))
-        conn.close()
-        current_app.logger.info(f"Sent notification to channel '{channel}': {payload}")
-    except psycopg2.Error as e:
-        current_app.logger.error(f"DB error sending notification to {channel}: {e}")
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error sending notification to {channel}: {e}", exc_info=True)
-
-
 # *** Logging function for InventoryLog ***
 def log_inventory_change(inventory_id, user_id, change_type, description):
     """
@@ -140,12 +121,43 @@ def check_api_key(request):
 
 # --- Inventory Item Routes ---
 
+def serialize_inventory_record(record):
+    """Response dict of one inventory item record (GET /inventory and its exports)."""
+    # Safely convert numeric types for JSON response
+    quantity_val = int(record.quantity) if record.quantity is not None else 0
+    total_price_val = float(record.total_price) if record.total_price is not None else 0.0
+    max_total_ml_val = float(record.max_total_ml) if record.max_total_ml is not None else 0.0
+    price_val = float(record.price) if record.price is not None else 0.0
+
+    return {
+        "inventory_id": record.inventory_id,
+        "inventory_container_id": record.inventory_container_id, # Include link if needed
+        "greenhouse_id": record.greenhouse_id,
+        "item_name": record.item_name,
+        "user_name": record.user_name, # Name of user who added the record
+        "type": record.type,
+        "quantity": quantity_val,
+        "total_price": total_price_val,
+        "max_total_ml": max_total_ml_val,
+        "created_at": format_datetime(record.created_at),
+        "price": price_val,
+    }
+
+
 @inventory_api.route('/inventory', methods=['GET'])
+@collection_etag(Inventory.updated_at)
 def get_all_inventory_records():
-    """Retrieve all inventory item records, optionally filtered by greenhouse_id."""
+    """
+    Retrieve all inventory item records, optionally filtered by greenhouse_id.
+    ?format=ndjson or ?format=csv streams the same rows as an export.
+    """
     api_key_error = check_api_key(request)
     if api_key_error:
         return api_key_error
+    try:
+        export_format = requested_export_format(request.args)
+    except ValueError as e:
+        return jsonify(error={"message": str(e)}), 400
 
     try:
         greenhouse_id_filter = request.args.get('greenhouse_id', type=int)
@@ -153,30 +165,11 @@ def get_all_inventory_records():
         if greenhouse_id_filter:
             query = query.filter(Inventory.greenhouse_id == greenhouse_id_filter)
 
-        records = query.order_by(Inventory.greenhouse_id, Inventory.item_name).all()
-
-        records_list = []
-        for record in records:
-            # Safely convert numeric types for JSON response
-            quantity_val = int(record.quantity) if record.quantity is not None else 0
-            total_price_val = float(record.total_price) if record.total_price is not None else 0.0
-            max_total_ml_val = float(record.max_total_ml) if record.max_total_ml is not None else 0.0
-            price_val = float(record.price) if record.price is not None else 0.0
-
-            record_data = {
-                "inventory_id": record.inventory_id,
-                "inventory_container_id": record.inventory_container_id, # Include link if needed
-                "greenhouse_id": record.greenhouse_id,
-                "item_name": record.item_name,
-                "user_name": record.user_name, # Name of user who added the record
-                "type": record.type,
-                "quantity": quantity_val,
-                "total_price": total_price_val,
-                "max_total_ml": max_total_ml_val,
-                "created_at": format_datetime(record.created_at),
-                "price": price_val,
-            }
-            records_list.append(record_data)
+        query = query.order_by(Inventory.greenhouse_id, Inventory.item_name)
+        if export_format:
+            return stream_export(query, serialize_inventory_record, export_format, "inventory")
+
+        records_list = [serialize_inventory_record(record) for record in query.all()]
 
         log_msg = f"Fetched {len(records_list)} inventory records"
         if greenhouse_id_filter:
@@ -1,46 +1,17 @@
 # C:\Users\Giebert\PycharmProjects\agreemo_api\routes\maintenance_routes.py
 import os
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from db import db
 from models import Maintenance, Users
 from datetime import datetime
 import pytz
 from models.activity_logs.maintenance_activity_logs_model import MaintenanceActivityLogs
-import psycopg2
-import json
+from notifications import send_notification
 
 maintenance_api = Blueprint("maintenance_api", __name__)
 
 API_KEY = os.environ.get("API_KEY")
 
-# Create trigger for notification
-def send_maintenance_notification(payload):
-    db_uri = current_app.config['SQLALCHEMY_DATABASE_URI'] #best
-    try: #handle issues
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs: #using cursor() wrapper on try catch.
-             curs.execute(f"NOTIFY maintenance_updates, %s;", (json.dumps(payload),)) #trigger notification here.
-        conn.close() #close connection
-
-    except psycopg2.Error as e:
-        print(f"Error on sending : {e}")# error message
-
-
-def send_maintenance_logs_notification(payload):
-    """Sends a notification for maintenance activity log updates."""
-    db_uri = current_app.config['SQLALCHEMY_DATABASE_URI']
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            curs.execute(f"NOTIFY maintenance_logs_updates, %s;", (json.dumps(payload),))
-        conn.close()
-    except psycopg2.Error as e:
-        print(f"Error sending maintenance activity log notification: {e}")
-
-
-
 @maintenance_api.get("/maintenance")
 def maintenance_data():
     try:
@@ -118,13 +89,13 @@ def add_maintenance():
         db.session.commit()# and commit
 
         # Trigger notification
-        send_maintenance_notification({  # sent notifiy
+        send_notification('maintenance_updates', {  # sent notifiy
              "action": "insert",
              "maintenance_id": new_maintenance.maintenance_id
          })
 
          # Trigger Logs Changes
-        send_maintenance_logs_notification({#Sent trigger maintenance, via notify ,., with., postgress changes notifica
+        send_notification('maintenance_logs_updates', {#Sent trigger maintenance, via notify ,., with., postgress changes notifica
               "action": "insert",
                "log_id":new_log.log_id
         })# logs/  sent , if
@@ -158,7 +129,7 @@ def delete_all_maintenance():
         db.session.commit() #commit , first befor
 
         for maintenance_id in maintenance_ids:#loops of, `all deleted ids` before deletion ,
-            send_maintenance_notification({# Sent the event : trigger to delete
+            send_notification('maintenance_updates', {# Sent the event : trigger to delete
                 "action": "delete", # Sent the information  via Action details : and id of the
                 "maintenance_id": maintenance_id #trigger by maintanenance models if deleted , then it sent.
             })#loops of  deleted id records ,  before deleting and `to make and Sent action/details that trigger  notification: to. : by ID  logs ,`. maintenance id,. all
@@ -0,0 +1,26 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\metrics_routes.py
+import os
+from flask import Blueprint, request, jsonify, Response
+
+from metrics import render_metrics
+
+metrics_api = Blueprint("metrics_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+
+
+def check_api_key(request):
+    """Checks the x-api-key header, or a bearer token (what Prometheus scrape configs can send)."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY and request.headers.get("Authorization") != f"Bearer {API_KEY}":
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
+    return None
+
+
+@metrics_api.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of metrics.py, summed over all gunicorn workers."""
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+    body, content_type = render_metrics()
+    return Response(body, status=200, content_type=content_type)
@@ -3,80 +3,28 @@
 import os
 from flask import Blueprint, request, jsonify, current_app, Response # Ensure Response is imported
 from db import db
+from response_cache import cached, invalidate_on_mutation, invalidate_on_write
+from conditional_get import collection_etag
 from models.planted_crops_model import PlantedCrops
 from models.greenhouses_model import Greenhouse
 from models.users_model import Users # Make sure this path is correct
 from models.activity_logs.planted_crop_activity_logs_model import PlantedCropActivityLogs
 from datetime import datetime, date
 import pytz
-import psycopg2
-import json
+from notifications import send_notification
 from sqlalchemy.exc import IntegrityError, DataError
 from decimal import Decimal, InvalidOperation
 
 # Define the Blueprint
 planted_crops_api = Blueprint("planted_crops_api", __name__)
+invalidate_on_mutation(planted_crops_api, "planted_crops")
+invalidate_on_write(PlantedCrops, "planted_crops") # Writes from other blueprints and jobs too
 
 # Load API Key from environment variable
 # Use environment variables in production for API_KEY
 API_KEY = os.environ.get("API_KEY", "YOUR_DEFAULT_FALLBACK_API_KEY") # Replace default
 PH_TZ = pytz.timezone('Asia/Manila') # Define timezone for logging if needed
 
-
-# --- Notification Functions ---
-def send_planted_crop_notification(payload):
-    """Sends notification via PostgreSQL NOTIFY for planted crop changes."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error("Error: SQLALCHEMY_DATABASE_URI not configured for notifications.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-             # Ensure channel name is safe (basic validation)
-            if not 'planted_crops_updates'.isalnum() and '_' not in 'planted_crops_updates':
-                 current_app.logger.error(f"Invalid hardcoded channel name attempted: planted_crops_updates")
-                 conn.close()
-                 return
-            # Use json.dumps with default=str for better type handling (dates, decimals)
-            curs.execute(f"NOTIFY planted_crops_updates, %s;", (json.dumps(payload, default=str),))
-        conn.close()
-        current_app.logger.info(f"Sent notification to channel 'planted_crops_updates': {payload}")
-    except psycopg2.Error as e:
-        current_app.logger.error(f"Database error sending planted crop notification: {e}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close()
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error in send_planted_crop_notification: {e}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close()
-
-
-def send_planted_crop_logs_notification(payload):
-    """Sends notification via PostgreSQL NOTIFY for planted crop log changes."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error("Error: SQLALCHEMY_DATABASE_URI not configured for notifications.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-             # Ensure channel name is safe (basic validation)
-            if not 'planted_crops_logs_updates'.isalnum() and '_' not in 'planted_crops_logs_updates':
-                 current_app.logger.error(f"Invalid hardcoded channel name attempted: planted_crops_logs_updates")
-                 conn.close()
-                 return
-            curs.execute(f"NOTIFY planted_crops_logs_updates, %s;", (json.dumps(payload, default=str),))
-        conn.close()
-        current_app.logger.info(f"Sent notification to channel 'planted_crops_logs_updates': {payload}")
-    except psycopg2.Error as e:
-        current_app.logger.error(f"Database error sending planted crop log notification: {e}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close()
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error in send_planted_crop_logs_notification: {e}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close()
-
-
 # --- Helper Function for Logging ---
 def log_planted_crop_activity(user_id, plant_id, description):
     """
@@ -110,7 +58,7 @@ def log_planted_crop_activity(user_id, plant_id, description):
         db.session.flush() # Assigns log_id before commit
 
         # Send notification about the new log entry *after* successful flush
-        send_planted_crop_logs_notification({
+        send_notification('planted_crops_logs_updates', {
             "action": "insert",
             "log_id": new_log.log_id,
             "plant_id": plant_id,
@@ -153,6 +101,8 @@ def calculate_days_since(start_date):
 # --- API Routes ---
 
 @planted_crops_api.get("/planted_crops")
+@collection_etag(PlantedCrops.updated_at)
+@cached("planted_crops")
 def get_all_planted_crops():
     """Retrieves all planted crops, calculating current ages dynamically."""
     api_key_header = request.headers.get("x-api-key")
@@ -394,7 +344,7 @@ def add_planted_crop():
                            f"({new_crop.plant_name}, created by '{new_crop.name}' - User ID: {user.user_id})")
 
         # --- Send Notification ---
-        send_planted_crop_notification({
+        send_notification('planted_crops_updates', {
             "action": "insert", "plant_id": new_crop.plant_id,
             "greenhouse_id": new_crop.greenhouse_id, "plant_name": new_crop.plant_name,
             "name": new_crop.name # Include creator's name
@@ -621,7 +571,7 @@ def update_planted_crop(plant_id):
         current_app.logger.info(f"Successfully updated Planted Crop ID: {plant_id} by User ID: {updater_user.user_id}. Fields explicitly changed: {updated_fields}")
 
         # --- Send Notification ---
-        send_planted_crop_notification({
+        send_notification('planted_crops_updates', {
             "action": "update", "plant_id": crop.plant_id,
             "updated_fields": updated_fields # Send list of explicitly changed fields
         })
@@ -723,7 +673,7 @@ def delete_planted_crop(plant_id):
                            f"(Plant Name: '{plant_name_ref}') via API Key.")
 
         # --- Send Notification ---
-        send_planted_crop_notification({
+        send_notification('planted_crops_updates', {
             "action": "delete", "plant_id": plant_id, "greenhouse_id": greenhouse_id_ref
         })
 
@@ -782,7 +732,7 @@ def delete_all_planted_crops_no_confirm():
 
         # 4. Send summary notification
         try:
-            send_planted_crop_notification({
+            send_notification('planted_crops_updates', {
                 "action": "delete_all",
                 "crops_deleted_count": num_crops_deleted,
                 "logs_deleted_count": num_logs_deleted,
@@ -0,0 +1,65 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\profiler_routes.py
+import os
+from flask import Blueprint, request, jsonify, current_app, send_file
+
+import profiler
+
+profiler_api = Blueprint("profiler_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+
+
+def check_admin_key(request):
+    """Checks the API key and the profiler admin key (X-Profiler-Key, PROFILER_ADMIN_KEY)."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY or not profiler.is_admin(request):
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key or profiler key."}), 403
+    return None
+
+
+@profiler_api.get("/profiles")
+def get_profiles():
+    """Stored profiles of this instance (profiler.py), newest first."""
+    admin_key_error = check_admin_key(request)
+    if admin_key_error: return admin_key_error
+    profiles = profiler.list_profiles()
+    return jsonify(enabled=profiler.ENABLED, profiles=profiles, count=len(profiles)), 200
+
+
+@profiler_api.get("/profiles/<name>")
+def download_profile(name):
+    """The collapsed stacks of one profile, e.g. for flamegraph.pl or speedscope."""
+    admin_key_error = check_admin_key(request)
+    if admin_key_error: return admin_key_error
+    path = profiler.profile_path(name)
+    if path is None:
+        return jsonify(error={"message": f"Profile '{name}' not found."}), 404
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=os.path.basename(path))
+
+
+@profiler_api.post("/profiles/window")
+def start_profile_window():
+    """
+    Profiles every request of the worker that receives this call for 'seconds' (JSON body,
+    default 60, at most 600), optionally only 'endpoint' (e.g. harvests_api.get_all_harvests),
+    into one profile.
+    """
+    admin_key_error = check_admin_key(request)
+    if admin_key_error: return admin_key_error
+    if not profiler.ENABLED:
+        return jsonify(error={"message": "Profiling is disabled (PROFILER_ENABLED)."}), 409
+    data = request.get_json(silent=True) or {}
+    seconds = data.get("seconds", 60)
+    endpoint = data.get("endpoint")
+    errors = {}
+    if not isinstance(seconds, (int, float)) or isinstance(seconds, bool) or not 0 < seconds <= profiler.MAX_WINDOW_SECONDS:
+        errors["seconds"] = f"Must be a number of seconds between 1 and {profiler.MAX_WINDOW_SECONDS}."
+    if endpoint is not None and endpoint not in current_app.view_functions:
+        errors["endpoint"] = "Unknown endpoint."
+    if errors:
+        return jsonify(error={"message": "Validation failed.", "details": errors}), 400
+    try:
+        window = profiler.start_window(seconds, endpoint)
+    except RuntimeError as e:
+        return jsonify(error={"message": str(e)}), 409
+    return jsonify(message=f"Profiling window open for {seconds}s.", name=window.name, pid=os.getpid()), 202
@@ -2,8 +2,9 @@
 import os
 from flask import Blueprint, request, jsonify, current_app, Response # Ensure Response is imported
 import pytz
-import json
-import psycopg2
+from notifications import send_notification
+from export import requested_export_format, stream_export
+from conditional_get import collection_etag
 from datetime import datetime, date # Ensure date is imported
 from decimal import Decimal, InvalidOperation # Keep for precise calculations if needed
 
@@ -64,37 +65,6 @@ def format_price(p):
         current_app.logger.warning(f"Could not format price value {p} as float.")
         return None # Or handle as error depending on requirements
 
-def send_notification(channel, payload):
-    """Sends a notification payload to a specified PostgreSQL NOTIFY channel."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error(f"Database URI not configured. Cannot send notification to channel '{channel}'.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            # Ensure payload is serializable to JSON, using default=str for robustness
-            json_payload = json.dumps(payload, default=str)
-             # Ensure channel name is safe (basic validation)
-            if not channel.isalnum() and '_' not in channel:
-                 current_app.logger.error(f"Invalid channel name attempted: {channel}")
-                 conn.close()
-                 return
-            curs.execute(f"NOTIFY {channel}, %s;", (json_payload,))
-        conn.close()
-        current_app.logger.info(f"Sent notification to channel '{channel}'. Payload: {json_payload}")
-    except psycopg2.Error as db_err:
-        current_app.logger.error(f"Database error sending notification to channel '{channel}': {db_err}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close() # Ensure connection is closed on error
-    except TypeError as json_err:
-         current_app.logger.error(f"JSON serialization error for notification payload to channel '{channel}': {json_err}. Payload: {payload}", exc_info=True)
-         if 'conn' in locals() and conn: conn.close()
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error sending notification to channel '{channel}': {e}", exc_info=True)
-        if 'conn' in locals() and conn: conn.close()
-
-
 def log_rejection_activity(user_id, rejection_id, description):
     """
     Creates and adds a rejection activity log, linked to users.user_id.
@@ -141,16 +111,58 @@ def log_rejection_activity(user_id, rejection_id, description):
 # --- Routes ---
 
 # <<< --- GET ALL ROUTE --- >>>
+def serialize_rejection_row(row):
+    """Response dict for one (ReasonForRejection, first_name, last_name) row of GET /reason_for_rejection."""
+    reason, first_name, last_name = row
+    added_by_user_name = f"{first_name} {last_name}".strip() if first_name or last_name else "Unknown User"
+    plant_name = reason.plant_name
+    # Fallback if plant_name wasn't stored on the rejection record itself
+    if not plant_name and reason.planted_crops:
+        plant_name = reason.planted_crops.plant_name
+
+    return {
+        "rejection_id": reason.rejection_id,
+        "greenhouse_id": reason.greenhouse_id,
+        # "greenhouse_name": reason.greenhouses.name if reason.greenhouses else None, # Removed
+        "plant_id": reason.plant_id,
+        "plant_name": plant_name,
+        "name": added_by_user_name, # User who added the rejection
+        "type": reason.type,
+        "quantity": reason.quantity,
+        "rejection_date": format_date(reason.rejection_date),
+        "comments": reason.comments,
+        "price": format_price(reason.price),
+        "deduction_rate": format_price(reason.deduction_rate),
+        "total_price": format_price(reason.total_price),
+        "status": reason.status
+    }
+
+
+def unique_rejection_rows(rows):
+    """Skips repeated rejections (several logs can match the creation-log join); rows arrive grouped by id."""
+    last_id = None
+    for row in rows:
+        if row[0].rejection_id != last_id:
+            last_id = row[0].rejection_id
+            yield row
+
+
 @reason_for_rejection_api.get("/reason_for_rejection")
+@collection_etag(ReasonForRejection.updated_at, PlantedCrops.updated_at)
 def get_all_reasons_for_rejection():
     """
     Gets all reason for rejection records, including the name of the user
     associated with the creation log entry, and the rejection status.
     Supports filtering by greenhouse_id.
     Does NOT include greenhouse_name.
+    ?format=ndjson or ?format=csv streams the same rows as an export.
     """
     api_key_error = check_api_key(request)
     if api_key_error: return api_key_error
+    try:
+        export_format = requested_export_format(request.args)
+    except ValueError as e:
+        return jsonify(error={"message": str(e)}), 400
     try:
         greenhouse_id_filter = request.args.get('greenhouse_id', type=int)
 
@@ -175,47 +187,18 @@ def get_all_reasons_for_rejection():
         if greenhouse_id_filter:
             query = query.filter(ReasonForRejection.greenhouse_id == greenhouse_id_filter)
 
-        # Order results meaningfully
-        query_results = query.order_by(ReasonForRejection.rejection_date.desc(), ReasonForRejection.rejection_id.desc()).all()
+        # Order results meaningfully (rows of one rejection stay together for unique_rejection_rows)
+        query = query.order_by(ReasonForRejection.rejection_date.desc(), ReasonForRejection.rejection_id.desc())
+        if export_format:
+            return stream_export(unique_rejection_rows(query.yield_per(1000)), serialize_rejection_row,
+                                 export_format, "reason_for_rejection", blank_row=(ReasonForRejection(), None, None))
 
         status_code = 200
-        count = len(query_results)
-        message = f"Successfully retrieved {count} rejection record(s)."
-        if count == 0:
-            message = f"No rejection records found for greenhouse {greenhouse_id_filter}." if greenhouse_id_filter else "No reason for rejection records found."
-
-        rejection_list = []
-        processed_ids = set() # Handle potential duplicate logs matching criteria
-        for reason, first_name, last_name in query_results:
-            if reason.rejection_id in processed_ids: continue # Skip if already processed due to multiple logs
-            processed_ids.add(reason.rejection_id)
+        rejection_list = [serialize_rejection_row(row) for row in unique_rejection_rows(query.all())]
 
-            added_by_user_name = f"{first_name} {last_name}".strip() if first_name or last_name else "Unknown User"
-            plant_name = reason.plant_name
-            # Fallback if plant_name wasn't stored on the rejection record itself
-            if not plant_name and reason.planted_crops:
-                plant_name = reason.planted_crops.plant_name
-
-            rejection_list.append({
-                "rejection_id": reason.rejection_id,
-                "greenhouse_id": reason.greenhouse_id,
-                # "greenhouse_name": reason.greenhouses.name if reason.greenhouses else None, # Removed
-                "plant_id": reason.plant_id,
-                "plant_name": plant_name,
-                "name": added_by_user_name, # User who added the rejection
-                "type": reason.type,
-                "quantity": reason.quantity,
-                "rejection_date": format_date(reason.rejection_date),
-                "comments": reason.comments,
-                "price": format_price(reason.price),
-                "deduction_rate": format_price(reason.deduction_rate),
-                "total_price": format_price(reason.total_price),
-                "status": reason.status
-            })
-
-        # Recalculate count based on processed IDs
+        # Count based on unique rejections
         final_count = len(rejection_list)
-        message = f"Successfully retrieved {final_count} rejection record(s)." # Update message with final count
+        message = f"Successfully retrieved {final_count} rejection record(s)."
         if final_count == 0:
              message = f"No rejection records found for greenhouse {greenhouse_id_filter}." if greenhouse_id_filter else "No reason for rejection records found."
 
@@ -13,8 +13,9 @@ from models.users_model import Users
 # --- End Model Imports ---
 from datetime import datetime
 import pytz
-import psycopg2
-import json
+from notifications import send_notification
+from export import requested_export_format, stream_export
+from conditional_get import collection_etag
 from sqlalchemy.exc import IntegrityError, DataError
 
 sale_api = Blueprint("sale_api", __name__)
@@ -33,42 +34,6 @@ def check_api_key(request):
         return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
     return None
 
-def send_sale_notification(payload):
-    """Sends a notification to the 'sales_updates' channel."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error("Error: SQLALCHEMY_DATABASE_URI not configured.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            curs.execute(f"NOTIFY sales_updates, %s;", (json.dumps(payload, default=str),))
-        conn.close()
-        current_app.logger.info(f"Sent notification to 'sales_updates': {payload}")
-    except psycopg2.Error as e:
-        current_app.logger.error(f"Error sending sale notification: {e}")
-    except Exception as e:
-        current_app.logger.error(f"An unexpected error occurred in send_sale_notification: {e}", exc_info=True)
-
-def send_sale_logs_notification(payload):
-    """Sends a notification to the 'sale_logs_updates' channel."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error("Error: SQLALCHEMY_DATABASE_URI not configured.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            curs.execute(f"NOTIFY sale_logs_updates, %s;", (json.dumps(payload, default=str),))
-        conn.close()
-        current_app.logger.info(f"Sent notification to 'sale_logs_updates': {payload}")
-    except psycopg2.Error as e:
-        current_app.logger.error(f"Error sending sale activity log notification: {e}")
-    except Exception as e:
-        current_app.logger.error(f"An unexpected error occurred in send_sale_logs_notification: {e}", exc_info=True)
-
 def format_datetime_ph(dt):
     """Helper to format datetime to PH time string (YYYY-MM-DD HH:MM:SS AM/PM)."""
     if not dt: return None
@@ -98,54 +63,65 @@ def format_iso_datetime(dt):
         return str(dt)
 
 # --- GET Endpoint ---
+def serialize_sale(sale):
+    """Response dict of one sale (GET /sales and its exports)."""
+    # Get the base dictionary from the model's helper
+    sale_dict = sale.to_dict()
+
+    # --- DATE FORMATTING AND KEY CHANGE ---
+    formatted_ph_time = format_datetime_ph(sale.salesDate)
+    sale_dict['created_at'] = formatted_ph_time
+    if 'salesDate' in sale_dict:
+        del sale_dict['salesDate']
+    # --- END DATE FORMATTING ---
+
+    # --- USER NAME/EMAIL ADJUSTMENT ---
+    if 'user_name' in sale_dict:
+        sale_dict['name'] = sale_dict['user_name']
+        del sale_dict['user_name']
+    else: # Fallback if to_dict() doesn't add user_name
+       user_name_val = f"{sale.users.first_name} {sale.users.last_name}".strip() if sale.users else "Unknown User"
+       sale_dict['name'] = user_name_val
+
+    if 'user_email' in sale_dict:
+        del sale_dict['user_email']
+    # --- END USER NAME/EMAIL ADJUSTMENT ---
+    return sale_dict
+
+
 @sale_api.get("/sales")
+@collection_etag(Sale.updated_at, Harvest.last_updated, ReasonForRejection.updated_at)
 def get_sales():
     """
     Retrieves all sales records, ordered by date descending.
     Formats the sales date to PH time with 'created_at' key.
     The 'name' field in the response represents the name of the user associated with the sale.
     (Using joinedload for efficiency as previously recommended)
+    ?format=ndjson or ?format=csv streams the same rows as an export.
     """
     api_key_error = check_api_key(request)
     if api_key_error: return api_key_error
 
+    try:
+        export_format = requested_export_format(request.args)
+    except ValueError as e:
+        return jsonify(error={"message": str(e)}), 400
+
     try:
         # Fetch data using joinedload for efficiency
-        sales_data = Sale.query.options(
+        query = Sale.query.options(
             db.joinedload(Sale.users),
             db.joinedload(Sale.harvest),
             db.joinedload(Sale.reason_for_rejection)
-        ).order_by(Sale.salesDate.desc()).all()
+        ).order_by(Sale.salesDate.desc())
+        if export_format:
+            return stream_export(query, serialize_sale, export_format, "sales")
 
+        sales_data = query.all()
         if not sales_data:
             return jsonify(message="No sales data found.", sales=[]), 200
 
-        sales_list = []
-        for sale in sales_data:
-            # Get the base dictionary from the model's helper
-            sale_dict = sale.to_dict()
-
-            # --- DATE FORMATTING AND KEY CHANGE ---
-            formatted_ph_time = format_datetime_ph(sale.salesDate)
-            sale_dict['created_at'] = formatted_ph_time
-            if 'salesDate' in sale_dict:
-                del sale_dict['salesDate']
-            # --- END DATE FORMATTING ---
-
-            # --- USER NAME/EMAIL ADJUSTMENT ---
-            if 'user_name' in sale_dict:
-                sale_dict['name'] = sale_dict['user_name']
-                del sale_dict['user_name']
-            else: # Fallback if to_dict() doesn't add user_name
-               user_name_val = f"{sale.users.first_name} {sale.users.last_name}".strip() if sale.users else "Unknown User"
-               sale_dict['name'] = user_name_val
-
-            if 'user_email' in sale_dict:
-                del sale_dict['user_email']
-            # --- END USER NAME/EMAIL ADJUSTMENT ---
-
-            sales_list.append(sale_dict)
-
+        sales_list = [serialize_sale(sale) for sale in sales_data]
         return jsonify(sales=sales_list), 200
 
     except Exception as e:
@@ -323,7 +299,7 @@ def add_sale():
             sale_payload = new_sale.to_dict() # Use the model's helper
             sale_payload["action"] = "insert"
             sale_payload["user_email"] = user.email # Add user email if needed by listeners
-            send_sale_notification(sale_payload)
+            send_notification('sales_updates', sale_payload)
 
             # Log Notification
             if new_log and new_log.log_id:
@@ -335,7 +311,7 @@ def add_sale():
                     "log_message": new_log.log_message,
                     "timestamp": format_iso_datetime(new_log.timestamp) # Use ISO format
                 }
-                send_sale_logs_notification(log_payload)
+                send_notification('sale_logs_updates', log_payload)
 
             # Source Item Status Update Notification
             if source_type == "Harvest":
@@ -544,7 +520,7 @@ def update_sale(sale_id):
             sale_payload["action"] = "update"
             sale_payload["user_email"] = user.email # Identify updater
             sale_payload["updated_fields"] = list(updated_fields.keys()) # Send list of changed fields
-            send_sale_notification(sale_payload)
+            send_notification('sales_updates', sale_payload)
 
             if new_log and new_log.log_id:
                 log_payload = {
@@ -555,7 +531,7 @@ def update_sale(sale_id):
                     "log_message": new_log.log_message,
                     "timestamp": format_iso_datetime(new_log.timestamp)
                 }
-                send_sale_logs_notification(log_payload)
+                send_notification('sale_logs_updates', log_payload)
         except Exception as notify_e:
             current_app.logger.error(f"Failed to send notifications for updated sale {sale_id}: {notify_e}", exc_info=True)
 
@@ -630,7 +606,7 @@ def delete_sale(sale_id):
 
         # Send Notification
         try:
-            send_sale_notification({
+            send_notification('sales_updates', {
                 "action": "delete",
                 "sale_id": deleted_sale_id,
                 "source_id": source_id_str, # Indicate which source was involved
@@ -639,7 +615,7 @@ def delete_sale(sale_id):
                 # "deleted_by_user_id": deleter_user_id # If tracking who deleted
             })
             # Log deletion notification?
-            # send_sale_logs_notification({... 'action': 'delete_logs_for_sale', ...})
+            # send_notification('sale_logs_updates', {... 'action': 'delete_logs_for_sale', ...})
         except Exception as notify_e:
             current_app.logger.error(f"Failed to send delete notification for sale {deleted_sale_id}: {notify_e}", exc_info=True)
 
@@ -688,7 +664,7 @@ def delete_all_sales():
 
         # Send summary notification
         try:
-            send_sale_notification({
+            send_notification('sales_updates', {
                 "action": "delete_all",
                 "sales_deleted_count": num_sales_deleted,
                 # "logs_deleted_count": num_logs_deleted # If manually deleted
@@ -710,27 +686,3 @@ def delete_all_sales():
         db.session.rollback()
         current_app.logger.error(f"Error deleting all sales: {e}", exc_info=True)
         return jsonify(error={"message": "An error occurred during bulk deletion."}), 500
-
-# --- Add a generic send_notification function if needed by Harvest/Rejection ---
-# This function might already exist elsewhere in your project
-def send_notification(channel, payload):
-    """Generic notification sender."""
-    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
-    if not db_uri:
-        current_app.logger.error(f"DB URI not configured for channel {channel}.")
-        return
-    try:
-        conn = psycopg2.connect(db_uri)
-        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-        with conn.cursor() as curs:
-            # Ensure channel name is safe (basic validation)
-            if not channel.isalnum() and '_' not in channel:
-                 current_app.logger.error(f"Invalid channel name attempted: {channel}")
-                 return
-            curs.execute(f"NOTIFY {channel}, %s;", (json.dumps(payload, default=str),))
-        conn.close()
-        current_app.logger.info(f"Sent notification to channel '{channel}': {payload}")
-    except psycopg2.Error as e:
-        current_app.logger.error(f"Database error sending notification to {channel}: {e}")
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error sending notification to {channel}: {e}", exc_info=True)
@@ -3,11 +3,20 @@ import os
 from db import db
 from flask import Blueprint, request, jsonify, current_app
 import traceback  # For detailed error logging
+import io
+import csv
+import json
+import math
+from sqlalchemy import insert
 import pytz # <--- Added pytz import
-from datetime import datetime # <--- Added datetime import
+from datetime import datetime, timedelta # <--- Added datetime import
 
 # Import the necessary models (for the original endpoint)
 from models.sensors_readings_model import SensorReading
+from sensor_rollups import update_rollups, query_series, parse_bucket_spec, MAX_SERIES_POINTS
+from pagination import keyset_page, parse_limit, decode_cursor
+from latest_values_cache import latest_values
+from metrics import FIREBASE_FETCH_SECONDS, observe
 
 # --- Firebase Imports ---
 # Ensure firebase_admin is installed: pip install firebase-admin
@@ -22,6 +31,8 @@ sensor_readings_api = Blueprint("sensor_readings_api", __name__)
 # Load API Key from environment variable - SET THIS
 API_KEY = os.environ.get("API_KEY", "default_api_key_please_replace")
 PH_TZ = pytz.timezone('Asia/Manila') # <--- Define Philippines Timezone
+DEFAULT_READINGS_LIMIT = 500 # Page size for GET /sensor-readings when no limit is given
+MAX_BATCH_READINGS = 10000 # Max items per POST /sensor-readings/batch
 
 # Define component_ids - REMOVED as component_id is removed from model/routes
 # PH_COMPONENT_ID = os.environ.get("PH_COMPONENT_ID", "ph_sensor")
@@ -64,21 +75,71 @@ def format_datetime_ph(dt):
         # Fallback to ISO format or simple string
         return dt.isoformat()
 
+def parse_query_datetime(value):
+    """
+    Parses a YYYY-MM-DD or ISO datetime query arg into a naive UTC datetime.
+    Naive input is taken as PH time. Raises ValueError on bad input.
+    """
+    parsed = datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is None:
+        parsed = PH_TZ.localize(parsed)
+    return parsed.astimezone(pytz.utc).replace(tzinfo=None)
+
 
 # --- Original Route (fetches from PostgreSQL) ---
 @sensor_readings_api.get("/sensor-readings")
 def get_all_sensor_readings_db():
-    """Fetches all sensor readings from the PostgreSQL database."""
+    """
+    Fetches one page of sensor readings from the PostgreSQL database, newest first.
+    Query args: unit, from, to (YYYY-MM-DD or ISO, PH time when naive), limit, cursor.
+    Pass the returned next_cursor back as ?cursor= to get the following page.
+    """
     try:
         api_key_error = check_api_key(request)
         if api_key_error: return api_key_error
 
-        # Query all sensor readings from DB, ordered by time descending
-        query_data = SensorReading.query.order_by(SensorReading.reading_time.desc()).all()
+        unit = request.args.get("unit")
+        from_str = request.args.get("from")
+        to_str = request.args.get("to")
+        cursor = request.args.get("cursor")
 
-        if not query_data:
-            current_app.logger.info("No sensor readings found in the database.")
-            return jsonify(db_readings=[]), 200 # Return 200 OK with empty list
+        errors = {}
+        limit = None
+        start_time = None
+        end_time = None
+        try:
+            limit = parse_limit(request.args.get("limit"), default=DEFAULT_READINGS_LIMIT)
+        except ValueError:
+            errors['limit'] = "Invalid limit. Must be an integer."
+        try:
+            if from_str: start_time = parse_query_datetime(from_str)
+        except ValueError:
+            errors['from'] = "Invalid date. Use YYYY-MM-DD or an ISO datetime."
+        try:
+            if to_str: end_time = parse_query_datetime(to_str)
+        except ValueError:
+            errors['to'] = "Invalid date. Use YYYY-MM-DD or an ISO datetime."
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                errors['cursor'] = "Invalid cursor."
+
+        if errors:
+            return jsonify(error={"message": "Validation failed.", "details": errors}), 400
+
+        # Served by ix_sensor_readings_unit_time / ix_sensor_readings_time
+        query = SensorReading.query
+        if unit:
+            query = query.filter(SensorReading.unit == unit)
+        if start_time:
+            query = query.filter(SensorReading.reading_time >= start_time)
+        if end_time:
+            query = query.filter(SensorReading.reading_time < end_time)
+
+        query_data, next_cursor = keyset_page(
+            query, SensorReading.reading_time, SensorReading.reading_id, cursor=cursor, limit=limit
+        )
 
         # Format the data for JSON response
         readings_list = [{
@@ -90,17 +151,85 @@ def get_all_sensor_readings_db():
         } for data in query_data]
 
         current_app.logger.info(f"Fetched {len(readings_list)} readings from database.")
-        return jsonify(db_readings=readings_list), 200  # Wrap in key
+        return jsonify(db_readings=readings_list, count=len(readings_list), next_cursor=next_cursor), 200  # Wrap in key
 
     except Exception as e:
         current_app.logger.error(f"Error fetching sensor readings from DB: {str(e)}", exc_info=True)
         return jsonify(error={"message": "An internal server error occurred while fetching DB readings."}), 500
 
 
+# --- Aggregated Series Route (served from sensor_reading_rollups) ---
+@sensor_readings_api.get("/sensor-readings/series")
+def get_sensor_reading_series():
+    """
+    Returns min/max/mean/count/last per time bucket for one unit, e.g.
+    /sensor-readings/series?unit=pH&from=2025-04-01&to=2025-04-08&bucket=1h
+    Defaults: to = now, from = 24 hours before 'to', bucket = 1h.
+    """
+    try:
+        api_key_error = check_api_key(request)
+        if api_key_error: return api_key_error
+
+        unit = request.args.get("unit")
+        bucket_str = request.args.get("bucket", "1h")
+        from_str = request.args.get("from")
+        to_str = request.args.get("to")
+        greenhouse_id = request.args.get("greenhouse_id", type=int)
+
+        errors = {}
+        if not unit: errors['unit'] = "Required query parameter."
+
+        bucket_seconds = parse_bucket_spec(bucket_str)
+        if bucket_seconds is None:
+            errors['bucket'] = "Invalid bucket. Use e.g. 1m, 15m, 1h, 6h, 1d."
+
+        end_time = datetime.now(pytz.utc).replace(tzinfo=None)
+        start_time = None
+        try:
+            if to_str: end_time = parse_query_datetime(to_str)
+        except ValueError:
+            errors['to'] = "Invalid date. Use YYYY-MM-DD or an ISO datetime."
+        try:
+            start_time = parse_query_datetime(from_str) if from_str else end_time - timedelta(days=1)
+        except ValueError:
+            errors['from'] = "Invalid date. Use YYYY-MM-DD or an ISO datetime."
+
+        if not errors:
+            if start_time >= end_time:
+                errors['range'] = "'from' must be earlier than 'to'."
+            elif (end_time - start_time).total_seconds() / bucket_seconds > MAX_SERIES_POINTS:
+                errors['range'] = f"Range too large for bucket '{bucket_str}'. Max {MAX_SERIES_POINTS} points per request."
+
+        if errors:
+            return jsonify(error={"message": "Validation failed.", "details": errors}), 400
+
+        rollup_level, series = query_series(unit, start_time, end_time, bucket_seconds, greenhouse_id=greenhouse_id)
+
+        points = [{
+            "bucket_start": format_datetime_ph(point["bucket_start"]),
+            "min": point["min"],
+            "max": point["max"],
+            "mean": point["mean"],
+            "count": point["count"],
+            "last": point["last"],
+            "last_time": format_datetime_ph(point["last_time"]),
+        } for point in series]
+
+        current_app.logger.info(f"Served {len(points)} '{unit}' series point(s) from '{rollup_level}' rollups.")
+        return jsonify(unit=unit, bucket=bucket_str, rollup=rollup_level, series=points), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching sensor reading series: {str(e)}", exc_info=True)
+        return jsonify(error={"message": "An internal server error occurred while fetching the series."}), 500
+
+
 # --- NEW Firebase Route ---
 @sensor_readings_api.get("/sensor-readings/firebase")
 def get_firebase_sensor_readings():
-    """Fetches the latest pH and TDS sensor readings from Firebase Realtime Database."""
+    """
+    Returns the latest pH and TDS readings from the process-local cache kept current by the
+    Firebase listener. Falls back to a direct Firebase read when the cache is cold or stale.
+    """
     try:
         api_key_error = check_api_key(request)
         if api_key_error: return api_key_error
@@ -121,46 +250,16 @@ def get_firebase_sensor_readings():
             current_app.logger.error("Firebase Admin SDK is not initialized. Cannot fetch readings.")
             return jsonify(error={"message": "Firebase service is not properly initialized."}), 503
 
-        # --- Fetch data from Firebase ---
+        # --- Read from the latest-value cache (falls back to Firebase when cold or stale) ---
         ph_data = None
         tds_data = None
         firebase_error = None
-
-        # Get current PH time for timestamping Firebase reads if they lack one
-        now_ph = datetime.now(PH_TZ)
-        formatted_ph_timestamp = now_ph.strftime("%Y-%m-%d %I:%M:%S %p") # Format with AM/PM
+        snapshot = None
 
         try:
-            ref = firebase_db.reference('sensorReadings')
-
-            # Fetch pH data
-            ph_ref = ref.child('ph')
-            ph_raw = ph_ref.get()
-            if ph_raw is not None:
-                # Extract value, assume timestamp is "now" in PH time
-                ph_value = ph_raw.get("value") if isinstance(ph_raw, dict) else ph_raw
-                ph_data = {
-                    "value": ph_value,
-                    "timestamp": formatted_ph_timestamp # Use formatted PH time
-                }
-                current_app.logger.debug(f"Fetched pH from Firebase: {ph_data}")
-            else:
-                current_app.logger.warning("No 'ph' data found at sensorReadings/ph in Firebase.")
-
-            # Fetch TDS data
-            tds_ref = ref.child('tds')
-            tds_raw = tds_ref.get()
-            if tds_raw is not None:
-                # Extract value, assume timestamp is "now" in PH time
-                tds_value = tds_raw.get("value") if isinstance(tds_raw, dict) else tds_raw
-                tds_data = {
-                    "value": tds_value,
-                    "timestamp": formatted_ph_timestamp # Use formatted PH time
-                }
-                current_app.logger.debug(f"Fetched TDS from Firebase: {tds_data}")
-            else:
-                current_app.logger.warning("No 'tds' data found at sensorReadings/tds in Firebase.")
-
+            snapshot, updated_at, cache_age, source = latest_values.get_or_fetch(
+                'sensorReadings', lambda: firebase_db.reference('sensorReadings').get()
+            )
         except firebase_exceptions.FirebaseError as fb_err:
             firebase_error = f"Firebase specific error: {fb_err}"
             current_app.logger.error(firebase_error, exc_info=True)
@@ -172,19 +271,38 @@ def get_firebase_sensor_readings():
             # Return error if Firebase interaction failed
             return jsonify(error={"message": "Failed to fetch data from Firebase.", "details": firebase_error}), 500
 
+        # Timestamp is when this process last saw the value change (or fetched it)
+        formatted_ph_timestamp = datetime.fromtimestamp(updated_at, PH_TZ).strftime("%Y-%m-%d %I:%M:%S %p")
+        snapshot = snapshot if isinstance(snapshot, dict) else {}
+
+        ph_raw = snapshot.get('ph')
+        if ph_raw is not None:
+            ph_value = ph_raw.get("value") if isinstance(ph_raw, dict) else ph_raw
+            ph_data = {"value": ph_value, "timestamp": formatted_ph_timestamp}
+        else:
+            current_app.logger.warning("No 'ph' data found at sensorReadings/ph in Firebase.")
+
+        tds_raw = snapshot.get('tds')
+        if tds_raw is not None:
+            tds_value = tds_raw.get("value") if isinstance(tds_raw, dict) else tds_raw
+            tds_data = {"value": tds_value, "timestamp": formatted_ph_timestamp}
+        else:
+            current_app.logger.warning("No 'tds' data found at sensorReadings/tds in Firebase.")
+
         # --- Format Response ---
         response_data = {
             "ph": ph_data,
             "tds": tds_data
         }
+        cache_info = {"source": source, "cache_age_seconds": round(cache_age, 3)}
 
         # Check if *any* data was found
         if ph_data is None and tds_data is None:
             current_app.logger.info("No pH or TDS data found in Firebase at specified paths.")
-            return jsonify(message="No sensor readings found in Firebase.", firebase_readings=response_data), 404
+            return jsonify(message="No sensor readings found in Firebase.", firebase_readings=response_data, **cache_info), 404
         else:
-            current_app.logger.info("Successfully fetched sensor readings from Firebase.")
-            return jsonify(firebase_readings=response_data), 200
+            current_app.logger.debug(f"Served sensor readings from {source} (age {cache_age:.3f}s).")
+            return jsonify(firebase_readings=response_data, **cache_info), 200
 
     except Exception as e:
         # Catch errors outside the Firebase fetch block
@@ -226,7 +344,7 @@ def create_sensor_reading():
             return jsonify(error={"message": "Validation failed.", "details": errors}), 400
 
         # Create a new SensorReading object
-        # reading_time is set by DB default
+        # reading_time defaults to now (naive UTC, see the model)
         new_reading = SensorReading(
             reading_value=reading_value,
             unit=unit
@@ -234,7 +352,9 @@ def create_sensor_reading():
 
         # Add the new reading to the database
         db.session.add(new_reading)
-        db.session.commit() # Commit to get the reading_id and reading_time
+        db.session.flush() # Get the reading_id
+        update_rollups([new_reading]) # Same transaction as the reading itself
+        db.session.commit()
 
         current_app.logger.info(f"New sensor reading created with reading_id: {new_reading.reading_id}")
 
@@ -256,6 +376,157 @@ def create_sensor_reading():
         return jsonify(error={"message": "An internal server error occurred while creating the sensor reading."}), 500
 
 
+# --- Streaming ingestion health (sensor_ingest.py) ---
+@sensor_readings_api.get("/sensor-readings/stream/stats")
+def get_sensor_stream_stats():
+    """Returns queue depth and received/coalesced/dropped/flushed counters for this process."""
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+
+    pipeline = current_app.extensions.get('sensor_ingest')
+    if pipeline is None:
+        return jsonify(running=False, message="Sensor stream is not running in this process."), 200
+    return jsonify(running=True, stats=pipeline.snapshot_stats()), 200
+
+
+# --- Bulk POST Route for buffered device readings ---
+@sensor_readings_api.post("/sensor-readings/batch")
+def create_sensor_readings_batch():
+    """
+    Stores many sensor readings in one request and one database round trip.
+    Body: a JSON array (or {"readings": [...]}) or NDJSON (Content-Type: application/x-ndjson)
+    of {"value": 6.4, "unit": "pH", "reading_time": "2025-04-01T08:15:00"}.
+    reading_time is optional (defaults to now); naive times are PH time, numbers are epoch seconds.
+    Valid items are stored even when others fail; per-item errors are reported by index.
+    """
+    try:
+        api_key_error = check_api_key(request)
+        if api_key_error: return api_key_error
+
+        items, errors = parse_batch_body(request)
+        if items is None:
+            return jsonify(error={"message": errors}), 400
+        if len(items) > MAX_BATCH_READINGS:
+            return jsonify(error={"message": f"Batch too large. Max {MAX_BATCH_READINGS} readings per request."}), 413
+
+        now_utc = datetime.now(pytz.utc).replace(tzinfo=None)
+        rows = []
+        for index, item in items:
+            row, item_errors = validate_batch_item(item, now_utc)
+            if item_errors:
+                errors.append({"index": index, "errors": item_errors})
+            else:
+                rows.append(row)
+
+        if not rows:
+            current_app.logger.warning(f"POST /sensor-readings/batch rejected: no valid readings ({len(errors)} error(s)).")
+            return jsonify(error={"message": "No valid readings in batch.", "details": errors}), 400
+
+        insert_readings_bulk(rows)
+        update_rollups(rows)
+        db.session.commit()
+
+        current_app.logger.info(f"Batch stored {len(rows)} sensor reading(s); {len(errors)} item(s) rejected.")
+        status_code = 201 if not errors else 207
+        return jsonify(
+            message=f"Stored {len(rows)} sensor reading(s).",
+            inserted=len(rows),
+            rejected=len(errors),
+            errors=errors
+        ), status_code
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error storing sensor reading batch: {str(e)}", exc_info=True)
+        return jsonify(error={"message": "An internal server error occurred while storing the batch."}), 500
+
+
+def parse_batch_body(request):
+    """
+    Returns ([(index, item), ...], errors) for a JSON array or NDJSON body.
+    On a body-level problem returns (None, message).
+    """
+    errors = []
+    content_type = (request.content_type or "").lower()
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        lines = request.get_data(as_text=True).splitlines()
+        for index, line in enumerate(line for line in lines if line.strip()):
+            try:
+                items.append((index, json.loads(line)))
+            except ValueError as e:
+                errors.append({"index": index, "errors": {"json": f"Invalid JSON: {e}"}})
+        return items, errors
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get("readings")
+    if not isinstance(payload, list):
+        return None, "Body must be a JSON array of readings, {\"readings\": [...]}, or NDJSON."
+    return list(enumerate(payload)), errors
+
+
+def validate_batch_item(item, default_time):
+    """Validates one batch item. Returns (row dict, None) or (None, errors dict)."""
+    if not isinstance(item, dict):
+        return None, {"item": "Must be an object."}
+
+    errors = {}
+    value = item.get("value", item.get("reading_value"))
+    unit = item.get("unit")
+    reading_time_raw = item.get("reading_time")
+
+    if value is None:
+        errors['value'] = "Required field."
+    elif isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        errors['value'] = "Invalid value. Must be a number."
+    else:
+        try:
+            value = float(value)
+            if not math.isfinite(value):
+                errors['value'] = "Invalid value. Must be a finite number."
+        except ValueError:
+            errors['value'] = "Invalid value. Must be a number."
+
+    if not unit or not isinstance(unit, str):
+        errors['unit'] = "Required field."
+
+    reading_time = default_time
+    if reading_time_raw not in (None, ""):
+        try:
+            if isinstance(reading_time_raw, (int, float)) and not isinstance(reading_time_raw, bool):
+                reading_time = datetime.fromtimestamp(reading_time_raw, pytz.utc).replace(tzinfo=None)
+            else:
+                reading_time = parse_query_datetime(str(reading_time_raw))
+        except (ValueError, TypeError, OverflowError, OSError):
+            errors['reading_time'] = "Invalid reading_time. Use an ISO datetime or epoch seconds."
+
+    if errors:
+        return None, errors
+    return {"reading_value": value, "unit": unit, "reading_time": reading_time}, None
+
+
+def insert_readings_bulk(rows):
+    """
+    Writes rows in one statement on the current session's transaction:
+    COPY on PostgreSQL, a multi-row INSERT elsewhere.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([repr(row["reading_value"]), row["unit"], row["reading_time"].isoformat(sep=" ")])
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY sensor_readings (reading_value, unit, reading_time) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+    else:
+        db.session.execute(insert(SensorReading), rows)
+
+
 # --- Scheduled Task Function (Outside the Blueprint) ---
 def fetch_and_store_firebase_data(app):
     """
@@ -292,7 +563,8 @@ def fetch_and_store_firebase_data(app):
 
                 # Fetch pH data
                 ph_ref = ref.child('ph')
-                ph_raw = ph_ref.get()
+                with observe(FIREBASE_FETCH_SECONDS, path='sensorReadings/ph'):
+                    ph_raw = ph_ref.get()
                 if ph_raw is not None:
                     ph_value = ph_raw.get("value") if isinstance(ph_raw, dict) else ph_raw
                     ph_data = {"value": ph_value}
@@ -302,7 +574,8 @@ def fetch_and_store_firebase_data(app):
 
                 # Fetch TDS data
                 tds_ref = ref.child('tds')
-                tds_raw = tds_ref.get()
+                with observe(FIREBASE_FETCH_SECONDS, path='sensorReadings/tds'):
+                    tds_raw = tds_ref.get()
                 if tds_raw is not None:
                      tds_value = tds_raw.get("value") if isinstance(tds_raw, dict) else tds_raw
                      tds_data = {"value": tds_value}
@@ -320,30 +593,35 @@ def fetch_and_store_firebase_data(app):
             # --- Database Insertion ---
             db_session = db.session # Get the database session
             added_count = 0
+            new_readings = []
             try:
                 # Insert pH data if fetched
                 if ph_data and ph_data.get("value") is not None:
-                    # reading_time set by DB default
+                    # reading_time defaults to now
                     new_ph_reading = SensorReading(
                         reading_value=ph_data["value"],
                         unit="pH"
                     )
                     db_session.add(new_ph_reading)
+                    new_readings.append(new_ph_reading)
                     added_count += 1
                     logger.info(f"Scheduled task: Storing pH reading {ph_data['value']} at {now_ph_for_logging.strftime('%Y-%m-%d %I:%M:%S %p')}")
 
                 # Insert TDS data if fetched
                 if tds_data and tds_data.get("value") is not None:
-                    # reading_time set by DB default
+                    # reading_time defaults to now
                     new_tds_reading = SensorReading(
                         reading_value=tds_data["value"],
                         unit="ppm"
                     )
                     db_session.add(new_tds_reading)
+                    new_readings.append(new_tds_reading)
                     added_count += 1
                     logger.info(f"Scheduled task: Storing TDS reading {tds_data['value']} at {now_ph_for_logging.strftime('%Y-%m-%d %I:%M:%S %p')}")
 
                 if added_count > 0:
+                     db_session.flush() # Assign reading_ids before the rollups
+                     update_rollups(new_readings)
                      db_session.commit() # Commit the changes if anything was added
                      logger.info(f"Scheduled task: Successfully stored {added_count} Firebase reading(s) in the database.")
                 else:
@@ -0,0 +1,198 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\stream_routes.py
+import hmac
+import json
+import os
+import threading
+from flask import Blueprint, request, jsonify, current_app, Response
+
+from change_hub import get_change_hub
+from db import db
+from models.outbox_model import OutboxEvent
+from outbox import TRACKED_MODELS, after_position, deliverable_events, event_position, event_to_dict, json_default
+
+stream_api = Blueprint("stream_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", 15))
+# Each open stream holds one worker thread; the cap keeps threads free for normal requests
+MAX_STREAM_CLIENTS = int(os.environ.get("STREAM_MAX_CLIENTS", 50))
+BACKFILL_LIMIT = 1000 # Max events read from outbox_events when the replay buffer cannot cover a resume
+RETRY_MILLISECONDS = 3000
+
+# All channels that carry change events, e.g. 'harvests_updates', 'sale_logs_updates'
+STREAM_CHANNELS = sorted({channel for channel, _ in TRACKED_MODELS.values()})
+
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+
+def check_api_key(request):
+    """
+    Header x-api-key, or ?api_key= for EventSource clients that cannot set headers.
+    Without API_KEY configured the stream is refused: every change would be public.
+    """
+    if not API_KEY:
+        current_app.logger.error("Change stream refused: API_KEY is not set.")
+        return jsonify(error={"message": "Change stream unavailable: the server has no API key configured."}), 503
+    api_key = request.headers.get("x-api-key") or request.args.get("api_key")
+    if api_key is None or not hmac.compare_digest(api_key.encode("utf-8"), API_KEY.encode("utf-8")):
+        current_app.logger.warning("Unauthorized stream attempt.")
+        return jsonify(error={"Not Authorised": "Incorrect api_key."}), 403
+    return None
+
+
+def resolve_channels(value):
+    """
+    Maps ?channels= to channel names. Accepts full names ('sale_logs_updates'), short
+    names ('harvests' -> 'harvests_updates') and 'activity_logs' (every *_logs_updates).
+    Returns (channels, unknown names).
+    """
+    if not value:
+        return list(STREAM_CHANNELS), []
+    channels, unknown = [], []
+    for name in (part.strip() for part in value.split(",")):
+        if not name:
+            continue
+        if name == "activity_logs":
+            matches = [channel for channel in STREAM_CHANNELS if channel.endswith("_logs_updates")]
+        elif name in STREAM_CHANNELS:
+            matches = [name]
+        elif f"{name}_updates" in STREAM_CHANNELS:
+            matches = [f"{name}_updates"]
+        else:
+            unknown.append(name)
+            continue
+        channels.extend(channel for channel in matches if channel not in channels)
+    return channels, unknown
+
+
+def sse_id(change):
+    """The frame id: the event's (transaction_id, event_id) position, e.g. '48213-907'."""
+    transaction_id, event_id = event_position(change)
+    return f"{transaction_id}-{event_id}"
+
+
+def parse_last_event_id(value):
+    """
+    Position from a Last-Event-ID. A bare event id (frames sent before positions) is
+    looked up; if it was pruned, (0, event_id) makes the resume fall back to a reset.
+    """
+    if "-" in value:
+        transaction_id, event_id = value.split("-", 1)
+        return int(transaction_id), int(event_id)
+    event_id = int(value)
+    outbox_event = db.session.get(OutboxEvent, event_id)
+    return (outbox_event.transaction_id or 0, event_id) if outbox_event else (0, event_id)
+
+
+def sse_frame(change):
+    data = json.dumps(change, default=json_default, separators=(",", ":"))
+    return f"id: {sse_id(change)}\nevent: {change['channel']}\ndata: {data}\n\n"
+
+
+def backfill_events(after, channels):
+    """
+    Events after position after from outbox_events, for resumes older than the replay buffer,
+    in delivery order and only from ended transactions (like the relay, see outbox.py).
+    Returns (events, complete); complete is False if the gap was already pruned.
+    """
+    retained = OutboxEvent.query.filter(~after_position(after)).first() is not None
+    rows = (deliverable_events(after)
+            .filter(OutboxEvent.channel.in_(channels))
+            .limit(BACKFILL_LIMIT)
+            .all())
+    return [event_to_dict(row) for row in rows], retained and len(rows) < BACKFILL_LIMIT
+
+
+@stream_api.get("/stream")
+def stream_changes():
+    """
+    Server-Sent Events feed of change events. Each frame's id is the event's outbox position
+    ("<transaction_id>-<event_id>") and its event name is the channel; data is the event with the full row. Reconnecting
+    clients send Last-Event-ID (or ?last_event_id=) and receive what they missed; when
+    that is no longer available an 'event: reset' frame tells them to reload.
+    """
+    global _open_streams
+    auth_error = check_api_key(request)
+    if auth_error:
+        return auth_error
+
+    channels, unknown = resolve_channels(request.args.get("channels"))
+    if unknown:
+        return jsonify(error={"message": f"Unknown channel(s): {', '.join(unknown)}. Valid: {', '.join(STREAM_CHANNELS)}, activity_logs"}), 400
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        resume_from = parse_last_event_id(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify(error={"message": "Last-Event-ID must be an event id from this stream."}), 400
+
+    with _open_streams_lock:
+        if _open_streams >= MAX_STREAM_CLIENTS:
+            response = jsonify(error={"message": "Too many open streams, try again later."})
+            response.headers["Retry-After"] = "30"
+            return response, 503
+        _open_streams += 1
+
+    try:
+        hub = get_change_hub(current_app._get_current_object())
+        reset = False
+        if resume_from is None:
+            subscription, missed = hub.subscribe(channels), []
+        else:
+            subscription, missed, complete = hub.subscribe_from(resume_from, channels)
+            if not complete:
+                backfill, backfill_complete = backfill_events(resume_from, channels)
+                seen = {change["event_id"] for change in backfill}
+                missed = sorted(backfill + [change for change in missed if change["event_id"] not in seen], key=event_position)
+                reset = not backfill_complete
+    except Exception as e:
+        with _open_streams_lock:
+            _open_streams -= 1
+        current_app.logger.error(f"Could not open change stream: {e}", exc_info=True)
+        return jsonify(error={"message": "Could not open change stream."}), 500
+    logger = current_app.logger
+    released = threading.Event()
+
+    def release():
+        # Runs from the generator or from response close, whichever comes first
+        global _open_streams
+        if released.is_set():
+            return
+        released.set()
+        subscription.close()
+        with _open_streams_lock:
+            _open_streams -= 1
+
+    def generate():
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            # Events arrive in delivery order, (transaction_id, event_id), not event_id order
+            sent_up_to = resume_from or (0, 0)
+            for change in missed:
+                yield sse_frame(change)
+                sent_up_to = max(sent_up_to, event_position(change))
+            while True:
+                # Blocks on the subscription only; no database connection is held while idle
+                changes = subscription.get(timeout=HEARTBEAT_SECONDS)
+                if not changes:
+                    yield ": heartbeat\n\n"
+                    continue
+                for change in changes:
+                    if event_position(change) > sent_up_to: # Skip events already sent from the backfill
+                        yield sse_frame(change)
+                        sent_up_to = event_position(change)
+                if subscription.dropped:
+                    logger.warning(f"Change stream client fell behind; {subscription.dropped} event(s) dropped.")
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+        finally:
+            release()
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.call_on_close(release)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no" # Disable proxy buffering (nginx)
+    return response
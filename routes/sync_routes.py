@@ -0,0 +1,51 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\routes\sync_routes.py
+import os
+from flask import Blueprint, request, jsonify, current_app
+
+from sync import SYNC_ENTITIES, changes_since, decode_sync_cursor
+
+sync_api = Blueprint("sync_api", __name__)
+
+API_KEY = os.environ.get("API_KEY")
+
+
+def check_api_key(request):
+    """Checks if the provided API key in the header is valid."""
+    api_key_header = request.headers.get("x-api-key")
+    if api_key_header != API_KEY:
+        return jsonify(error={"Not Authorised": "Incorrect or missing api_key."}), 403
+    return None
+
+
+@sync_api.get("/sync")
+def get_sync_changes():
+    """
+    Ids changed since a previous sync, per entity type.
+    Query params:
+      since    - cursor from the previous response (omit on first sync)
+      entities - comma-separated subset of: harvests, planted_crops, inventory, rejections, sales
+    Response: {"cursor", "server_time", "full_resync", "changes": {type: {"upserted": [...], "deleted": [...]}}}
+    full_resync, or "reset": true for one type, means reload that data with the regular GET endpoints.
+    """
+    api_key_error = check_api_key(request)
+    if api_key_error: return api_key_error
+
+    entity_types = None
+    if request.args.get("entities"):
+        entity_types = [name.strip() for name in request.args["entities"].split(",") if name.strip()]
+        unknown = [name for name in entity_types if name not in SYNC_ENTITIES]
+        if unknown:
+            return jsonify(error={"message": f"Unknown entities: {', '.join(unknown)}. Valid: {', '.join(SYNC_ENTITIES)}"}), 400
+
+    since = None
+    if request.args.get("since"):
+        try:
+            since = decode_sync_cursor(request.args["since"])
+        except ValueError:
+            return jsonify(error={"message": "Invalid 'since' cursor. Omit it to start a full sync."}), 400
+
+    try:
+        return jsonify(changes_since(since, entity_types)), 200
+    except Exception as e:
+        current_app.logger.error(f"Error computing sync changes: {e}", exc_info=True)
+        return jsonify(error={"message": "An error occurred while computing changes."}), 500
@@ -10,6 +10,8 @@ from itsdangerous import URLSafeTimedSerializer, SignatureExpired
 from passlib.handlers.pbkdf2 import pbkdf2_sha256
 
 from db import db
+from metrics import SMTP_SEND_SECONDS, observe
+from response_cache import cached, invalidate_on_mutation, invalidate_on_write
 from forms import ChangePasswordForm
 from functions import log_activity
 from models import Greenhouse, Users, AdminUser
@@ -20,6 +22,8 @@ from sqlalchemy.exc import IntegrityError
 from models.activity_logs.user_activity_logs_model import UserActivityLogs
 
 users_api = Blueprint("users_api", __name__)
+invalidate_on_mutation(users_api, "users")
+invalidate_on_write(Users, "users") # Writes from other blueprints and jobs too
 
 API_KEY = os.environ.get("API_KEY")
 
@@ -32,6 +36,7 @@ s = URLSafeTimedSerializer('Thisisasecret!')
 
 # Get all user data
 @users_api.get("/users")
+@cached("users")
 def users_data():
     try:
         api_key_header = request.headers.get("x-api-key")
@@ -198,7 +203,7 @@ def send_email(email):
 
     # Connect to the SMTP server and send the email
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        with observe(SMTP_SEND_SECONDS, purpose="user_email"), smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
             server.login(MY_EMAIL, MY_PASSWORD)
             server.sendmail(MY_EMAIL, [email], msg.as_string())
@@ -525,7 +530,7 @@ def send_reset_email(email, reset_token, name):
 
     # Connect to the SMTP server and send the email
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        with observe(SMTP_SEND_SECONDS, purpose="user_password_reset"), smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
             server.login(MY_EMAIL, MY_PASSWORD)
             server.sendmail(MY_EMAIL, [email], msg.as_string())
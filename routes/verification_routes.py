@@ -3,6 +3,7 @@ from email.mime.text import MIMEText
 from passlib.hash import pbkdf2_sha256
 from itsdangerous import URLSafeTimedSerializer
 from db import db
+from metrics import SMTP_SEND_SECONDS, observe
 import smtplib
 from flask import Blueprint, request, jsonify
 import os
@@ -91,7 +92,7 @@ def send_reset_email(email, verification_code, name):
 
     # Connect to the SMTP server and send the email
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        with observe(SMTP_SEND_SECONDS, purpose="verification_code"), smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
             server.login(MY_EMAIL, MY_PASSWORD)
             server.sendmail(MY_EMAIL, [email], msg.as_string())
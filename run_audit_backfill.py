@@ -0,0 +1,45 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\run_audit_backfill.py
+"""
+Copies existing activity-log rows into audit_events (see audit_log.py):
+    python run_audit_backfill.py
+    python run_audit_backfill.py --types harvest,sale --batch-size 500
+Safe to re-run; rows already copied are skipped. Set ACTIVITY_LOG_READS=audit_events
+on the web process once it has finished.
+"""
+import sys
+import os
+import argparse
+
+# --- Project Setup ---
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# --- Flask App and DB ---
+try:
+    from app import app
+except ImportError as e:
+    print(f"Error importing Flask app: {e}")
+    sys.exit(1)
+
+from audit_log import AUDIT_SOURCES, BACKFILL_BATCH_SIZE, backfill_audit_events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill audit_events from the legacy activity-log tables.")
+    parser.add_argument("--types", help=f"Comma-separated log types (default: all of {', '.join(AUDIT_SOURCES)}).")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Log rows per transaction.")
+    args = parser.parse_args()
+
+    log_types = [name.strip() for name in args.types.split(",")] if args.types else None
+    unknown = [name for name in log_types or [] if name not in AUDIT_SOURCES]
+    if unknown:
+        print(f"Unknown log type(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    with app.app_context():
+        copied = backfill_audit_events(
+            log_types, batch_size=args.batch_size,
+            progress=lambda log_type, last_id, count: print(f"{log_type}: up to log_id {last_id}, {count} copied"),
+        )
+    print(f"Audit backfill finished: {copied}")
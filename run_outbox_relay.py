@@ -0,0 +1,55 @@
+#C:\Users\Giebert\PycharmProjects\agreemo_api_v2\run_outbox_relay.py
+"""
+Runs the outbox relay in its own process (e.g. a Heroku worker dyno):
+    python run_outbox_relay.py --interval 2
+Set OUTBOX_RELAY_IN_WEB=false on the web process when using this.
+"""
+import sys
+import os
+import time
+import argparse
+
+# --- Project Setup ---
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# --- Flask App and DB ---
+from flask import Flask
+from dotenv import load_dotenv, find_dotenv
+
+from db import db
+from metrics import engine_options
+import models # Configures every mapper the outbox hooks may see
+from outbox import relay_outbox
+import sync # Keeps the GET /sync channels' events for SYNC_RETENTION_DAYS when pruning
+
+
+def create_relay_app():
+    """
+    Flask app with only the database configured. Importing app.py would also start the
+    scheduler, the Firebase listeners and the sensor stream in this process.
+    """
+    load_dotenv(find_dotenv())
+    relay_app = Flask(__name__)
+    relay_app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DB_URI", "sqlite:///agreemo.db")
+    relay_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(relay_app.config['SQLALCHEMY_DATABASE_URI'])
+    db.init_app(relay_app)
+    return relay_app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver outbox events to their consumers.")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when there is nothing to deliver.")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit.")
+    args = parser.parse_args()
+
+    app = create_relay_app()
+    while True:
+        delivered = relay_outbox(app)
+        if any(delivered.values()):
+            print(f"Outbox relay delivered: {delivered}")
+        if args.once:
+            break
+        if not any(delivered.values()):
+            time.sleep(args.interval)
@@ -0,0 +1,209 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\sales_analytics.py
+"""
+Harvest, rejection and sales totals computed in the database.
+
+summarize() runs one GROUP BY per table (harvests, reason_for_rejection, sales)
+and merges the grouped rows in Python, so a summary costs three small queries
+returning one row per group instead of every record in the range.
+
+Groups:
+- greenhouse / plant: a sale counts for the greenhouse and plant of the harvest
+  or rejection it was sold from;
+- day / month: harvest_date, rejection_date and the PH date of salesDate.
+from/to (YYYY-MM-DD, `to` exclusive) are matched against the same dates.
+"""
+from datetime import datetime
+
+import pytz
+from sqlalchemy import func, select
+
+from db import db
+from models.harvest_model import Harvest
+from models.reason_for_rejection_model import ReasonForRejection
+from models.sale_model import Sale
+
+PH_TZ = pytz.timezone('Asia/Manila')
+GROUP_BY_OPTIONS = ("greenhouse", "plant", "day", "month")
+# group_by: (PostgreSQL to_char format, SQLite strftime format)
+PERIOD_FORMATS = {
+    "day": ("YYYY-MM-DD", "%Y-%m-%d"),
+    "month": ("YYYY-MM", "%Y-%m"),
+}
+# Asia/Manila has no DST, so a fixed offset is exact (used where the database has no time zones)
+PH_OFFSET_HOURS = int(PH_TZ.utcoffset(datetime(2000, 1, 1)).total_seconds() // 3600)
+
+
+class SummaryQueryError(ValueError):
+    """Invalid summary arguments; details maps each argument to its message."""
+
+    def __init__(self, details):
+        super().__init__("Validation failed.")
+        self.details = details
+
+
+def _period(column, group_by, utc_timestamp=False):
+    """SQL expression labelling the day or month of column; utc_timestamp columns are converted to PH time first."""
+    pg_format, sqlite_format = PERIOD_FORMATS[group_by]
+    if db.session.get_bind().dialect.name == "postgresql":
+        if utc_timestamp:
+            column = func.timezone(PH_TZ.zone, column)
+        return func.to_char(column, pg_format)
+    if utc_timestamp:
+        column = func.datetime(column, f"{PH_OFFSET_HOURS:+d} hours")
+    return func.strftime(sqlite_format, column)
+
+
+def _sale_source(attribute):
+    """Column of the harvest or rejection a sale was sold from (joined in _sales_query)."""
+    return func.coalesce(getattr(Harvest, attribute), getattr(ReasonForRejection, attribute))
+
+
+def _group_keys(group_by):
+    """(harvest key, rejection key, sale key) expressions for group_by."""
+    if group_by == "greenhouse":
+        return Harvest.greenhouse_id, ReasonForRejection.greenhouse_id, _sale_source("greenhouse_id")
+    if group_by == "plant":
+        return Harvest.plant_id, ReasonForRejection.plant_id, _sale_source("plant_id")
+    return (_period(Harvest.harvest_date, group_by),
+            _period(ReasonForRejection.rejection_date, group_by),
+            _period(Sale.salesDate, group_by, utc_timestamp=True))
+
+
+def parse_summary_args(args):
+    """Validates query args. Returns (group_by, start date, end date, greenhouse_id); raises SummaryQueryError."""
+    details = {}
+    group_by = (args.get("group_by") or "").strip().lower()
+    if group_by not in GROUP_BY_OPTIONS:
+        details["group_by"] = f"Required. One of: {', '.join(GROUP_BY_OPTIONS)}."
+    dates = {}
+    for name in ("from", "to"):
+        value = args.get(name)
+        try:
+            dates[name] = datetime.strptime(value.strip(), "%Y-%m-%d").date() if value else None
+        except ValueError:
+            details[name] = "Invalid date. Use YYYY-MM-DD."
+    greenhouse_id = None
+    if args.get("greenhouse_id"):
+        try:
+            greenhouse_id = int(args["greenhouse_id"])
+        except ValueError:
+            details["greenhouse_id"] = "Invalid greenhouse_id. Must be an integer."
+    if not details and dates["from"] and dates["to"] and dates["from"] >= dates["to"]:
+        details["range"] = "'from' must be earlier than 'to'."
+    if details:
+        raise SummaryQueryError(details)
+    return group_by, dates["from"], dates["to"], greenhouse_id
+
+
+def _date_filters(column, start, end):
+    filters = []
+    if start: filters.append(column >= start)
+    if end: filters.append(column < end)
+    return filters
+
+
+def _sale_time_filters(start, end):
+    """salesDate is stored in UTC: compare it with midnight PH time of each date, in UTC (SQLite drops offsets)."""
+    def bound(day):
+        return PH_TZ.localize(datetime(day.year, day.month, day.day)).astimezone(pytz.utc)
+    filters = []
+    if start: filters.append(Sale.salesDate >= bound(start))
+    if end: filters.append(Sale.salesDate < bound(end))
+    return filters
+
+
+def summarize(group_by, start=None, end=None, greenhouse_id=None):
+    """
+    Totals per group, ordered by group key: total_yield, accepted, rejected (from
+    harvests), rejected_by_type (from rejection records), revenue, quantity_sold,
+    average_price (revenue per unit sold) and sell_through_rate (units sold per unit
+    accepted or rejected). Returns (rows, totals).
+    """
+    harvest_key, rejection_key, sale_key = _group_keys(group_by)
+
+    harvest_query = (select(harvest_key.label("key"),
+                            func.max(Harvest.plant_name).label("plant_name"),
+                            func.sum(Harvest.total_yield).label("total_yield"),
+                            func.sum(Harvest.accepted).label("accepted"),
+                            func.sum(Harvest.total_rejected).label("rejected"))
+                     .where(*_date_filters(Harvest.harvest_date, start, end))
+                     .group_by(harvest_key))
+    rejection_query = (select(rejection_key.label("key"),
+                              func.max(ReasonForRejection.plant_name).label("plant_name"),
+                              ReasonForRejection.type,
+                              func.sum(ReasonForRejection.quantity).label("quantity"))
+                       .where(*_date_filters(ReasonForRejection.rejection_date, start, end))
+                       .group_by(rejection_key, ReasonForRejection.type))
+    sale_query = (select(sale_key.label("key"),
+                         func.max(Sale.plant_name).label("plant_name"),
+                         func.sum(Sale.total_price).label("revenue"),
+                         func.sum(Sale.quantity).label("quantity_sold"))
+                  .select_from(Sale)
+                  .outerjoin(Harvest, Sale.harvest_id == Harvest.harvest_id)
+                  .outerjoin(ReasonForRejection, Sale.rejection_id == ReasonForRejection.rejection_id)
+                  .where(*_sale_time_filters(start, end))
+                  .group_by(sale_key))
+    if greenhouse_id is not None:
+        harvest_query = harvest_query.where(Harvest.greenhouse_id == greenhouse_id)
+        rejection_query = rejection_query.where(ReasonForRejection.greenhouse_id == greenhouse_id)
+        sale_query = sale_query.where(_sale_source("greenhouse_id") == greenhouse_id)
+
+    groups = {}
+
+    def group(key, plant_name):
+        row = groups.setdefault(key, {
+            "total_yield": 0, "accepted": 0, "rejected": 0, "rejected_by_type": {},
+            "revenue": 0.0, "quantity_sold": 0.0, "plant_name": None,
+        })
+        row["plant_name"] = row["plant_name"] or plant_name
+        return row
+
+    for result in db.session.execute(harvest_query):
+        row = group(result.key, result.plant_name)
+        row["total_yield"] += result.total_yield or 0
+        row["accepted"] += result.accepted or 0
+        row["rejected"] += result.rejected or 0
+    for result in db.session.execute(rejection_query):
+        by_type = group(result.key, result.plant_name)["rejected_by_type"]
+        rejection_type = result.type or "unspecified"
+        by_type[rejection_type] = by_type.get(rejection_type, 0) + (result.quantity or 0)
+    for result in db.session.execute(sale_query):
+        row = group(result.key, result.plant_name)
+        row["revenue"] += float(result.revenue or 0)
+        row["quantity_sold"] += float(result.quantity_sold or 0)
+
+    rows = []
+    for key in sorted(groups, key=lambda key: (key is None, key if key is not None else 0)):
+        row = groups[key]
+        if group_by == "plant":
+            data = {"plant_id": key, "plant_name": row["plant_name"]}
+        elif group_by == "greenhouse":
+            data = {"greenhouse_id": key}
+        else:
+            data = {"period": key}
+        data.update(_metrics(row))
+        rows.append(data)
+
+    totals = {"total_yield": 0, "accepted": 0, "rejected": 0, "rejected_by_type": {},
+              "revenue": 0.0, "quantity_sold": 0.0}
+    for row in groups.values():
+        for name in ("total_yield", "accepted", "rejected", "revenue", "quantity_sold"):
+            totals[name] += row[name]
+        for rejection_type, quantity in row["rejected_by_type"].items():
+            totals["rejected_by_type"][rejection_type] = totals["rejected_by_type"].get(rejection_type, 0) + quantity
+    return rows, _metrics(totals)
+
+
+def _metrics(row):
+    rejected_records = sum(row["rejected_by_type"].values())
+    available = row["accepted"] + rejected_records
+    return {
+        "total_yield": row["total_yield"],
+        "accepted": row["accepted"],
+        "rejected": row["rejected"],
+        "rejected_by_type": row["rejected_by_type"],
+        "revenue": round(row["revenue"], 2),
+        "quantity_sold": row["quantity_sold"],
+        "average_price": round(row["revenue"] / row["quantity_sold"], 2) if row["quantity_sold"] else None,
+        "sell_through_rate": round(row["quantity_sold"] / available, 4) if available else None,
+    }
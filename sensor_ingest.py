@@ -0,0 +1,305 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\sensor_ingest.py
+"""
+Streaming ingestion of Firebase sensorReadings into PostgreSQL.
+
+The Firebase listener pushes every change into a bounded in-memory queue and a
+background thread flushes the queue to sensor_readings in batches, either when
+batch_size readings are waiting or flush_interval seconds have passed.
+When the queue is full the listener thread wakes the flusher and waits up to
+enqueue_timeout seconds for room (backpressure); readings that still do not fit
+are dropped and counted.
+
+Only one process streams: the one that takes the STREAM_LOCK_NAME lock
+(job_locks.py; a PostgreSQL advisory lock, so one across all dynos). It holds
+the lock until it exits, and the others keep their listeners for the latest
+values only.
+
+FakeSensorEventSource has the same listen(callback) interface as a Firebase
+reference, so the pipeline can be driven in-process without Firebase.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pytz
+
+from db import db
+from job_locks import acquire_process_lock, lock_held
+
+# Firebase child key -> unit stored in sensor_readings (same units the polling job used)
+SENSOR_UNITS = {
+    "ph": "pH",
+    "tds": "ppm",
+}
+
+DEFAULT_QUEUE_SIZE = 5000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 5.0 # seconds
+DEFAULT_COALESCE_SECONDS = 1.0 # identical values for a unit within this window are stored once
+DEFAULT_ENQUEUE_TIMEOUT = 0.5 # seconds the listener may block on a full queue before dropping
+STREAM_LOCK_NAME = "sensor_stream"
+
+
+def parse_sensor_event(event_type, path, data):
+    """
+    Turns one Firebase 'put'/'patch' event on sensorReadings into [(unit, value), ...].
+    Handles writes at the root ({"ph": {"value": 6.4}, ...}), at a sensor (/ph) and
+    at a sensor's value (/ph/value).
+    """
+    if event_type not in ("put", "patch") or data is None:
+        return []
+
+    parts = [part for part in (path or "/").split("/") if part]
+    if not parts:
+        children = data if isinstance(data, dict) else {}
+    elif len(parts) == 1:
+        children = {parts[0]: data}
+    elif len(parts) == 2 and parts[1] == "value":
+        children = {parts[0]: data}
+    else:
+        return []
+
+    readings = []
+    for key, raw in children.items():
+        unit = SENSOR_UNITS.get(str(key).lower())
+        if unit is None:
+            continue
+        value = raw.get("value") if isinstance(raw, dict) else raw
+        if value is None or isinstance(value, bool):
+            continue
+        try:
+            readings.append((unit, float(value)))
+        except (TypeError, ValueError):
+            continue
+    return readings
+
+
+class SensorIngestPipeline:
+    """Bounded queue + batch flusher between the Firebase listener and sensor_readings."""
+
+    def __init__(self, app, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, coalesce_seconds=DEFAULT_COALESCE_SECONDS,
+                 enqueue_timeout=DEFAULT_ENQUEUE_TIMEOUT, writer=None):
+        self.app = app
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.coalesce_seconds = coalesce_seconds
+        self.enqueue_timeout = enqueue_timeout
+        # writer(rows) stores one batch; defaults to the bulk insert used by POST /sensor-readings/batch
+        self.writer = writer or self._write_batch
+
+        self._queue = deque()
+        self._last_by_unit = {} # unit -> (value, received_at) of the last accepted reading
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._listener = None
+        self.lock = None # job_locks.ProcessLock held while this pipeline streams
+        self.stats = {
+            "received": 0, "enqueued": 0, "coalesced": 0, "dropped": 0,
+            "flushed": 0, "failed": 0, "batches": 0, "last_flush_at": None,
+        }
+
+    # --- Producer side (Firebase listener thread) ---
+    def handle_event(self, event):
+        """Listener callback: accepts a Firebase event (event_type, path, data)."""
+        try:
+            readings = parse_sensor_event(event.event_type, event.path, event.data)
+        except Exception as e:
+            self.app.logger.warning(f"Could not parse sensorReadings event {event.path}: {e}")
+            return
+        received_at = datetime.now(pytz.utc).replace(tzinfo=None)
+        for unit, value in readings:
+            self.enqueue(unit, value, received_at)
+
+    def enqueue(self, unit, value, reading_time):
+        with self._cond:
+            self.stats["received"] += 1
+            last = self._last_by_unit.get(unit)
+            if last and last[0] == value and (reading_time - last[1]).total_seconds() < self.coalesce_seconds:
+                self.stats["coalesced"] += 1
+                return False
+            if len(self._queue) >= self.queue_size:
+                # Backpressure: wake the flusher and give it a moment to make room
+                deadline = time.monotonic() + self.enqueue_timeout
+                while len(self._queue) >= self.queue_size and not self._stopping:
+                    self._cond.notify_all()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if len(self._queue) >= self.queue_size:
+                    self.stats["dropped"] += 1
+                    return False
+            self._queue.append({"reading_value": value, "unit": unit, "reading_time": reading_time})
+            self._last_by_unit[unit] = (value, reading_time)
+            self.stats["enqueued"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    # --- Consumer side (flusher thread) ---
+    def _take_batch(self):
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if batch:
+            self._cond.notify_all() # Wake any listener waiting for room
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stopping and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping and not self._queue:
+                    return
+                batch = self._take_batch()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            self.writer(batch)
+            with self._cond:
+                self.stats["flushed"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["last_flush_at"] = datetime.now(pytz.utc).isoformat()
+        except Exception as e:
+            with self._cond:
+                self.stats["failed"] += len(batch)
+            self.app.logger.error(f"Sensor ingest: failed to store batch of {len(batch)} reading(s): {e}", exc_info=True)
+
+    def _write_batch(self, rows):
+        # Imported here to avoid a circular import with the routes module
+        from routes.sensor_readings_routes import insert_readings_bulk
+        from sensor_rollups import update_rollups
+        with self.app.app_context():
+            try:
+                insert_readings_bulk(rows)
+                update_rollups(rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def flush_now(self):
+        """Synchronously drains everything queued (used on shutdown and in tests)."""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._flush(batch)
+
+    # --- Lifecycle ---
+    def start(self, source):
+        """Starts the flusher and subscribes to source (a Firebase reference or a fake)."""
+        self._thread = threading.Thread(target=self._run, name="sensor-ingest-flusher", daemon=True)
+        self._thread.start()
+        self._listener = source.listen(self.handle_event)
+        return self
+
+    def stop(self, timeout=10):
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except Exception as e:
+                self.app.logger.warning(f"Sensor ingest: error closing listener: {e}")
+            self._listener = None
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush_now()
+        if self.lock is not None:
+            lock, self.lock = self.lock, None
+            lock.release()
+
+    def snapshot_stats(self):
+        with self._cond:
+            return dict(self.stats, queued=len(self._queue))
+
+
+class _FakeEvent:
+    def __init__(self, event_type, path, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class _FakeRegistration:
+    def __init__(self, source, callback):
+        self._source = source
+        self._callback = callback
+
+    def close(self):
+        if self._callback in self._source._callbacks:
+            self._source._callbacks.remove(self._callback)
+
+
+class FakeSensorEventSource:
+    """In-process stand-in for firebase_db.reference('sensorReadings')."""
+
+    def __init__(self):
+        self._callbacks = []
+
+    def listen(self, callback):
+        self._callbacks.append(callback)
+        return _FakeRegistration(self, callback)
+
+    def push(self, path, data, event_type="put"):
+        event = _FakeEvent(event_type, path, data)
+        for callback in list(self._callbacks):
+            callback(event)
+
+
+def sensor_stream_running(app):
+    """
+    True while this or any other process (worker, dyno) streams sensorReadings; the
+    polling job skips its run then, or every reading would be stored twice.
+    """
+    if 'sensor_ingest' in app.extensions:
+        return True
+    with app.app_context():
+        return lock_held(STREAM_LOCK_NAME)
+
+
+def start_sensor_stream(app, source):
+    """
+    Starts streaming ingestion if enabled (SENSOR_STREAM_ENABLED, default on) and this
+    process wins the stream lock. Stores the pipeline in app.extensions['sensor_ingest'].
+    Returns the pipeline, or None if streaming is not running in this process.
+    """
+    if os.environ.get("SENSOR_STREAM_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        app.logger.info("Sensor stream disabled by SENSOR_STREAM_ENABLED.")
+        return None
+    with app.app_context():
+        lock = acquire_process_lock(STREAM_LOCK_NAME)
+    if lock is None:
+        app.logger.info(f"Sensor stream already running in another process (PID {os.getpid()} skipped).")
+        return None
+
+    pipeline = SensorIngestPipeline(
+        app,
+        queue_size=int(os.environ.get("SENSOR_STREAM_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+        batch_size=int(os.environ.get("SENSOR_STREAM_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        flush_interval=float(os.environ.get("SENSOR_STREAM_FLUSH_SECONDS", DEFAULT_FLUSH_INTERVAL)),
+    )
+    try:
+        pipeline.start(source)
+    except Exception:
+        lock.release()
+        raise
+    pipeline.lock = lock
+    atexit.register(pipeline.stop)
+    app.extensions['sensor_ingest'] = pipeline
+    app.logger.info(f"Sensor stream started in PID {os.getpid()}.")
+    return pipeline
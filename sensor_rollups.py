@@ -0,0 +1,227 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\sensor_rollups.py
+"""
+Minute / hour / day rollups for sensor_readings.
+
+Every code path that stores SensorReading rows calls update_rollups() in the same
+transaction, so the rollup table never drifts from the raw readings. Chart
+queries (GET /sensor-readings/series) then read a handful of rollup rows instead
+of every raw reading in the range.
+
+Rollup rows are upserted (INSERT ... ON CONFLICT on uq_sensor_rollup_key), so
+concurrent writers (the sensor stream, the poller, a backfill) add into the same
+bucket row instead of racing to insert it. Readings without a greenhouse go in
+greenhouse_id NO_GREENHOUSE_ID.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from db import db
+from models.sensor_reading_rollup_model import SensorReadingRollup
+from models.sensors_readings_model import SensorReading
+from greenhouse_analytics import apply_sensor_readings
+
+PH_TZ = pytz.timezone('Asia/Manila')
+
+# Rollup levels, finest first. Values are the bucket size in seconds.
+ROLLUP_LEVELS = (
+    ('minute', 60),
+    ('hour', 3600),
+    ('day', 86400),
+)
+ROLLUP_SECONDS = dict(ROLLUP_LEVELS)
+
+# Readings are stored as naive UTC, but days should start at midnight PH time.
+# Asia/Manila has no DST, so a fixed offset is exact.
+BUCKET_OFFSET = PH_TZ.utcoffset(datetime(2000, 1, 1))
+
+_EPOCH = datetime(1970, 1, 1)
+_BUCKET_SPEC_RE = re.compile(r"^(\d+)\s*([mhd])$")
+_SPEC_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+MAX_SERIES_POINTS = 2000
+NO_GREENHOUSE_ID = 0 # greenhouse_id of rollups for readings without a greenhouse
+UPSERT_BATCH_SIZE = 500 # Rollup rows per INSERT ... ON CONFLICT (bound parameter limits)
+
+
+def truncate_time(dt, seconds):
+    """Floors a naive UTC datetime to the start of its bucket (PH-aligned)."""
+    shifted = dt + BUCKET_OFFSET
+    elapsed = int((shifted - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=elapsed - (elapsed % seconds)) - BUCKET_OFFSET
+
+
+def parse_bucket_spec(spec):
+    """Parses '15m', '1h', '1d' style bucket sizes into seconds. Returns None if invalid."""
+    match = _BUCKET_SPEC_RE.match((spec or "").strip().lower())
+    if not match:
+        return None
+    seconds = int(match.group(1)) * _SPEC_UNIT_SECONDS[match.group(2)]
+    return seconds if seconds > 0 else None
+
+
+def pick_rollup_level(bucket_seconds):
+    """Returns the coarsest rollup level whose buckets tile the requested bucket size."""
+    for name, seconds in reversed(ROLLUP_LEVELS):
+        if bucket_seconds % seconds == 0:
+            return name
+    return None
+
+
+def _as_row(reading):
+    """Accepts a SensorReading (or any object with the same attributes) or a dict."""
+    if isinstance(reading, dict):
+        return (reading.get("unit"), reading.get("greenhouse_id") or NO_GREENHOUSE_ID,
+                reading.get("reading_time"), reading.get("reading_value"))
+    return (reading.unit, getattr(reading, "greenhouse_id", None) or NO_GREENHOUSE_ID,
+            reading.reading_time, reading.reading_value)
+
+
+def update_rollups(readings, analytics=True):
+    """
+    Folds new readings into the minute/hour/day rollups (and, with analytics, the
+    greenhouse analytics rows). Runs on the current session's transaction; the caller
+    commits (or rolls back) with the readings.
+    """
+    readings = list(readings)
+    if analytics:
+        apply_sensor_readings(readings)
+    # Aggregate the batch in memory first so a burst of readings costs one row update per bucket.
+    pending = {}
+    for reading in readings:
+        unit, greenhouse_id, reading_time, value = _as_row(reading)
+        if unit is None or reading_time is None or value is None:
+            continue
+        value = float(value)
+        for level, seconds in ROLLUP_LEVELS:
+            key = (level, unit, greenhouse_id, truncate_time(reading_time, seconds))
+            agg = pending.get(key)
+            if agg is None:
+                pending[key] = [value, value, value, 1, value, reading_time]
+                continue
+            agg[0] = min(agg[0], value)
+            agg[1] = max(agg[1], value)
+            agg[2] += value
+            agg[3] += 1
+            if reading_time >= agg[5]:
+                agg[4], agg[5] = value, reading_time
+
+    if not pending:
+        return 0
+
+    # Upserts in key order, so concurrent batches lock bucket rows in the same order
+    rows = [
+        {"bucket": level, "unit": unit, "greenhouse_id": greenhouse_id, "bucket_start": start,
+         "min_value": min_v, "max_value": max_v, "sum_value": sum_v, "reading_count": count,
+         "last_value": last_v, "last_time": last_t}
+        for (level, unit, greenhouse_id, start), (min_v, max_v, sum_v, count, last_v, last_t) in sorted(pending.items())
+    ]
+    postgres = db.session.get_bind().dialect.name == "postgresql"
+    least, greatest = (func.least, func.greatest) if postgres else (func.min, func.max) # SQLite: scalar min()/max()
+    table = SensorReadingRollup.__table__
+    for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = (postgresql.insert if postgres else sqlite.insert)(table).values(rows[offset:offset + UPSERT_BATCH_SIZE])
+        excluded = statement.excluded
+        newer = excluded.last_time >= table.c.last_time
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.bucket, table.c.unit, table.c.greenhouse_id, table.c.bucket_start],
+            set_={
+                "min_value": least(table.c.min_value, excluded.min_value),
+                "max_value": greatest(table.c.max_value, excluded.max_value),
+                "sum_value": table.c.sum_value + excluded.sum_value,
+                "reading_count": table.c.reading_count + excluded.reading_count,
+                "last_value": case((newer, excluded.last_value), else_=table.c.last_value),
+                "last_time": case((newer, excluded.last_time), else_=table.c.last_time),
+            })
+        db.session.execute(statement)
+    return len(pending)
+
+
+def query_series(unit, start, end, bucket_seconds, greenhouse_id=None):
+    """
+    Returns aggregated points for [start, end) in buckets of bucket_seconds, read from the
+    coarsest rollup level that tiles the bucket. start is floored to a bucket boundary.
+    """
+    level = pick_rollup_level(bucket_seconds)
+    if level is None:
+        raise ValueError("Bucket size must be a whole number of minutes.")
+    start = truncate_time(start, bucket_seconds)
+
+    query = SensorReadingRollup.query.filter(
+        SensorReadingRollup.bucket == level,
+        SensorReadingRollup.unit == unit,
+        SensorReadingRollup.bucket_start >= start,
+        SensorReadingRollup.bucket_start < end,
+    )
+    if greenhouse_id is not None:
+        query = query.filter(SensorReadingRollup.greenhouse_id == greenhouse_id)
+
+    points = {}
+    for row in query.order_by(SensorReadingRollup.bucket_start).all():
+        point_start = truncate_time(row.bucket_start, bucket_seconds)
+        point = points.get(point_start)
+        if point is None:
+            points[point_start] = {
+                "bucket_start": point_start, "min": row.min_value, "max": row.max_value,
+                "sum": row.sum_value, "count": row.reading_count,
+                "last": row.last_value, "last_time": row.last_time,
+            }
+            continue
+        point["min"] = min(point["min"], row.min_value)
+        point["max"] = max(point["max"], row.max_value)
+        point["sum"] += row.sum_value
+        point["count"] += row.reading_count
+        if row.last_time >= point["last_time"]:
+            point["last"], point["last_time"] = row.last_value, row.last_time
+
+    series = []
+    for point_start in sorted(points):
+        point = points[point_start]
+        point["mean"] = point.pop("sum") / point["count"] if point["count"] else None
+        series.append(point)
+    return level, series
+
+
+def rebuild_rollups(start=None, end=None, chunk_size=5000):
+    """
+    Recomputes rollups from raw sensor_readings for [start, end) (whole days).
+    Used to backfill history recorded before rollups existed. Commits per chunk.
+    Readings with a NULL reading_time are skipped.
+    """
+    day = ROLLUP_SECONDS['day']
+    delete_query = SensorReadingRollup.query
+    read_query = SensorReading.query
+    if start is not None:
+        start = truncate_time(start, day)
+        delete_query = delete_query.filter(SensorReadingRollup.bucket_start >= start)
+        read_query = read_query.filter(SensorReading.reading_time >= start)
+    if end is not None:
+        end = truncate_time(end, day)
+        delete_query = delete_query.filter(SensorReadingRollup.bucket_start < end)
+        read_query = read_query.filter(SensorReading.reading_time < end)
+    read_query = read_query.filter(SensorReading.reading_time.isnot(None))
+
+    delete_query.delete(synchronize_session=False)
+    db.session.commit()
+
+    # Read in time order, one keyset page at a time, so each commit touches a narrow band of buckets
+    total = 0
+    last_key = None
+    while True:
+        page_query = read_query
+        if last_key is not None:
+            page_query = page_query.filter(or_(
+                SensorReading.reading_time > last_key[0],
+                and_(SensorReading.reading_time == last_key[0], SensorReading.reading_id > last_key[1]),
+            ))
+        page = page_query.order_by(SensorReading.reading_time, SensorReading.reading_id).limit(chunk_size).all()
+        if not page:
+            break
+        last_key = (page[-1].reading_time, page[-1].reading_id)
+        update_rollups(page, analytics=False) # Analytics have their own rebuild (greenhouse_analytics.py)
+        db.session.commit()
+        total += len(page)
+    return total
@@ -0,0 +1,133 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\sync.py
+"""
+Delta sync for the mobile app (GET /sync).
+
+Every insert, update and delete of a synced table, including ORM cascades, is
+already captured in outbox_events by its own transaction (see outbox.py), so a
+sync cursor is an outbox position rather than a timestamp. A steady-state sync
+reads the synced entity types' events after the cursor and returns only the ids
+they touched.
+
+The new cursor is commit-safe: on PostgreSQL it is the delivery horizon (the
+snapshot xmin), and only events from transactions below it are read. A
+transaction still running when a sync starts is always above the horizon, so
+its changes are returned by the next sync however late it commits. SQLite runs
+one write transaction at a time, so the last event_id is the position there.
+
+The outbox keeps the synced channels' events for SYNC_RETENTION_DAYS; older
+cursors get full_resync.
+"""
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import func
+
+from db import db
+from outbox import TRACKED_MODELS, deliverable_events, delivery_horizon, retain_channel
+from models.outbox_model import OutboxEvent
+from models.harvest_model import Harvest
+from models.planted_crops_model import PlantedCrops
+from models.inventory_model import Inventory
+from models.reason_for_rejection_model import ReasonForRejection
+from models.sale_model import Sale
+
+# Entity type -> model
+SYNC_ENTITIES = {
+    "harvests": Harvest,
+    "planted_crops": PlantedCrops,
+    "inventory": Inventory,
+    "rejections": ReasonForRejection,
+    "sales": Sale,
+}
+
+SYNC_RETENTION_DAYS = int(os.environ.get("SYNC_RETENTION_DAYS", 30))
+# More changes than this for one entity type and the client is told to reload it instead
+MAX_IDS_PER_ENTITY = 5000
+
+for _model in SYNC_ENTITIES.values():
+    retain_channel(TRACKED_MODELS[_model][0], SYNC_RETENTION_DAYS * 24)
+
+
+def _utcnow():
+    return datetime.now(pytz.utc)
+
+
+# --- Cursors ---
+def encode_sync_cursor(position, server_time):
+    """Opaque cursor for an outbox (transaction_id, event_id) position issued at server_time."""
+    raw = json.dumps([server_time.isoformat(), list(position)])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(cursor):
+    """
+    Returns (position, issued_at) from cursor, or None for a timestamp-only cursor
+    from before sync read the outbox (the client then resyncs).
+    Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        time_str, position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        issued_at = datetime.fromisoformat(time_str)
+        if not isinstance(position, list):
+            return None
+        transaction_id, event_id = (int(value) for value in position)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    return (transaction_id, event_id), (issued_at if issued_at.tzinfo else pytz.utc.localize(issued_at))
+
+
+def _head_position():
+    """Position every change visible to a sync starting now is at or below."""
+    horizon = delivery_horizon()
+    if horizon is not None:
+        return horizon, (horizon, 0)
+    return None, (0, db.session.query(func.max(OutboxEvent.event_id)).scalar() or 0)
+
+
+# --- Query ---
+def _entity_changes(entity_type, since, horizon, head):
+    outbox_type = TRACKED_MODELS[SYNC_ENTITIES[entity_type]][1]
+    query = (deliverable_events(since, horizon)
+             .filter(OutboxEvent.entity_type == outbox_type))
+    if horizon is None:
+        query = query.filter(OutboxEvent.event_id <= head[1])
+    events = query.with_entities(OutboxEvent.entity_id, OutboxEvent.action).limit(MAX_IDS_PER_ENTITY + 1).all()
+
+    if len(events) > MAX_IDS_PER_ENTITY:
+        return {"reset": True}
+    latest = {}
+    for entity_id, action in events: # Delivery order, so the last action per id wins
+        if entity_id is None:
+            # bulk_update / bulk_delete do not report ids: make the client reload the collection
+            return {"reset": True}
+        latest[int(entity_id)] = action
+    return {
+        "upserted": sorted(entity_id for entity_id, action in latest.items() if action != "delete"),
+        "deleted": sorted(entity_id for entity_id, action in latest.items() if action == "delete"),
+    }
+
+
+def changes_since(since, entity_types=None):
+    """
+    Returns the GET /sync body for a decoded cursor since (None for a first sync).
+    Entity types without changes are omitted, so an idle sync is just a new cursor.
+    """
+    now = _utcnow()
+    entity_types = entity_types or list(SYNC_ENTITIES)
+    horizon, head = _head_position()
+    body = {"cursor": encode_sync_cursor(head, now), "server_time": now.isoformat(), "full_resync": False, "changes": {}}
+
+    if since is None or since[1] < now - timedelta(days=SYNC_RETENTION_DAYS):
+        # No baseline, or events since then may already be pruned: reload every collection
+        body["full_resync"] = True
+        return body
+
+    for entity_type in entity_types:
+        changes = _entity_changes(entity_type, since[0], horizon, head)
+        if changes.get("reset") or changes["upserted"] or changes["deleted"]:
+            body["changes"][entity_type] = changes
+    return body
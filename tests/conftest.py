@@ -0,0 +1,38 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configuration is read at import time, so it is set before the app is imported
+_work_dir = tempfile.mkdtemp(prefix="agreemo_tests_")
+os.environ["DB_URI"] = f"sqlite:///{os.path.join(_work_dir, 'test.db')}"
+os.environ["API_KEY"] = "test-api-key"
+os.environ["ARCHIVE_DIR"] = os.path.join(_work_dir, "archive")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, scheduler # noqa: E402
+from db import db # noqa: E402
+
+scheduler.shutdown(wait=False)
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def api_headers():
+    return {"x-api-key": os.environ["API_KEY"]}
@@ -0,0 +1,126 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_activity_log_queries.py
+import decimal
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+from sqlalchemy import Enum, event, inspect
+
+from activity_log_queries import LOG_SOURCES
+from audit_log import log_page_query_budget
+from db import db
+from models.activity_logs.greenhouse_activity_logs_model import GreenHouseActivityLogs
+from models.activity_logs.inventory_container_activity_logs import InventoryContainerLog
+
+PH_TZ = pytz.timezone('Asia/Manila')
+
+
+def _value(column, index):
+    """A valid value for column in the index-th seeded row."""
+    if column.foreign_keys:
+        # Referenced rows do not exist (SQLite does not enforce foreign keys): a relationship the
+        # page query does not join would cost one lazy load per row
+        return index + 1
+    if isinstance(column.type, Enum):
+        return column.type.enums[0]
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.now() - timedelta(minutes=index)
+    if python_type is date:
+        return date.today()
+    if python_type is bool:
+        return False
+    if python_type in (int, float, decimal.Decimal):
+        return python_type(index + 1)
+    if python_type is str:
+        return f"{column.key[:4]}{index}"
+    return None
+
+
+def _add_rows(model, count):
+    mapper = inspect(model)
+    for index in range(count):
+        values = {}
+        for attribute in mapper.column_attrs:
+            column = attribute.columns[0]
+            if column in mapper.primary_key or (column.nullable and not column.foreign_keys):
+                continue
+            values[attribute.key] = _value(column, index)
+        db.session.add(model(**values))
+    db.session.commit()
+
+
+@contextmanager
+def _count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.parametrize("log_type", sorted(LOG_SOURCES))
+def test_log_page_statement_count_does_not_grow_with_rows(app, client, api_headers, log_type):
+    model = LOG_SOURCES[log_type].model
+    counts = []
+    for added, total in ((1, 1), (9, 10)):
+        _add_rows(model, added)
+        db.session.expunge_all()
+        with _count_statements() as statements:
+            response = client.get(f"/activity_logs/{log_type}", headers=api_headers)
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()["count"] == total
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert counts[1] <= log_page_query_budget(log_type)
+
+
+def _page_through(client, api_headers, log_type, response_key, **params):
+    log_ids, cursor = [], None
+    for _ in range(10):
+        query = dict(params, limit=2, **({"cursor": cursor} if cursor else {}))
+        response = client.get(f"/activity_logs/{log_type}", query_string=query, headers=api_headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        log_ids += [log["log_id"] for log in body[response_key]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return log_ids
+    pytest.fail("next_cursor never ran out")
+
+
+def test_cursor_paging_through_time_zone_aware_logs(app, client, api_headers):
+    now = datetime.now(pytz.utc)
+    # Two rows share a timestamp: the cursor breaks the tie on log_id
+    for minutes in (0, 5, 5, 10, 20):
+        db.session.add(InventoryContainerLog(inventory_container_id=1, user_id=1, change_type="update",
+                                             timestamp=now - timedelta(minutes=minutes)))
+    db.session.commit()
+    newest_first = [log.log_id for log in InventoryContainerLog.query.order_by(
+        InventoryContainerLog.timestamp.desc(), InventoryContainerLog.log_id.desc())]
+
+    assert _page_through(client, api_headers, "inventory_container", "inventory_container_logs") == newest_first
+    since = (now - timedelta(minutes=7)).isoformat()
+    assert _page_through(client, api_headers, "inventory_container", "inventory_container_logs",
+                         **{"from": since}) == newest_first[:3]
+
+
+def test_cursor_paging_through_naive_logs(app, client, api_headers):
+    now = datetime.now(PH_TZ).replace(tzinfo=None) # Naive log times are PH time
+    for minutes in (0, 5, 5, 10, 20):
+        db.session.add(GreenHouseActivityLogs(login_id=1, greenhouse_id=1, logs_description="watered",
+                                              log_date=now - timedelta(minutes=minutes)))
+    db.session.commit()
+    newest_first = [log.log_id for log in GreenHouseActivityLogs.query.order_by(
+        GreenHouseActivityLogs.log_date.desc(), GreenHouseActivityLogs.log_id.desc())]
+
+    assert _page_through(client, api_headers, "greenhouse", "greenhouse_logs") == newest_first
+    until = (now - timedelta(minutes=7)).isoformat()
+    assert _page_through(client, api_headers, "greenhouse", "greenhouse_logs", to=until) == newest_first[3:]
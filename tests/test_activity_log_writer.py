@@ -0,0 +1,43 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_activity_log_writer.py
+from datetime import date, datetime
+
+import pytest
+
+from activity_log_writer import ActivityLogWriter, write_log
+from db import db
+from models import Users
+from models.activity_logs.user_activity_logs_model import UserActivityLogs
+
+
+@pytest.fixture
+def writer(app):
+    writer = ActivityLogWriter(app, flush_interval=60) # Not started: flushed explicitly below
+    app.extensions['activity_log_writer'] = writer
+    yield writer
+    app.extensions.pop('activity_log_writer')
+
+
+def _log(**fields):
+    return write_log(UserActivityLogs, logs_description="signed in", log_date=datetime.now(), **fields)
+
+
+def test_log_is_queued_when_the_transaction_has_no_writes(app, writer):
+    assert _log() is None
+    assert UserActivityLogs.query.count() == 0
+
+    writer.flush_now()
+
+    assert UserActivityLogs.query.count() == 1
+
+
+def test_log_is_written_with_flushed_but_uncommitted_changes(app, writer):
+    db.session.add(Users(first_name="Ana", last_name="Cruz", email="ana@example.com", password="x",
+                         date_of_birth=date(2000, 1, 1)))
+    db.session.flush() # The session has no pending objects now, but the transaction has writes
+
+    assert _log() is not None
+
+    db.session.rollback()
+    assert Users.query.count() == 1 # write_log() committed the user together with the log
+    assert UserActivityLogs.query.count() == 1
+    assert writer.snapshot_stats()["enqueued"] == 0
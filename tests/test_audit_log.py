@@ -0,0 +1,56 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_audit_log.py
+from datetime import datetime
+
+from db import db
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.audit_event_model import AuditEvent
+from models.activity_logs.control_activity_logs_model import ControlActivityLogs
+
+
+def _seed_status_logs(greenhouse_ids):
+    for greenhouse_id in greenhouse_ids:
+        db.session.add(HardwareStatusActivityLogs(logs_description=f"pump on in {greenhouse_id}", timestamp=datetime.now(),
+                                                  status=True, greenhouse_id=greenhouse_id))
+    db.session.commit()
+
+
+def _audited_greenhouses():
+    return sorted(event.greenhouse_id for event in AuditEvent.query)
+
+
+def test_filtered_bulk_delete_removes_only_matching_audit_rows(app):
+    _seed_status_logs([1, 1, 2])
+    assert _audited_greenhouses() == [1, 1, 2]
+
+    HardwareStatusActivityLogs.query.filter_by(greenhouse_id=1).delete(synchronize_session=False)
+    db.session.commit()
+
+    assert _audited_greenhouses() == [2]
+
+
+def test_unfiltered_bulk_delete_clears_the_log_type(app):
+    _seed_status_logs([1, 2])
+
+    HardwareStatusActivityLogs.query.delete()
+    db.session.commit()
+
+    assert _audited_greenhouses() == []
+
+
+def test_rolled_back_bulk_delete_keeps_audit_rows(app):
+    _seed_status_logs([1])
+
+    HardwareStatusActivityLogs.query.filter_by(greenhouse_id=1).delete(synchronize_session=False)
+    db.session.rollback()
+
+    assert _audited_greenhouses() == [1]
+
+
+def test_audit_payload_includes_server_default_columns(app):
+    db.session.add(ControlActivityLogs(logs_description="pump1 on", pump1=True))
+    db.session.commit()
+
+    log = ControlActivityLogs.query.one()
+    audit_event = AuditEvent.query.filter_by(entity_type="control").one()
+    assert audit_event.payload["log_date"] == log.log_date.isoformat()
+    assert audit_event.payload["log_id"] == log.log_id
@@ -0,0 +1,45 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_callbacks.py
+from datetime import date
+
+from callbacks import UserCache, socket_message
+from db import db
+from models import Users
+
+
+def _change(channel, data):
+    return {"channel": channel, "action": "insert", "event_id": 7, "payload": {"data": data}}
+
+
+def _add_user():
+    user = Users(first_name="Ana", last_name="Cruz", email="ana@example.com", password="x",
+                 date_of_birth=date(2000, 1, 1))
+    db.session.add(user)
+    db.session.commit()
+    return user.user_id
+
+
+def test_harvest_update_keeps_the_legacy_fields(app):
+    user_id = _add_user()
+
+    message = socket_message(_change("harvests_updates", {
+        "harvest_id": 1, "user_id": user_id, "harvest_date": "2026-10-17", "notes": None}), UserCache(app))
+
+    assert message["harvest_date"] == "2026-10-17"
+    assert message["full_name"] == "Ana Cruz"
+    assert message["action"] == "insert" and message["event_id"] == 7
+
+
+def test_maintenance_update_keeps_email_and_datetime_format(app):
+    user_id = _add_user()
+
+    message = socket_message(_change("maintenance_updates", {
+        "maintenance_id": 1, "user_id": user_id, "date_completed": "2026-10-17T08:05:09"}), UserCache(app))
+
+    assert message["date_completed"] == "2026-10-17 08:05:09"
+    assert message["email"] == "ana@example.com"
+
+
+def test_log_dates_use_the_legacy_format(app):
+    message = socket_message(_change("admin_logs_updates", {"log_id": 3, "log_date": "2026-10-17T08:05:09.123456"}))
+
+    assert message["log_date"] == "2026-10-17 08:05:09"
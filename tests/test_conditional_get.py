@@ -0,0 +1,79 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_conditional_get.py
+from flask import jsonify
+
+from conditional_get import collection_etag
+from db import db
+from models.reason_for_rejection_model import ReasonForRejection
+
+
+def _rejection(quantity):
+    rejection = ReasonForRejection(greenhouse_id=1, plant_id=1, quantity=quantity, price=10.0,
+                                   deduction_rate=0.0, total_price=10.0 * quantity)
+    db.session.add(rejection)
+    db.session.commit()
+    return rejection
+
+
+class CountingView:
+    def __init__(self):
+        self.calls = 0
+        self.view = collection_etag(ReasonForRejection.updated_at)(self.list_rejections)
+
+    def list_rejections(self):
+        self.calls += 1
+        return jsonify(count=ReasonForRejection.query.count()), 200
+
+    def get(self, app, headers):
+        with app.test_request_context("/rejections", headers=headers):
+            return app.make_response(self.view())
+
+
+def test_matching_if_none_match_is_answered_before_the_view_runs(app, api_headers):
+    _rejection(1)
+    counting = CountingView()
+
+    first = counting.get(app, api_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    second = counting.get(app, dict(api_headers, **{"If-None-Match": etag}))
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert counting.calls == 1
+
+
+def test_etag_changes_after_insert_update_and_delete(app, api_headers):
+    first = _rejection(1)
+    counting = CountingView()
+    etags = [counting.get(app, api_headers).headers["ETag"]]
+
+    second = _rejection(2)
+    etags.append(counting.get(app, api_headers).headers["ETag"])
+
+    first.quantity = 3
+    db.session.commit()
+    etags.append(counting.get(app, api_headers).headers["ETag"])
+
+    db.session.delete(second)
+    db.session.commit()
+    etags.append(counting.get(app, api_headers).headers["ETag"])
+
+    assert len(set(etags)) == 4
+    # A stale ETag gets the full response again
+    response = counting.get(app, dict(api_headers, **{"If-None-Match": etags[0]}))
+    assert response.status_code == 200
+
+
+def test_requests_without_the_api_key_reach_the_view(app):
+    counting = CountingView()
+    response = counting.get(app, {"x-api-key": "wrong"})
+    assert "ETag" not in response.headers
+    assert counting.calls == 1
+
+
+def test_collection_route_answers_304(client, api_headers):
+    etag = client.get("/planted_crops", headers=api_headers).headers["ETag"]
+    response = client.get("/planted_crops", headers=dict(api_headers, **{"If-None-Match": etag}))
+    assert response.status_code == 304
+    assert response.data == b""
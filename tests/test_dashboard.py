@@ -0,0 +1,42 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_dashboard.py
+from datetime import date
+
+from dashboard_snapshots import refresh_snapshot
+from db import db
+from models import Users
+from models.greenhouses_model import Greenhouse
+
+
+def _add_greenhouse():
+    user = Users(first_name="Ana", last_name="Cruz", email="ana@example.com", password="x",
+                 date_of_birth=date(2000, 1, 1))
+    db.session.add(user)
+    db.session.flush()
+    greenhouse = Greenhouse(user_id=user.user_id, name="GH 1", status="Active")
+    db.session.add(greenhouse)
+    db.session.commit()
+    return greenhouse.greenhouse_id
+
+
+def test_refresh_keeps_changed_at_while_the_dashboard_is_unchanged(app):
+    greenhouse_id = _add_greenhouse()
+    first = refresh_snapshot(greenhouse_id)
+    etag, changed_at, refreshed_at = first.etag, first.changed_at, first.refreshed_at
+
+    second = refresh_snapshot(greenhouse_id)
+
+    assert second.etag == etag
+    assert second.changed_at == changed_at
+    assert second.refreshed_at > refreshed_at
+
+
+def test_dashboard_etag_is_weak_and_revalidates(client, api_headers):
+    with client.application.app_context():
+        greenhouse_id = _add_greenhouse()
+
+    response = client.get(f"/dashboard/{greenhouse_id}", headers=api_headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('W/"')
+
+    refresh_headers = dict(api_headers, **{"If-None-Match": response.headers["ETag"]})
+    assert client.get(f"/dashboard/{greenhouse_id}", headers=refresh_headers).status_code == 304
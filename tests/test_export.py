@@ -0,0 +1,39 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_export.py
+import json
+
+import pytest
+
+from export import stream_export
+
+
+def _failing_rows():
+    yield {"id": 1}
+    raise RuntimeError("connection lost")
+
+
+def test_empty_csv_export_still_has_the_header(client, api_headers):
+    response = client.get("/sales?format=csv", headers=api_headers)
+
+    assert response.status_code == 200
+    assert response.data.decode().splitlines() == [
+        "sale_id,user_id,harvest_id,rejection_id,plant_name,originalPrice,currentPrice,quantity,"
+        "total_price,cropDescription,created_at,name"]
+
+
+def test_ndjson_export_ends_with_an_error_line_when_it_fails(app):
+    with app.test_request_context():
+        response = stream_export(_failing_rows(), dict, "ndjson", "rows")
+        lines = [json.loads(line) for line in response.response]
+
+    assert lines[0] == {"id": 1}
+    assert "error" in lines[-1]
+
+
+def test_csv_export_is_aborted_when_it_fails(app):
+    with app.test_request_context():
+        response = stream_export(_failing_rows(), dict, "csv", "rows")
+        body = iter(response.response)
+
+        assert next(body) == "id\r\n1\r\n"
+        with pytest.raises(RuntimeError):
+            next(body)
@@ -0,0 +1,84 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_greenhouse_analytics.py
+from datetime import date, datetime
+
+from db import db
+from greenhouse_analytics import analytics_row, rebuild_analytics
+from models.analytics_model import Analytics
+from models.harvest_model import Harvest
+from models.nutrient_controllers_model import NutrientController
+
+DAY = date(2026, 3, 14)
+
+
+def _harvest(greenhouse_id=1, total_yield=10, harvest_date=DAY):
+    harvest = Harvest(user_id=1, greenhouse_id=greenhouse_id, plant_id=1, plant_name="Lettuce", name="Batch",
+                      plant_type="Leafy", total_yield=total_yield, accepted=total_yield, total_rejected=0,
+                      harvest_date=harvest_date, price=5.0, total_price=5.0 * total_yield)
+    db.session.add(harvest)
+    db.session.commit() # Expires the instance, as a route handler's later changes would see it
+    return harvest
+
+
+def _yield(greenhouse_id, period="Daily", day=DAY):
+    row = analytics_row(greenhouse_id, period, day)
+    return row.yield_prediction if row else None
+
+
+def test_insert_adds_to_every_period(app):
+    _harvest(total_yield=10)
+    _harvest(total_yield=5, harvest_date=date(2026, 3, 20))
+
+    assert _yield(1) == 10
+    assert _yield(1, "Monthly") == 15
+    assert _yield(1, "Yearly") == 15
+
+
+def test_update_of_an_expired_instance_moves_its_yield(app):
+    harvest = _harvest(total_yield=10)
+
+    harvest.total_yield = 12
+    db.session.commit()
+    assert _yield(1) == 12
+
+    harvest.greenhouse_id = 2
+    db.session.commit()
+    assert (_yield(1), _yield(2)) == (0, 12)
+
+    harvest.harvest_date = date(2026, 4, 1)
+    db.session.commit()
+    assert (_yield(2), _yield(2, day=date(2026, 4, 1))) == (0, 12)
+    assert (_yield(2, "Monthly"), _yield(2, "Monthly", date(2026, 4, 1)), _yield(2, "Yearly")) == (0, 12, 12)
+
+
+def test_delete_of_an_expired_instance_subtracts_its_yield(app):
+    harvest = _harvest(total_yield=10)
+    _harvest(total_yield=4)
+
+    db.session.delete(harvest)
+    db.session.commit()
+
+    assert (_yield(1), _yield(1, "Monthly")) == (4, 4)
+
+
+def test_nutrient_controller_events_count_as_activations(app):
+    controller = NutrientController(greenhouse_id=1, plant_id=1, plant_name="Lettuce", solution_type="pH Up",
+                                    dispensed_amount=5.0, activated_by="System", dispensed_time=datetime(2026, 3, 14, 8))
+    db.session.add(controller)
+    db.session.commit()
+    assert analytics_row(1, "Daily", DAY).sensor_activations == 1
+
+    db.session.delete(controller)
+    db.session.commit()
+    assert analytics_row(1, "Daily", DAY).sensor_activations == 0
+
+
+def test_rebuild_recomputes_a_date_range(app):
+    _harvest(total_yield=10)
+    _harvest(total_yield=5, harvest_date=date(2026, 3, 20))
+    Analytics.query.update({Analytics.yield_prediction: 999})
+    db.session.commit()
+
+    assert rebuild_analytics(date(2026, 3, 1), date(2026, 4, 1)) == 2
+
+    assert (_yield(1), _yield(1, day=date(2026, 3, 20))) == (10, 5)
+    assert (_yield(1, "Monthly"), _yield(1, "Yearly")) == (15, 15)
@@ -0,0 +1,117 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_latest_values_cache.py
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import routes.control_routes as control_routes
+import routes.sensor_readings_routes as sensor_readings_routes
+from latest_values_cache import LatestValueCache
+
+
+class FakeFirebase:
+    """Stands in for firebase_admin.db: reference(path).get() returns data[path] and counts reads."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+
+    def reference(self, path):
+        return SimpleNamespace(get=lambda: self.reads.append(path) or self.data.get(path))
+
+
+def _event(event_type, path, data):
+    return SimpleNamespace(event_type=event_type, path=path, data=data)
+
+
+def test_listener_events_update_the_cached_snapshot():
+    cache = LatestValueCache(ttl_seconds=60)
+    cache.apply_event("sensorReadings", _event("put", "/", {"ph": {"value": 6.4}, "tds": {"value": 800}}))
+    cache.apply_event("sensorReadings", _event("put", "/ph/value", 6.5))
+    cache.apply_event("sensorReadings", _event("patch", "/", {"tds": None, "ec": 1.2}))
+
+    snapshot, _, _, source = cache.get_or_fetch("sensorReadings", lambda: pytest.fail("fresh entries are not refetched"))
+    assert source == "cache"
+    assert snapshot == {"ph": {"value": 6.5}, "ec": 1.2}
+
+
+def test_cold_and_stale_paths_are_fetched_once():
+    cache = LatestValueCache(ttl_seconds=0.2)
+    fetches = []
+
+    def slow_fetch():
+        fetches.append(1)
+        time.sleep(0.02)
+        return {"pump1": True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("pumpControl", slow_fetch)[3]))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(fetches) == 1
+    assert sorted(results) == ["cache"] * 4 + ["firebase"]
+
+    time.sleep(0.25)
+    assert cache.get_or_fetch("pumpControl", slow_fetch)[3] == "firebase"
+    assert len(fetches) == 2
+
+
+@pytest.fixture
+def firebase(monkeypatch):
+    fake = FakeFirebase({"pumpControl": {"pump1": True, "pump2": False},
+                         "sensorReadings": {"ph": {"value": 6.4}, "tds": {"value": 820}}})
+    cache = LatestValueCache(ttl_seconds=60)
+    monkeypatch.setattr(control_routes, "db", fake)
+    monkeypatch.setattr(control_routes, "latest_values", cache)
+    monkeypatch.setattr(sensor_readings_routes, "firebase_db", fake)
+    monkeypatch.setattr(sensor_readings_routes, "latest_values", cache)
+    monkeypatch.setattr(sensor_readings_routes.firebase_admin, "_apps", {"[DEFAULT]": object()})
+    return fake, cache
+
+
+def test_control_falls_back_to_firebase_while_the_listener_is_down(app, client, api_headers, firebase, monkeypatch):
+    monkeypatch.delitem(app.config, "FIREBASE_INIT_ERROR", raising=False)
+    fake, cache = firebase
+
+    response = client.get("/control", headers=api_headers)
+    assert response.status_code == 200
+    assert response.get_json() == {"pump1": True, "pump2": False}
+    assert response.headers["X-Cache-Source"] == "firebase"
+
+    # A listener event keeps the next poll in memory
+    cache.apply_event("pumpControl", _event("patch", "/", {"pump2": True}))
+    response = client.get("/control", headers=api_headers)
+    assert response.headers["X-Cache-Source"] == "cache"
+    assert response.get_json() == {"pump1": True, "pump2": True}
+    assert fake.reads == ["pumpControl"]
+
+
+def test_sensor_poll_refetches_a_stale_snapshot(app, client, api_headers, firebase, monkeypatch):
+    monkeypatch.delitem(app.config, "FIREBASE_INIT_ERROR", raising=False)
+    fake, cache = firebase
+
+    first = client.get("/sensor-readings/firebase", headers=api_headers).get_json()
+    assert first["source"] == "firebase"
+    assert (first["firebase_readings"]["ph"]["value"], first["firebase_readings"]["tds"]["value"]) == (6.4, 820)
+
+    assert client.get("/sensor-readings/firebase", headers=api_headers).get_json()["source"] == "cache"
+
+    cache.ttl_seconds = 0 # Listener down: the snapshot goes stale and is read again
+    fake.data["sensorReadings"] = {"ph": {"value": 6.9}}
+    stale = client.get("/sensor-readings/firebase", headers=api_headers).get_json()
+    assert stale["source"] == "firebase"
+    assert (stale["firebase_readings"]["ph"]["value"], stale["firebase_readings"]["tds"]) == (6.9, None)
+    assert fake.reads == ["sensorReadings", "sensorReadings"]
+
+
+def test_sensor_poll_reports_firebase_initialization_errors(app, client, api_headers, firebase, monkeypatch):
+    monkeypatch.setitem(app.config, "FIREBASE_INIT_ERROR", "missing credentials")
+
+    response = client.get("/sensor-readings/firebase", headers=api_headers)
+
+    assert response.status_code == 503
+    assert firebase[0].reads == []
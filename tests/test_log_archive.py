@@ -0,0 +1,73 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_log_archive.py
+import os
+from datetime import datetime, timedelta
+
+import pytz
+
+import log_archive
+from archive_store import ARCHIVE_DIR, list_manifests
+from db import db
+from models import Users
+from models.activity_logs.harvest_activity_logs_model import HarvestActivityLogs
+from models.activity_logs.inventory_container_activity_logs import InventoryContainerLog
+
+
+def _seed_harvest_logs(days_ago):
+    user = Users(first_name="Ana", last_name="Cruz", email="ana@example.com", password="x",
+                 date_of_birth=datetime(2000, 1, 1), phone_number="1", address="x")
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.now()
+    for days in days_ago:
+        db.session.add(HarvestActivityLogs(login_id=user.user_id, harvest_id=days, logs_description=f"log {days}",
+                                           log_date=now - timedelta(days=days)))
+    db.session.commit()
+
+
+def test_archive_then_read_back(app):
+    _seed_harvest_logs([1, 50, 100, 200, 400])
+
+    archived = log_archive.archive_logs(["harvest"], batch_size=2)
+
+    assert archived == {"harvest": 3}
+    assert sorted(log.logs_description for log in HarvestActivityLogs.query) == ["log 1", "log 50"]
+    manifests = list_manifests("harvest_activity_logs")
+    assert sum(manifest["rows"] for manifest in manifests) == 3
+    # Only complete archives and manifests are left behind
+    assert not [name for name in os.listdir(os.path.join(ARCHIVE_DIR, "harvest_activity_logs"))
+                if name.endswith(".partial")]
+
+    rows = list(log_archive.stream_log_rows("harvest", {"from": "2000-01-01"}))
+    assert [row.logs_description for row in rows] == ["log 1", "log 50", "log 100", "log 200", "log 400"]
+
+
+def test_archive_skips_run_when_lock_is_held(app, monkeypatch):
+    _seed_harvest_logs([200])
+
+    class HeldLock:
+        def __enter__(self):
+            return False
+
+        def __exit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(log_archive, "job_lock", lambda name: HeldLock())
+
+    assert log_archive.archive_logs(["harvest"]) is None
+    assert HarvestActivityLogs.query.count() == 1
+
+
+def test_archive_then_read_back_time_zone_aware_logs(app):
+    now = datetime.now(pytz.utc)
+    for days in [1, 100, 200]:
+        db.session.add(InventoryContainerLog(inventory_container_id=days, user_id=1, change_type="update",
+                                             description=f"log {days}", timestamp=now - timedelta(days=days)))
+    db.session.commit()
+
+    assert log_archive.archive_logs(["inventory_container"]) == {"inventory_container": 2}
+
+    rows = list(log_archive.stream_log_rows("inventory_container", {"from": "2000-01-01"}))
+    assert [row.description for row in rows] == ["log 1", "log 100", "log 200"]
+    from_bound = (now - timedelta(days=150)).isoformat()
+    rows = list(log_archive.stream_log_rows("inventory_container", {"from": from_bound}))
+    assert [row.description for row in rows] == ["log 1", "log 100"]
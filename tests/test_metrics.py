@@ -0,0 +1,48 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_metrics.py
+import pytest
+from prometheus_client import REGISTRY
+
+from metrics import FIREBASE_FETCH_SECONDS, observe, render_metrics
+
+REQUEST_LABELS = {"blueprint": "sensor_readings_api", "endpoint": "sensor_readings_api.get_all_sensor_readings_db",
+                  "method": "GET", "status": "200"}
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_recorded_in_the_latency_histogram(client, api_headers):
+    before = _sample("agreemo_http_request_duration_seconds_count", REQUEST_LABELS)
+
+    assert client.get("/sensor-readings", headers=api_headers).status_code == 200
+
+    assert _sample("agreemo_http_request_duration_seconds_count", REQUEST_LABELS) == before + 1
+
+
+def test_metrics_accept_the_api_key_or_a_bearer_token(client, api_headers):
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"x-api-key": "wrong"}).status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    response = client.get("/metrics", headers=api_headers)
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    assert b"agreemo_http_request_duration_seconds_bucket" in response.data
+
+    bearer = {"Authorization": f"Bearer {api_headers['x-api-key']}"}
+    assert client.get("/metrics", headers=bearer).status_code == 200
+
+
+def test_observe_labels_the_outcome():
+    labels = {"path": "testPath"}
+    with observe(FIREBASE_FETCH_SECONDS, **labels):
+        pass
+    with pytest.raises(RuntimeError):
+        with observe(FIREBASE_FETCH_SECONDS, **labels):
+            raise RuntimeError("Firebase down")
+
+    for outcome in ("ok", "error"):
+        assert _sample("agreemo_firebase_fetch_duration_seconds_count", dict(labels, outcome=outcome)) == 1
+    body, _ = render_metrics()
+    assert b'agreemo_firebase_fetch_duration_seconds_count{outcome="error",path="testPath"} 1.0' in body
@@ -0,0 +1,64 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_notifications.py
+from datetime import datetime
+
+import pytest
+
+import notifications
+from db import db
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """(connection, events) of every batch sent; NOTIFY itself needs PostgreSQL."""
+    batches = []
+
+    def record_batch(connection, events):
+        batches.append((connection, list(events)))
+        return len(events)
+
+    monkeypatch.setattr(notifications, "_execute_batch", record_batch)
+    return batches
+
+
+def _add_log():
+    db.session.add(HardwareStatusActivityLogs(logs_description="pump on", timestamp=datetime.now(), status=True))
+
+
+def test_notification_before_commit_is_sent_with_the_commit(app, sent):
+    _add_log()
+    notifications.send_notification("hardware_status_updates", {"action": "insert"})
+    assert sent == []
+
+    connection = db.session.connection()
+    db.session.commit()
+
+    assert sent == [(connection, [("hardware_status_updates", '{"action": "insert"}')])]
+
+
+def test_rolled_back_notification_is_dropped(app, sent):
+    _add_log()
+    notifications.send_notification("hardware_status_updates", {"action": "insert"})
+    db.session.rollback()
+    db.session.commit()
+
+    assert sent == []
+
+
+def test_notification_after_commit_is_sent_on_teardown(app, sent):
+    with app.app_context():
+        _add_log()
+        db.session.commit()
+        notifications.send_notification("hardware_status_updates", {"action": "insert"})
+        notifications.send_notification("hardware_status_updates", {"action": "update"})
+        assert sent == []
+
+    assert [events for _, events in sent] == [[("hardware_status_updates", '{"action": "insert"}'),
+                                               ("hardware_status_updates", '{"action": "update"}')]]
+
+
+def test_invalid_channel_is_not_queued(app, sent):
+    with app.app_context():
+        notifications.send_notification("bad channel; DROP TABLE users", {"action": "insert"})
+
+    assert sent == []
@@ -0,0 +1,36 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_outbox.py
+import json
+from datetime import datetime
+
+import outbox
+from db import db
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.outbox_model import OutboxConsumerOffset, OutboxEvent
+from models.reason_for_rejection_model import ReasonForRejection
+
+
+def test_relay_delivers_each_event_once_in_order(app, monkeypatch):
+    delivered = []
+    monkeypatch.setattr(outbox, "_sinks", {"test": delivered.extend})
+    for number in range(3):
+        db.session.add(HardwareStatusActivityLogs(logs_description=f"pump {number}", timestamp=datetime.now(), status=True))
+        db.session.commit()
+
+    assert outbox.relay_outbox(app) == {"test": 3}
+    assert outbox.relay_outbox(app) == {"test": 0}
+
+    assert [event["payload"]["data"]["logs_description"] for event in delivered] == ["pump 0", "pump 1", "pump 2"]
+    offset = db.session.get(OutboxConsumerOffset, "test")
+    assert offset.last_event_id == delivered[-1]["event_id"]
+
+
+def test_insert_events_include_server_default_columns(app, monkeypatch):
+    # Without RETURNING the server defaults are only fetched because the mapper asks for them
+    monkeypatch.setattr(db.engine.dialect, "insert_returning", False)
+    db.session.add(ReasonForRejection(greenhouse_id=1, plant_id=1, quantity=2, price=10.0, deduction_rate=0.0,
+                                      total_price=20.0))
+    db.session.commit()
+
+    data = json.loads(OutboxEvent.query.filter_by(entity_type="rejection").one().payload)["data"]
+    assert data["status"] == "Not Sold"
+    assert data["rejection_date"] is not None
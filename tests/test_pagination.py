@@ -0,0 +1,31 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_pagination.py
+from datetime import datetime
+
+from db import db
+from models.sensors_readings_model import SensorReading
+
+
+def _walk(client, api_headers, path):
+    ids, cursor = [], None
+    for _ in range(20):
+        response = client.get(path + (f"&cursor={cursor}" if cursor else ""), headers=api_headers)
+        assert response.status_code == 200
+        ids += [reading["reading_id"] for reading in response.get_json()["db_readings"]]
+        cursor = response.get_json()["next_cursor"]
+        if cursor is None:
+            return ids
+    raise AssertionError(f"Paging did not end: {ids}")
+
+
+def test_readings_pages_walk_to_the_end(client, api_headers):
+    with client.application.app_context():
+        db.session.add_all([SensorReading(reading_value=6.0 + number, unit="pH") for number in range(3)])
+        # Whole-second times with equal values: the cursor must still move past each row
+        db.session.add_all([SensorReading(reading_value=7.0, unit="pH", reading_time=datetime(2026, 10, 17, 1, 0, 3))
+                            for _ in range(3)])
+        db.session.commit()
+        expected = [reading.reading_id for reading in SensorReading.query.order_by(
+            SensorReading.reading_time.desc(), SensorReading.reading_id.desc())]
+
+    assert _walk(client, api_headers, "/sensor-readings?limit=1") == expected
+    assert _walk(client, api_headers, "/sensor-readings?limit=2") == expected
@@ -0,0 +1,60 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_partitions.py
+from datetime import datetime
+
+import pytz
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+import partitions
+from db import db
+from models.sensors_readings_model import SensorReading
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.activity_logs.inventory_item_logs import InventoryItemLog
+
+
+def test_partitioned_tables_keep_the_time_column_out_of_the_sqlite_primary_key():
+    table = SensorReading.__table__
+    assert "PRIMARY KEY (reading_id)" in str(CreateTable(table).compile(dialect=sqlite.dialect()))
+    assert "PRIMARY KEY (reading_id, reading_time)" in str(CreateTable(table).compile(dialect=postgresql.dialect()))
+
+
+def test_sqlite_assigns_ids_to_partitioned_rows(app):
+    for number in range(2):
+        db.session.add(HardwareStatusActivityLogs(logs_description=f"pump {number}", timestamp=datetime.now(), status=True))
+    db.session.commit()
+    assert sorted(log.log_id for log in HardwareStatusActivityLogs.query.all()) == [1, 2]
+
+
+def test_log_timestamps_default_to_insert_time(app):
+    first = InventoryItemLog(inventory_item_id=1, user_id=1, activity_type="create")
+    db.session.add(first)
+    db.session.commit()
+    second = InventoryItemLog(inventory_item_id=1, user_id=1, activity_type="update")
+    db.session.add(second)
+    db.session.commit()
+    assert second.timestamp > first.timestamp
+
+
+def test_month_bounds_follow_the_column_time_convention():
+    index = partitions._month_index(2026, 12)
+    assert partitions.partition_name("inventory_logs", index) == "inventory_logs_2026_12"
+    assert partitions._month_bound(index + 1, InventoryItemLog.timestamp) == "2027-01-01T00:00:00+08:00"
+    assert partitions._month_bound(index + 1, SensorReading.reading_time) == "2027-01-01 00:00:00"
+
+
+def test_retention_is_configured_per_family(monkeypatch):
+    monkeypatch.delenv("RETENTION_MONTHS_CONTROL_LOGS", raising=False)
+    monkeypatch.setenv("RETENTION_MONTHS_SENSOR_READINGS", "6")
+    monkeypatch.setenv("ARCHIVE_SENSOR_READINGS", "false")
+    assert partitions.retention_months("sensor_readings") == 6
+    assert partitions.retention_months("control_logs") is None
+    assert partitions.archive_enabled("sensor_readings") is False
+    assert partitions.archive_enabled("control_logs") is True
+
+
+def test_maintenance_is_a_no_op_without_partitioned_tables(app, monkeypatch):
+    monkeypatch.setenv("RETENTION_MONTHS_SENSOR_READINGS", "1")
+    assert partitions.apply_retention("sensor_readings", now=datetime(2030, 1, 1, tzinfo=pytz.utc)) == []
+    summary = partitions.maintain_partitions()
+    assert set(summary) == set(partitions.PARTITION_FAMILIES)
+    assert all(result == {"created": [], "dropped": []} for result in summary.values())
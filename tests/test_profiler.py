@@ -0,0 +1,82 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_profiler.py
+import os
+import time
+
+import pytest
+
+import profiler
+
+ADMIN_KEY = "test-profiler-key"
+
+
+@pytest.fixture
+def profiling(app, monkeypatch, tmp_path):
+    """What init_profiler() registers with PROFILER_ENABLED=true (read at import), writing to tmp_path."""
+    monkeypatch.setattr(profiler, "ENABLED", True)
+    monkeypatch.setattr(profiler, "ADMIN_KEY", ADMIN_KEY)
+    monkeypatch.setattr(profiler, "PROFILER_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "INTERVAL_SECONDS", 0.001)
+    monkeypatch.setattr(profiler, "_window", None)
+    for hooks, hook in ((app.before_request_funcs, profiler._start_profile),
+                        (app.after_request_funcs, profiler._record_status),
+                        (app.teardown_request_funcs, profiler._finish_profile)):
+        monkeypatch.setitem(hooks, None, [*hooks.get(None, []), hook])
+    return tmp_path
+
+
+@pytest.fixture
+def admin_headers(api_headers):
+    return dict(api_headers, **{"X-Profiler-Key": ADMIN_KEY})
+
+
+def test_header_profiles_one_request(client, api_headers, admin_headers, profiling):
+    assert "X-Profile-Name" not in client.get("/sensor-readings", headers=dict(api_headers, **{"X-Profile": "1"})).headers
+
+    response = client.get("/sensor-readings", headers=dict(admin_headers, **{"X-Profile": "1"}))
+    name = response.headers["X-Profile-Name"]
+
+    [manifest] = client.get("/profiles", headers=admin_headers).get_json()["profiles"]
+    assert (manifest["name"], manifest["trigger"], manifest["status"], manifest["requests"]) == (name, "header", 200, 1)
+    assert manifest["endpoint"] == "sensor_readings_api.get_all_sensor_readings_db"
+    download = client.get(f"/profiles/{name}", headers=admin_headers)
+    assert download.status_code == 200
+    assert download.headers["Content-Disposition"].endswith(f"{name}.collapsed")
+
+
+def test_profile_routes_need_the_profiler_key(client, api_headers, profiling):
+    assert client.get("/profiles", headers=api_headers).status_code == 403
+    assert client.get("/profiles", headers=dict(api_headers, **{"X-Profiler-Key": "wrong"})).status_code == 403
+
+
+def test_profile_names_cannot_leave_the_profile_directory(client, admin_headers, profiling):
+    (profiling / "secret.collapsed").write_text("x 1\n")
+    assert profiler.profile_path("secret") == str(profiling / "secret.collapsed")
+    for name in ("../secret", "sub/secret", ".secret", "", "missing"):
+        assert profiler.profile_path(name) is None
+    assert client.get("/profiles/..", headers=admin_headers).status_code == 404
+
+
+def test_window_collects_every_request_into_one_profile(client, admin_headers, api_headers, profiling):
+    response = client.post("/profiles/window", json={"seconds": 0.3}, headers=admin_headers)
+    assert response.status_code == 202
+    assert client.post("/profiles/window", json={"seconds": 0.3}, headers=admin_headers).status_code == 409
+    for _ in range(3):
+        client.get("/sensor-readings", headers=api_headers)
+    assert client.get("/profiles", headers=admin_headers).get_json()["profiles"] == [] # Saved when it closes
+
+    deadline = time.monotonic() + 5
+    while not os.path.exists(profiling / f"{response.get_json()['name']}.json") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    [manifest] = client.get("/profiles", headers=admin_headers).get_json()["profiles"]
+    assert (manifest["trigger"], manifest["requests"]) == ("window", 3)
+    assert profiler._window is None
+
+    assert client.post("/profiles/window", json={"seconds": 0}, headers=admin_headers).status_code == 400
+
+
+def test_only_the_newest_profiles_are_kept(profiling, monkeypatch):
+    monkeypatch.setattr(profiler, "MAX_FILES", 2)
+    names = [profiler.save_profile(profiler.Profile("sample"))["name"] for _ in range(3)]
+
+    assert sorted(os.listdir(profiling)) == sorted(f"{name}.{extension}" for name in names[1:]
+                                                    for extension in ("collapsed", "json"))
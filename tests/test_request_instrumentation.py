@@ -0,0 +1,80 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_request_instrumentation.py
+import logging
+import re
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+import request_instrumentation
+from db import db
+from request_instrumentation import RequestStats, statement_hash
+
+
+def test_server_timing_names_the_slowest_statement_by_hash():
+    stats = RequestStats()
+    stats.query_count, stats.db_ms = 2, 20.0
+    stats.slowest_ms, stats.slowest_statement = 15.0, "SELECT *\n  FROM harvests WHERE harvest_id = ?"
+
+    header = stats.server_timing()
+
+    assert f'db-slowest;dur=15.0;desc="{statement_hash("SELECT * FROM harvests WHERE harvest_id = ?")}"' in header
+    assert "harvests" not in header
+
+
+def test_server_timing_without_queries_has_no_slowest_hash():
+    assert 'db-slowest;dur=0.0, ' in RequestStats().server_timing()
+
+
+@pytest.fixture
+def instrumented(app, monkeypatch):
+    """What init_request_instrumentation() registers with REQUEST_INSTRUMENTATION=true (read at import)."""
+    monkeypatch.setitem(app.before_request_funcs, None,
+                        [*app.before_request_funcs.get(None, []), request_instrumentation._start_request])
+    monkeypatch.setitem(app.after_request_funcs, None,
+                        [*app.after_request_funcs.get(None, []), request_instrumentation._add_server_timing])
+    monkeypatch.setattr(app, "json", request_instrumentation.TimedJSONProvider(app))
+    listeners = [("before_cursor_execute", request_instrumentation._before_cursor_execute),
+                 ("after_cursor_execute", request_instrumentation._after_cursor_execute),
+                 ("handle_error", request_instrumentation._handle_error)]
+    for name, listener in listeners:
+        event.listen(Engine, name, listener)
+    yield
+    for name, listener in listeners:
+        event.remove(Engine, name, listener)
+
+
+def test_request_reports_its_queries_in_server_timing(app, client, api_headers, instrumented):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/sensor-readings", query_string={"limit": 5}, headers=api_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert statements
+    assert f'desc="{len(statements)} queries"' in timing
+    assert re.search(r'db-slowest;dur=[\d.]+;desc="[0-9a-f]{8}"', timing)
+    assert re.search(r"serialize;dur=[\d.]+, app;dur=[\d.]+$", timing)
+
+
+def test_slow_statements_are_logged_with_their_route(app, client, api_headers, instrumented, monkeypatch, caplog):
+    monkeypatch.setattr(request_instrumentation, "SLOW_QUERY_MS", 0)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        client.get("/sensor-readings", headers=api_headers)
+
+    warnings = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert warnings
+    assert all(" in GET /sensor-readings: SELECT" in message for message in warnings)
+
+
+def test_statements_outside_requests_are_not_counted(app, instrumented):
+    db.session.execute(text("SELECT 1"))
+    assert request_instrumentation.request_stats() is None
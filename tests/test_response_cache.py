@@ -0,0 +1,48 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_response_cache.py
+from datetime import date
+
+import pytest
+
+from db import db
+from models import AdminUser, Users
+from response_cache import get_response_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_users_cache(app):
+    # The cache outlives each test's database
+    get_response_cache().invalidate(["users"], broadcast=False)
+
+
+def _seed_user_and_admin():
+    db.session.add(Users(first_name="Ana", last_name="Cruz", email="ana@example.com", password="x",
+                         date_of_birth=date(2000, 1, 1), isActive=False))
+    db.session.add(AdminUser(name="Admin", email="admin@example.com", password="x"))
+    db.session.commit()
+
+
+def test_users_list_is_invalidated_by_admin_activation(app, client, api_headers):
+    _seed_user_and_admin()
+    first = client.get("/users", headers=api_headers)
+    assert first.headers["X-Cache"] == "MISS"
+    assert client.get("/users", headers=api_headers).headers["X-Cache"] == "HIT"
+
+    response = client.post("/admin/activate", headers=api_headers,
+                           data={"admin_email": "admin@example.com", "user_email": "ana@example.com"})
+    assert response.status_code == 200
+
+    after = client.get("/users", headers=api_headers)
+    assert after.headers["X-Cache"] == "MISS"
+    assert after.get_json()[0]["isActive"] is True
+
+
+def test_rolled_back_writes_keep_the_cache(app, client, api_headers):
+    _seed_user_and_admin()
+    assert client.get("/users", headers=api_headers).headers["X-Cache"] == "MISS"
+
+    user = Users.query.first()
+    user.isActive = True
+    db.session.flush()
+    db.session.rollback()
+
+    assert client.get("/users", headers=api_headers).headers["X-Cache"] == "HIT"
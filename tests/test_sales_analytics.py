@@ -0,0 +1,79 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_sales_analytics.py
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from db import db
+from models.harvest_model import Harvest
+from models.reason_for_rejection_model import ReasonForRejection
+from models.sale_model import Sale
+from sales_analytics import SummaryQueryError, parse_summary_args, summarize
+
+
+def _seed():
+    harvests = [
+        Harvest(user_id=1, greenhouse_id=1, plant_id=10, plant_name="Lettuce", name="A", plant_type="Leafy",
+                total_yield=100, accepted=90, total_rejected=10, harvest_date=date(2026, 3, 14), price=5.0, total_price=450.0),
+        Harvest(user_id=1, greenhouse_id=2, plant_id=20, plant_name="Kale", name="B", plant_type="Leafy",
+                total_yield=50, accepted=50, total_rejected=0, harvest_date=date(2026, 4, 2), price=8.0, total_price=400.0),
+    ]
+    rejection = ReasonForRejection(greenhouse_id=1, plant_id=10, plant_name="Lettuce", type="too_small", quantity=10,
+                                   rejection_date=date(2026, 3, 14), price=2.0, deduction_rate=0.0, total_price=20.0)
+    db.session.add_all([*harvests, rejection])
+    db.session.flush()
+    db.session.add_all([
+        # 17:00 UTC on the 14th is 01:00 on the 15th in PH time
+        Sale(user_id=1, harvest_id=harvests[0].harvest_id, plant_name="Lettuce", name="Ana", currentPrice=5.0,
+             quantity=40, total_price=200.0, salesDate=datetime(2026, 3, 14, 17, 0, tzinfo=pytz.utc)),
+        Sale(user_id=1, rejection_id=rejection.rejection_id, plant_name="Lettuce", name="Ana", currentPrice=2.0,
+             quantity=10, total_price=20.0, salesDate=datetime(2026, 3, 14, 3, 0, tzinfo=pytz.utc)),
+        Sale(user_id=1, harvest_id=harvests[1].harvest_id, plant_name="Kale", name="Ana", currentPrice=8.0,
+             quantity=25, total_price=200.0, salesDate=datetime(2026, 4, 3, 1, 0, tzinfo=pytz.utc)),
+    ])
+    db.session.commit()
+
+
+def test_sales_count_for_the_greenhouse_and_plant_they_were_sold_from(app):
+    _seed()
+
+    rows, totals = summarize("greenhouse")
+    assert [(row["greenhouse_id"], row["total_yield"], row["revenue"], row["quantity_sold"]) for row in rows] == [
+        (1, 100, 220.0, 50.0), (2, 50, 200.0, 25.0)]
+    assert rows[0]["rejected_by_type"] == {"too_small": 10}
+    assert rows[0]["sell_through_rate"] == 0.5 # 50 sold of 90 accepted + 10 rejected
+    assert (totals["revenue"], totals["quantity_sold"], totals["average_price"]) == (420.0, 75.0, 5.6)
+
+    rows, _ = summarize("plant", greenhouse_id=2)
+    assert [(row["plant_id"], row["plant_name"], row["revenue"]) for row in rows] == [(20, "Kale", 200.0)]
+
+
+def test_sales_are_bucketed_by_their_ph_date(app):
+    _seed()
+
+    rows, _ = summarize("day")
+    assert [(row["period"], row["total_yield"], row["revenue"]) for row in rows] == [
+        ("2026-03-14", 100, 20.0), ("2026-03-15", 0, 200.0), ("2026-04-02", 50, 0.0), ("2026-04-03", 0, 200.0)]
+
+    rows, _ = summarize("month")
+    assert [(row["period"], row["revenue"]) for row in rows] == [("2026-03", 220.0), ("2026-04", 200.0)]
+
+
+def test_from_is_inclusive_and_to_exclusive_in_ph_dates(app):
+    _seed()
+
+    rows, _ = summarize("day", start=date(2026, 3, 15), end=date(2026, 4, 3))
+    assert [(row["period"], row["revenue"]) for row in rows] == [("2026-03-15", 200.0), ("2026-04-02", 0.0)]
+
+    rows, _ = summarize("day", end=date(2026, 3, 15))
+    assert [(row["period"], row["revenue"]) for row in rows] == [("2026-03-14", 20.0)]
+
+
+def test_invalid_arguments_are_reported_together():
+    with pytest.raises(SummaryQueryError) as error:
+        parse_summary_args({"group_by": "week", "from": "14/03/2026", "greenhouse_id": "x"})
+    assert set(error.value.details) == {"group_by", "from", "greenhouse_id"}
+
+    with pytest.raises(SummaryQueryError) as error:
+        parse_summary_args({"group_by": "day", "from": "2026-03-15", "to": "2026-03-15"})
+    assert set(error.value.details) == {"range"}
@@ -0,0 +1,80 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_sensor_batch.py
+import json
+from datetime import datetime
+
+from sqlalchemy import event
+
+import routes.sensor_readings_routes as sensor_readings_routes
+from db import db
+from models.sensors_readings_model import SensorReading
+from models.sensor_reading_rollup_model import SensorReadingRollup
+
+
+def _stored():
+    return sorted((reading.unit, reading.reading_value, reading.reading_time) for reading in SensorReading.query)
+
+
+def test_batch_stores_valid_items_and_reports_the_rest_by_index(client, api_headers):
+    response = client.post("/sensor-readings/batch", headers=api_headers, json={"readings": [
+        {"value": 6.4, "unit": "pH", "reading_time": "2026-10-17T09:00:00"}, # Naive: PH time
+        {"value": "abc", "unit": "pH"},
+        {"value": 820, "unit": "ppm", "reading_time": 1792206000}, # Epoch seconds
+        {"unit": "pH", "reading_time": "not a time"},
+        "not an object",
+    ]})
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body["inserted"], body["rejected"]) == (2, 3)
+    assert {error["index"]: sorted(error["errors"]) for error in body["errors"]} == {
+        1: ["value"], 3: ["reading_time", "value"], 4: ["item"]}
+    assert _stored() == [("pH", 6.4, datetime(2026, 10, 17, 1, 0)), ("ppm", 820.0, datetime(2026, 10, 17, 3, 0))]
+    # The stored readings are folded into the rollups in the same transaction
+    assert SensorReadingRollup.query.filter_by(bucket="minute").count() == 2
+
+
+def test_ndjson_batch_reports_bad_lines(client, api_headers):
+    lines = [json.dumps({"value": 6.1, "unit": "pH"}), "{not json", json.dumps({"value": 6.2, "unit": "pH"})]
+    response = client.post("/sensor-readings/batch", data="\n".join(lines) + "\n",
+                           headers=dict(api_headers, **{"Content-Type": "application/x-ndjson"}))
+
+    assert response.status_code == 207
+    assert [error["index"] for error in response.get_json()["errors"]] == [1]
+    assert [value for _, value, _ in _stored()] == [6.1, 6.2]
+
+
+def test_batch_without_valid_items_stores_nothing(client, api_headers):
+    response = client.post("/sensor-readings/batch", headers=api_headers, json=[{"unit": "pH"}])
+
+    assert response.status_code == 400
+    assert response.get_json()["error"]["details"] == [{"index": 0, "errors": {"value": "Required field."}}]
+    assert SensorReading.query.count() == 0
+
+
+def test_batch_size_and_body_are_checked_first(client, api_headers, monkeypatch):
+    monkeypatch.setattr(sensor_readings_routes, "MAX_BATCH_READINGS", 2)
+    response = client.post("/sensor-readings/batch", headers=api_headers, json=[{"value": 1, "unit": "pH"}] * 3)
+    assert response.status_code == 413
+
+    response = client.post("/sensor-readings/batch", headers=api_headers, json={"value": 1, "unit": "pH"})
+    assert response.status_code == 400
+    assert SensorReading.query.count() == 0
+
+
+def test_batch_uses_one_multi_row_insert_outside_postgresql(app, client, api_headers):
+    inserts = []
+
+    def record_insert(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO sensor_readings "):
+            inserts.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record_insert)
+    try:
+        response = client.post("/sensor-readings/batch", headers=api_headers,
+                               json=[{"value": value, "unit": "pH"} for value in (6.0, 6.1, 6.2)])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record_insert)
+
+    assert response.status_code == 201
+    assert len(inserts) == 1
+    assert SensorReading.query.count() == 3
@@ -0,0 +1,41 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_sensor_ingest.py
+import pytest
+
+from job_locks import lock_held
+from models.sensors_readings_model import SensorReading
+from sensor_ingest import STREAM_LOCK_NAME, FakeSensorEventSource, sensor_stream_running, start_sensor_stream
+
+
+@pytest.fixture
+def stream(app):
+    source = FakeSensorEventSource()
+    pipeline = start_sensor_stream(app, source)
+    yield source, pipeline
+    if pipeline is not None:
+        pipeline.stop()
+    app.extensions.pop('sensor_ingest', None)
+
+
+def test_stream_stores_pushed_readings(app, stream):
+    source, pipeline = stream
+    source.push("/", {"ph": {"value": 6.4}, "tds": {"value": 820}})
+    source.push("/ph/value", 6.5)
+    pipeline.flush_now()
+
+    readings = sorted((reading.unit, reading.reading_value) for reading in SensorReading.query)
+    assert readings == [("pH", 6.4), ("pH", 6.5), ("ppm", 820.0)]
+
+
+def test_only_one_stream_runs_and_the_poller_stands_down(app, stream):
+    source, pipeline = stream
+    other_source = FakeSensorEventSource()
+
+    assert start_sensor_stream(app, other_source) is None # Lock held by the first stream
+    assert lock_held(STREAM_LOCK_NAME)
+    # Another process sees the lock even without a pipeline of its own
+    app.extensions.pop('sensor_ingest')
+    assert sensor_stream_running(app)
+
+    pipeline.stop()
+    assert not lock_held(STREAM_LOCK_NAME)
+    assert not sensor_stream_running(app)
@@ -0,0 +1,25 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_sensor_rollups.py
+from datetime import datetime
+
+from db import db
+from models.sensor_reading_rollup_model import SensorReadingRollup
+from sensor_rollups import NO_GREENHOUSE_ID, update_rollups
+
+
+def _reading(second, value):
+    return {"unit": "pH", "reading_time": datetime(2026, 10, 17, 1, 0, second), "reading_value": value}
+
+
+def test_batches_fold_into_one_row_per_bucket(app):
+    update_rollups([_reading(10, 6.0), _reading(20, 7.5)], analytics=False)
+    db.session.commit()
+    update_rollups([_reading(5, 5.5)], analytics=False) # Older than the bucket's last reading
+    db.session.commit()
+
+    rows = SensorReadingRollup.query.filter_by(bucket="minute").all()
+    assert len(rows) == 1
+    row = rows[0]
+    assert row.greenhouse_id == NO_GREENHOUSE_ID
+    assert (row.min_value, row.max_value, row.sum_value, row.reading_count) == (5.5, 7.5, 19.0, 3)
+    assert (row.last_value, row.last_time) == (7.5, datetime(2026, 10, 17, 1, 0, 20))
+    assert SensorReadingRollup.query.count() == 3 # minute, hour and day
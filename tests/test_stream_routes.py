@@ -0,0 +1,70 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_stream_routes.py
+import time
+
+import pytest
+
+from change_hub import ChangeHub
+from routes import stream_routes
+
+
+def test_stream_is_refused_without_a_configured_api_key(client, monkeypatch):
+    monkeypatch.setattr(stream_routes, "API_KEY", None)
+
+    assert client.get("/stream").status_code == 503
+    assert client.get("/stream?api_key=").status_code == 503
+
+
+def test_stream_requires_the_api_key(client):
+    assert client.get("/stream").status_code == 403
+    assert client.get("/stream?api_key=wrong").status_code == 403
+
+
+def _change(transaction_id, event_id):
+    return {"event_id": event_id, "transaction_id": transaction_id, "channel": "harvests_updates",
+            "entity_type": "harvest", "entity_id": event_id, "action": "insert", "payload": {"data": {}}}
+
+
+def _frame_ids(response, count):
+    ids = []
+    for chunk in response.iter_encoded():
+        ids += [line[len("id: "):] for line in chunk.decode().splitlines() if line.startswith("id: ")]
+        if len(ids) >= count:
+            return ids
+
+
+@pytest.fixture
+def hub(app, monkeypatch):
+    hub = ChangeHub(app, coalesce_seconds=0).start()
+    monkeypatch.setitem(app.extensions, "change_hub", hub)
+    yield hub
+    hub.stop()
+
+
+def _publish_out_of_event_id_order(hub):
+    # Transaction 10 took event_id 4 and transaction 11 event_id 3; the relay delivers 10 first
+    hub.publish(_change(10, 4))
+    hub.publish(_change(11, 3))
+
+
+def test_stream_sends_events_committed_out_of_event_id_order(client, api_headers, hub):
+    response = client.get("/stream?channels=harvests", headers=api_headers, buffered=False)
+
+    _publish_out_of_event_id_order(hub)
+    ids = _frame_ids(response, 2)
+    response.close()
+
+    assert ids == ["10-4", "11-3"]
+
+
+def test_resume_replays_events_with_lower_event_ids(client, api_headers, hub):
+    _publish_out_of_event_id_order(hub)
+    deadline = time.monotonic() + 5
+    while hub.snapshot_stats()["delivered"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    headers = dict(api_headers, **{"Last-Event-ID": "10-4"})
+    response = client.get("/stream?channels=harvests", headers=headers, buffered=False)
+    ids = _frame_ids(response, 1)
+    response.close()
+
+    assert ids == ["11-3"]
@@ -0,0 +1,78 @@
+# C:\Users\Giebert\PycharmProjects\agreemo_api_v2\tests\test_sync.py
+from datetime import datetime, timedelta
+
+import pytz
+
+import outbox
+import sync
+from db import db
+from pagination import encode_cursor
+from models.outbox_model import OutboxEvent
+from models.activity_logs.hardware_status_logs_model import HardwareStatusActivityLogs
+from models.reason_for_rejection_model import ReasonForRejection
+
+
+def _rejection(quantity):
+    rejection = ReasonForRejection(greenhouse_id=1, plant_id=1, quantity=quantity, price=10.0,
+                                   deduction_rate=0.0, total_price=10.0 * quantity)
+    db.session.add(rejection)
+    db.session.commit()
+    return rejection
+
+
+def _sync(client, api_headers, since=None):
+    params = {"since": since} if since else {}
+    response = client.get("/sync", query_string=params, headers=api_headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_sync_reports_changes_after_the_cursor(app, client, api_headers):
+    first = _sync(client, api_headers)
+    assert first["full_resync"] is True
+
+    kept, removed = _rejection(1), _rejection(2)
+    kept_id, removed_id = kept.rejection_id, removed.rejection_id
+    kept.quantity = 3
+    db.session.delete(removed)
+    db.session.commit()
+
+    delta = _sync(client, api_headers, first["cursor"])
+    assert delta["full_resync"] is False
+    assert delta["changes"] == {"rejections": {"upserted": [kept_id], "deleted": [removed_id]}}
+
+    idle = _sync(client, api_headers, delta["cursor"])
+    assert idle["changes"] == {}
+
+
+def test_sync_resets_a_type_after_a_bulk_delete(app, client, api_headers):
+    cursor = _sync(client, api_headers)["cursor"]
+    _rejection(1)
+    ReasonForRejection.query.delete()
+    db.session.commit()
+
+    assert _sync(client, api_headers, cursor)["changes"] == {"rejections": {"reset": True}}
+
+
+def test_old_and_timestamp_cursors_get_a_full_resync(app, client, api_headers):
+    stale = sync.encode_sync_cursor((0, 0), datetime.now(pytz.utc) - timedelta(days=sync.SYNC_RETENTION_DAYS + 1))
+    assert _sync(client, api_headers, stale)["full_resync"] is True
+
+    legacy = encode_cursor(datetime.now(pytz.utc), 0)
+    assert _sync(client, api_headers, legacy)["full_resync"] is True
+
+    response = client.get("/sync", query_string={"since": "not-a-cursor"}, headers=api_headers)
+    assert response.status_code == 400
+
+
+def test_prune_keeps_synced_channels_for_the_sync_retention(app, monkeypatch):
+    monkeypatch.setattr(outbox, "_sinks", {"test": [].extend})
+    _rejection(1)
+    db.session.add(HardwareStatusActivityLogs(logs_description="pump", timestamp=datetime.now(), status=True))
+    db.session.commit()
+    outbox.relay_outbox(app)
+    OutboxEvent.query.update({OutboxEvent.created_at: datetime.utcnow() - timedelta(hours=outbox.RETENTION_HOURS + 1)})
+    db.session.commit()
+
+    assert outbox.prune_outbox() == 1
+    assert [event.entity_type for event in OutboxEvent.query.all()] == ["rejection"]